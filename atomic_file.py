@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Atomic File Writes for Aerospace Newsletter
+Replaces state files (subscribers, feed cache, feed health, dedup index,
+send journal) so a crash or a concurrent reader never sees half a file
+"""
+
+import os
+from contextlib import contextmanager
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def _fsync_directory(path: str):
+    """Make a rename in ``path``'s directory durable; skipped where directories cannot be opened (Windows)"""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w'):
+    """Write ``path`` through a temporary file that replaces it once complete and on disk
+
+    The file is written to ``<path>.tmp``, fsync'd, renamed over ``path``
+    and the rename fsync'd, so readers and the file after a power loss
+    show either the old or the new contents. If the block raises, the
+    temporary file is removed, ``path`` is left alone and the error
+    propagates.
+    """
+    tmp_file = f"{path}.tmp"
+    try:
+        with open(tmp_file, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    _fsync_directory(path)
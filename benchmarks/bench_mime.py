@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+MIME Message Benchmark
+Compares building a full MIMEMultipart per recipient with DigestMessage,
+which encodes the body once and only prepends the To header per recipient
+
+Usage: python benchmarks/bench_mime.py
+"""
+
+import os
+import sys
+import timeit
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_render import make_articles
+from digest_message import DigestMessage
+from digest_renderer import DigestRenderer
+
+SIZES = [10, 100, 1000]
+RECIPIENTS = 200
+
+def build_per_recipient(recipient, text_content, html_content):
+    """Previous approach: a new MIME tree encoded for every recipient"""
+    message = MIMEMultipart("alternative")
+    message["Subject"] = "Latest Aerospace & Defense News"
+    message["From"] = "newsletter@example.com"
+    message["To"] = recipient
+    message.attach(MIMEText(text_content, "plain"))
+    message.attach(MIMEText(html_content, "html"))
+    return message.as_string()
+
+def per_call(func, count):
+    return min(timeit.repeat(func, number=1, repeat=3)) / count
+
+def main():
+    renderer = DigestRenderer()
+    recipients = [f"subscriber{i}@example.com" for i in range(RECIPIENTS)]
+    print(f"{'Articles':>8} {'Body (KB)':>10} {'Old per recipient (µs)':>23} {'Encode once (µs)':>17} "
+          f"{'New headers (µs)':>17} {'New headers + join (µs)':>24}")
+    for size in SIZES:
+        html_content, text_content = renderer.render(make_articles(size))
+
+        def make_digest():
+            return DigestMessage("Latest Aerospace & Defense News", "newsletter@example.com",
+                                 text_content, html_content)
+
+        digest = make_digest()
+        old = per_call(lambda: [build_per_recipient(r, text_content, html_content) for r in recipients], RECIPIENTS)
+        encode = per_call(make_digest, 1)
+        headers = per_call(lambda: [digest.recipient_headers(r) for r in recipients], RECIPIENTS)
+        joined = per_call(lambda: [digest.for_recipient(r) for r in recipients], RECIPIENTS)
+        print(f"{size:>8} {len(digest.body) / 1024:>10.0f} {old * 1e6:>23.1f} {encode * 1e6:>17.1f} "
+              f"{headers * 1e6:>17.1f} {joined * 1e6:>24.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Digest Rendering Benchmark
+Times DigestRenderer rendering both digest bodies at 10, 1,000 and 10,000
+articles
+
+Usage: python benchmarks/bench_render.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from digest_renderer import DigestRenderer
+
+SIZES = [10, 1000, 10000]
+
+def make_articles(count):
+    """Build synthetic articles with HTML summaries like real feeds"""
+    return [
+        {
+            'title': f"Article {i}: Space Force awards launch contract",
+            'link': f"https://example.com/articles/{i}",
+            'published': 'Mon, 01 Jan 2024 12:00:00 +0000',
+            'summary': f"<p>Summary {i} with <b>markup</b> " + "lorem ipsum dolor " * 20 + "</p>"
+        }
+        for i in range(count)
+    ]
+
+def main():
+    renderer = DigestRenderer()
+    print(f"{'Articles':>10} {'Render (ms)':>14} {'Per article (µs)':>17}")
+    for size in SIZES:
+        articles = make_articles(size)
+        number = max(3, 20000 // size)
+        elapsed = min(timeit.repeat(lambda: renderer.render(articles), number=number, repeat=5)) / number
+        print(f"{size:>10} {elapsed * 1000:>14.2f} {elapsed / size * 1e6:>17.1f}")
+
+if __name__ == '__main__':
+    main()
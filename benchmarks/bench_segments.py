@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Topic Segmentation Benchmark
+Times building every subscriber's digest when each one is rendered and
+MIME-encoded per subscriber, against planning segments and rendering once
+per segment, for growing subscriber counts with random topic choices
+
+Usage: python benchmarks/bench_segments.py [articles]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from digest_message import DigestMessage
+from digest_renderer import DigestRenderer
+from segmentation import TOPICS, TopicIndex, plan_segments, topic_key
+
+SUBSCRIBER_COUNTS = [100, 1000, 10000]
+SUBJECTS = ["Space Force awards launch contract", "New drone delivery trial",
+            "Pentagon budget request", "Lunar lander test", "Airline fleet update"]
+
+def make_articles(count):
+    """Synthetic articles spread over the topics, some matching none"""
+    return [
+        {
+            'title': f"Article {i}: {SUBJECTS[i % len(SUBJECTS)]}",
+            'link': f"https://example.com/articles/{i}",
+            'published': 'Mon, 01 Jan 2024 12:00:00 +0000',
+            'summary': f"<p>Summary {i} with <b>markup</b> " + "lorem ipsum dolor " * 20 + "</p>"
+        }
+        for i in range(count)
+    ]
+
+def make_subscribers(count):
+    rng = random.Random(42)
+    names = list(TOPICS)
+    return [
+        {'email': f"user{i}@example.com", 'topics': rng.sample(names, rng.randint(0, len(names)))}
+        for i in range(count)
+    ]
+
+def per_subscriber(renderer, articles, subscribers):
+    """Naive approach: filter, render and encode for every subscriber"""
+    index = TopicIndex(articles)
+    for subscriber in subscribers:
+        selected = index.select(topic_key(subscriber))
+        html, text = renderer.render(selected)
+        DigestMessage("Digest", "news@example.com", text, html)
+
+def per_segment(renderer, articles, subscribers):
+    segments = plan_segments(articles, subscribers)
+    for segment in segments:
+        html, text = renderer.render(segment.articles)
+        DigestMessage("Digest", "news@example.com", text, html)
+    return len(segments)
+
+def main():
+    article_count = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    articles = make_articles(article_count)
+    renderer = DigestRenderer()
+    print(f"{article_count} articles, {len(TOPICS)} topics")
+    print(f"{'Subscribers':>12} {'Segments':>9} {'Per subscriber (s)':>19} {'Per segment (s)':>16} {'Speedup':>8}")
+    for count in SUBSCRIBER_COUNTS:
+        subscribers = make_subscribers(count)
+        started = time.perf_counter()
+        per_subscriber(renderer, articles, subscribers)
+        old = time.perf_counter() - started
+        started = time.perf_counter()
+        segments = per_segment(renderer, articles, subscribers)
+        new = time.perf_counter() - started
+        print(f"{count:>12} {segments:>9} {old:>19.3f} {new:>16.4f} {old / new:>7.0f}x")
+
+if __name__ == '__main__':
+    main()
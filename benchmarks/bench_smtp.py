@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+SMTP Delivery Throughput Benchmark
+Sends a digest through DeliveryEngine to a local aiosmtpd server that adds
+a fixed per-message latency (emulating a relay round-trip) and reports
+throughput for increasing connection pool sizes, then for increasing
+numbers of recipients per transaction over a single connection
+
+Requires aiosmtpd (pip install aiosmtpd); it is not a runtime dependency.
+
+Usage: python benchmarks/bench_smtp.py [latency_ms]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiosmtpd.controller import Controller
+
+from bench_render import make_articles
+from digest_message import DigestMessage
+from digest_renderer import DigestRenderer
+from smtp_delivery import DeliveryEngine
+
+POOL_SIZES = [1, 2, 4, 8]
+BATCH_SIZES = [1, 10, 50]
+RECIPIENTS = 200
+
+class SlowHandler:
+    """Accepts every message after a fixed delay"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.received = 0
+        self.transactions = 0
+        self.uploaded_bytes = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.latency)
+        self.received += len(envelope.rcpt_tos)
+        self.transactions += 1
+        self.uploaded_bytes += len(envelope.original_content)
+        return '250 Message accepted for delivery'
+
+def main():
+    latency = (float(sys.argv[1]) if len(sys.argv) > 1 else 20) / 1000
+    handler = SlowHandler(latency)
+    controller = Controller(handler, hostname='127.0.0.1', port=8025)
+    controller.start()
+
+    html_content, text_content = DigestRenderer().render(make_articles(20))
+    digest = DigestMessage("Latest Aerospace & Defense News", "newsletter@example.com", text_content, html_content)
+    recipients = [f"subscriber{i}@example.com" for i in range(RECIPIENTS)]
+
+    try:
+        print(f"{RECIPIENTS} recipients, {latency * 1000:.0f} ms server latency per message")
+        print(f"{'Connections':>11} {'Seconds':>8} {'Messages/s':>11} {'Speedup':>8}")
+        baseline = None
+        for pool_size in POOL_SIZES:
+            engine = DeliveryEngine('127.0.0.1', 8025, pool_size=pool_size, use_tls=False)
+            started = time.perf_counter()
+            report = engine.deliver(digest, recipients)
+            elapsed = time.perf_counter() - started
+            assert len(report.sent) == RECIPIENTS, report.failed
+            rate = RECIPIENTS / elapsed
+            baseline = baseline or rate
+            print(f"{pool_size:>11} {elapsed:>8.2f} {rate:>11.1f} {rate / baseline:>7.1f}x")
+
+        print()
+        print(f"{'Batch size':>11} {'Seconds':>8} {'Messages/s':>11} {'DATA':>6} {'Uploaded KB':>12}")
+        for batch_size in BATCH_SIZES:
+            handler.transactions = handler.uploaded_bytes = 0
+            engine = DeliveryEngine('127.0.0.1', 8025, batch_size=batch_size, use_tls=False)
+            started = time.perf_counter()
+            report = engine.deliver(digest, recipients)
+            elapsed = time.perf_counter() - started
+            assert len(report.sent) == RECIPIENTS, report.failed
+            print(f"{batch_size:>11} {elapsed:>8.2f} {RECIPIENTS / elapsed:>11.1f} "
+                  f"{handler.transactions:>6} {handler.uploaded_bytes / 1024:>12.1f}")
+    finally:
+        controller.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Subscriber Memory Benchmark
+Measures the memory held by an EmailManager's subscribers and lookup
+indexes, with subscribers as plain dicts (as loaded from the JSON file
+before compact records) and as slotted Subscriber records
+
+Usage: python benchmarks/bench_subscriber_memory.py [subscribers]
+"""
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from email_manager import EmailManager
+from subscriber import Subscriber
+from subscriber_store import SubscriberStore
+
+START = datetime(2024, 1, 1, 8, 30)
+
+def make_fields(count):
+    """Yield field tuples shaped like real subscribers, with fresh strings for each"""
+    for i in range(count):
+        subscribed_at = (START + timedelta(seconds=i * 37, microseconds=i % 997)).isoformat()
+        active = i % 10 != 0
+        yield (
+            f"subscriber{i}@example.com",
+            f"Subscriber {i}" if i % 3 else None,
+            subscribed_at,
+            active,
+            f"{i * 2654435761 % 2 ** 128:032x}",
+            None if active else (START + timedelta(days=30, seconds=i)).isoformat()
+        )
+
+def dict_subscribers(count):
+    """What the manager held before: one dict per subscriber, indexed by email and hex token"""
+    subscribers = []
+    for email, name, subscribed_at, active, token, unsubscribed_at in make_fields(count):
+        subscriber = {
+            'email': email,
+            'name': name,
+            'subscribed_at': subscribed_at,
+            'active': active,
+            'unsubscribe_token': token
+        }
+        if unsubscribed_at:
+            subscriber['unsubscribed_at'] = unsubscribed_at
+        subscribers.append(subscriber)
+    by_email = {s['email'].strip().lower(): s for s in subscribers}
+    by_token = {s['unsubscribe_token']: s for s in subscribers}
+    return subscribers, by_email, by_token
+
+class GeneratedStore(SubscriberStore):
+    """Hands the manager compact records without a file in between"""
+
+    incremental = True
+
+    def __init__(self, count):
+        self.count = count
+
+    def load(self):
+        return [Subscriber(*fields) for fields in make_fields(self.count)]
+
+    def save(self, subscribers, changed=None):
+        return True
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    held = build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    gc.collect()
+    return current, peak, elapsed
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{count:,} subscribers, records plus email and token indexes")
+    print(f"{'Layout':>10} {'Held (MB)':>10} {'Peak (MB)':>10} {'Per subscriber (B)':>19} {'Build (s)':>10}")
+    results = {}
+    for label, build in (
+        ('dict', lambda: dict_subscribers(count)),
+        ('slots', lambda: EmailManager(store=GeneratedStore(count))),
+    ):
+        current, peak, elapsed = measure(build)
+        results[label] = current
+        print(f"{label:>10} {current / 2 ** 20:>10.1f} {peak / 2 ** 20:>10.1f} "
+              f"{current / count:>19.0f} {elapsed:>10.2f}")
+    print(f"Compact records hold {1 - results['slots'] / results['dict']:.0%} less memory")
+
+if __name__ == '__main__':
+    main()
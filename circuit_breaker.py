@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Feed Circuit Breaker for Aerospace Newsletter
+Tracks feed health across runs and skips feeds that keep failing or
+responding slowly, so one unhealthy host cannot stall the newsletter job
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List
+import logging
+
+from atomic_file import atomic_write
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """Persisted per-feed circuit breaker
+
+    A feed that fails ``failure_threshold`` runs in a row (errors, timeouts or
+    responses slower than ``slow_threshold`` seconds) is opened and skipped for
+    the next ``cooldown_runs`` runs. After the cooldown one trial fetch is
+    allowed: success closes the circuit, another failure opens it again.
+    """
+
+    def __init__(self, storage_file: str = "feed_health.json", failure_threshold: int = 3,
+                 cooldown_runs: int = 5, slow_threshold: float = None):
+        self.storage_file = storage_file
+        self.failure_threshold = failure_threshold
+        self.cooldown_runs = cooldown_runs
+        self.slow_threshold = slow_threshold
+        self._lock = threading.Lock()
+        self.feeds = self._load_feeds()
+
+    def _load_feeds(self) -> Dict[str, Dict]:
+        """Load feed health from storage file"""
+        if os.path.exists(self.storage_file):
+            try:
+                with open(self.storage_file, 'r') as f:
+                    data = json.load(f)
+                    return data.get('feeds', {})
+            except (json.JSONDecodeError, FileNotFoundError) as e:
+                logger.error(f"Error loading feed health: {e}")
+        return {}
+
+    def save(self) -> bool:
+        """Atomically write feed health to its storage file"""
+        with self._lock:
+            data = {
+                'feeds': self.feeds,
+                'last_updated': datetime.now().isoformat()
+            }
+            try:
+                with atomic_write(self.storage_file) as f:
+                    json.dump(data, f, indent=2)
+                return True
+            except Exception as e:
+                logger.error(f"Error saving feed health: {e}")
+                return False
+
+    def _state(self, url: str) -> Dict:
+        return self.feeds.setdefault(url, {'failures': 0, 'skip_runs': 0, 'last_error': None})
+
+    def allow(self, url: str) -> bool:
+        """Check whether a feed may be fetched this run, consuming one cooldown run if open"""
+        with self._lock:
+            state = self._state(url)
+            if state['skip_runs'] > 0:
+                state['skip_runs'] -= 1
+                return False
+            return True
+
+    def record_success(self, url: str, elapsed: float) -> bool:
+        """Record a completed fetch; slow responses count as failures. Returns True if the circuit opened"""
+        if self.slow_threshold is not None and elapsed > self.slow_threshold:
+            return self.record_failure(url, f"slow response ({elapsed:.1f}s)")
+        with self._lock:
+            self.feeds[url] = {'failures': 0, 'skip_runs': 0, 'last_error': None}
+        return False
+
+    def record_failure(self, url: str, reason: str) -> bool:
+        """Record a failed fetch. Returns True if the circuit opened"""
+        with self._lock:
+            state = self._state(url)
+            state['failures'] += 1
+            state['last_error'] = reason
+            state['last_failure_at'] = datetime.now().isoformat()
+            if state['failures'] >= self.failure_threshold:
+                state['skip_runs'] = self.cooldown_runs
+                return True
+            return False
+
+    def open_feeds(self) -> List[str]:
+        """Get feeds that are currently being skipped"""
+        with self._lock:
+            return [url for url, state in self.feeds.items() if state['skip_runs'] > 0]
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Article Deduplication Index for Aerospace Newsletter
+Drops articles syndicated by several feeds and articles already sent in a
+previous digest, keyed on canonicalized link and entry GUID
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import logging
+
+from atomic_file import atomic_write
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track where a click came from
+TRACKING_PARAM_PREFIXES = ('utm_', 'mc_')
+TRACKING_PARAMS = {'fbclid', 'gclid', 'cmpid', 'ref'}
+
+def canonicalize_link(link: str) -> str:
+    """Normalize an article URL so syndicated copies of it compare equal"""
+    parts = urlsplit(link.strip())
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PARAM_PREFIXES)
+    )
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+class DedupIndex:
+    """Persisted set of article keys with time-based expiry
+
+    Keys of articles seen during the current run are kept in memory so
+    duplicates across feeds are dropped; keys are only persisted through
+    ``mark_sent`` so articles that never went out are offered again.
+    """
+
+    def __init__(self, storage_file: str = "dedup_index.json", ttl_days: float = 30):
+        self.storage_file = storage_file
+        self.ttl_seconds = ttl_days * 86400
+        self.duplicates = 0
+        self._run_keys = set()
+        self._lock = threading.Lock()
+        self.seen = self._load_seen()
+
+    def _load_seen(self) -> Dict[str, int]:
+        """Load sent article keys from storage file, dropping expired ones"""
+        if os.path.exists(self.storage_file):
+            try:
+                with open(self.storage_file, 'r') as f:
+                    data = json.load(f)
+                    return self._unexpired(data.get('seen', {}))
+            except (json.JSONDecodeError, FileNotFoundError) as e:
+                logger.error(f"Error loading dedup index: {e}")
+        return {}
+
+    def _unexpired(self, seen: Dict[str, int]) -> Dict[str, int]:
+        cutoff = time.time() - self.ttl_seconds
+        return {key: ts for key, ts in seen.items() if ts >= cutoff}
+
+    def save(self) -> bool:
+        """Atomically write unexpired keys to the storage file"""
+        with self._lock:
+            self.seen = self._unexpired(self.seen)
+            data = {
+                'seen': self.seen,
+                'last_updated': datetime.now().isoformat(),
+                'total_count': len(self.seen)
+            }
+            try:
+                with atomic_write(self.storage_file) as f:
+                    json.dump(data, f)
+                return True
+            except Exception as e:
+                logger.error(f"Error saving dedup index: {e}")
+                return False
+
+    @staticmethod
+    def article_keys(article: Dict) -> List[str]:
+        """Get the index keys identifying an article"""
+        keys = []
+        if article.get('link'):
+            keys.append(f"link:{canonicalize_link(article['link'])}")
+        if article.get('guid'):
+            keys.append(f"guid:{article['guid']}")
+        return keys
+
+    def filter(self, articles: Iterable[Dict]) -> Iterator[Dict]:
+        """Yield only articles not sent before and not yet seen this run"""
+        for article in articles:
+            keys = self.article_keys(article)
+            with self._lock:
+                if any(key in self.seen or key in self._run_keys for key in keys):
+                    self.duplicates += 1
+                    continue
+                self._run_keys.update(keys)
+            yield article
+
+    def mark_sent(self, articles: Iterable[Dict]):
+        """Remember articles that went out so later runs skip them"""
+        now = int(time.time())
+        with self._lock:
+            for article in articles:
+                for key in self.article_keys(article):
+                    self.seen[key] = now
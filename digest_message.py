@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Digest Message Factory for Aerospace Newsletter
+Encodes the newsletter MIME body once and addresses it to each recipient
+by prepending only the per-recipient headers
+"""
+
+import hashlib
+from email import policy
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+# RFC 5322 empty group used as ``To`` when recipients share one transaction
+UNDISCLOSED_RECIPIENTS = "undisclosed-recipients:;"
+
+class DigestMessage:
+    """A multipart/alternative digest serialized once and reused for every recipient
+
+    The text and HTML parts are base64/quoted-printable encoded and the whole
+    message (minus ``To``) is serialized to CRLF bytes in the constructor, so
+    ``for_recipient`` only builds the ``To`` header: O(headers) per recipient
+    instead of O(body). The MIME boundary is derived from the content rather
+    than chosen at random, so the encoded message, and ``id`` derived from
+    it, are the same whenever the same digest is rendered again.
+    """
+
+    def __init__(self, subject: str, sender: str, text_content: str, html_content: str):
+        message = MIMEMultipart("alternative")
+        message["Subject"] = subject
+        message["From"] = sender
+        message.attach(MIMEText(text_content, "plain"))
+        message.attach(MIMEText(html_content, "html"))
+        message.set_boundary(self._boundary(subject, sender, text_content, html_content))
+
+        self._init_encoded(subject, sender, message.as_bytes(policy=policy.SMTP))
+
+    @staticmethod
+    def _boundary(subject: str, sender: str, text_content: str, html_content: str) -> str:
+        content = hashlib.sha256()
+        for part in (subject, sender, text_content, html_content):
+            content.update(part.encode('utf-8', 'surrogatepass'))
+            content.update(b'\0')
+        return f"==============={content.hexdigest()[:32]}=="
+
+    def _init_encoded(self, subject: str, sender: str, body: bytes):
+        self.subject = subject
+        self.sender = sender
+        self.body = body
+        self.id = hashlib.sha256(body).hexdigest()[:16]
+
+    @classmethod
+    def from_encoded(cls, subject: str, sender: str, body: bytes) -> 'DigestMessage':
+        """Rebuild a digest from a body encoded earlier"""
+        digest = cls.__new__(cls)
+        digest._init_encoded(subject, sender, body)
+        return digest
+
+    def recipient_headers(self, recipient: str) -> bytes:
+        """Get the headers that differ per recipient"""
+        return policy.SMTP.fold_binary("To", recipient)
+
+    def for_recipient(self, recipient: str) -> bytes:
+        """Get the complete message bytes addressed to one recipient"""
+        return self.recipient_headers(recipient) + self.body
+
+    def for_batch(self) -> bytes:
+        """Get the message bytes for a transaction with several hidden recipients"""
+        return self.recipient_headers(UNDISCLOSED_RECIPIENTS) + self.body
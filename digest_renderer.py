@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Digest Renderer for Aerospace Newsletter
+Renders the HTML and plain text newsletter bodies, sharing the static shell
+"""
+
+import re
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+
+# Document head and stylesheet, identical for every digest
+_HTML_HEAD = """
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Aerospace & Defense News</title>
+        <style>
+            * {
+                margin: 0;
+                padding: 0;
+                box-sizing: border-box;
+            }
+            
+            body {
+                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
+                line-height: 1.6;
+                color: #2d3748;
+                background-color: #f7fafc;
+                margin: 0;
+                padding: 20px;
+            }
+            
+            .container {
+                max-width: 800px;
+                margin: 0 auto;
+                background: white;
+                border-radius: 12px;
+                box-shadow: 0 10px 25px rgba(0, 0, 0, 0.1);
+                overflow: hidden;
+            }
+            
+            .header {
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                padding: 40px 30px;
+                text-align: center;
+                position: relative;
+            }
+            
+            .header::before {
+                content: '';
+                position: absolute;
+                top: 0;
+                left: 0;
+                right: 0;
+                bottom: 0;
+                background: url('data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><defs><pattern id="grain" width="100" height="100" patternUnits="userSpaceOnUse"><circle cx="25" cy="25" r="1" fill="white" opacity="0.1"/><circle cx="75" cy="75" r="1" fill="white" opacity="0.1"/><circle cx="50" cy="10" r="0.5" fill="white" opacity="0.1"/></pattern></defs><rect width="100" height="100" fill="url(%23grain)"/></svg>');
+                opacity: 0.3;
+            }
+            
+            .header-content {
+                position: relative;
+                z-index: 1;
+            }
+            
+            .header h1 {
+                font-size: 2.5rem;
+                font-weight: 700;
+                margin-bottom: 10px;
+                text-shadow: 0 2px 4px rgba(0, 0, 0, 0.3);
+            }
+            
+            .header .subtitle {
+                font-size: 1.1rem;
+                opacity: 0.9;
+                font-weight: 300;
+            }
+            
+            .content {
+                padding: 40px 30px;
+            }
+            
+            .stats {
+                background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
+                color: white;
+                padding: 20px;
+                border-radius: 8px;
+                margin-bottom: 30px;
+                text-align: center;
+            }
+            
+            .stats h3 {
+                font-size: 1.5rem;
+                margin-bottom: 5px;
+            }
+            
+            .article {
+                background: white;
+                border: 1px solid #e2e8f0;
+                border-radius: 12px;
+                padding: 25px;
+                margin-bottom: 25px;
+                transition: all 0.3s ease;
+                position: relative;
+                overflow: hidden;
+            }
+            
+            .article::before {
+                content: '';
+                position: absolute;
+                top: 0;
+                left: 0;
+                width: 4px;
+                height: 100%;
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            }
+            
+            .article:hover {
+                transform: translateY(-2px);
+                box-shadow: 0 8px 25px rgba(0, 0, 0, 0.15);
+            }
+            
+            .article-number {
+                display: inline-block;
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                width: 30px;
+                height: 30px;
+                border-radius: 50%;
+                text-align: center;
+                line-height: 30px;
+                font-weight: bold;
+                font-size: 14px;
+                margin-right: 15px;
+                vertical-align: top;
+            }
+            
+            .article-content {
+                display: inline-block;
+                width: calc(100% - 50px);
+                vertical-align: top;
+            }
+            
+            .title {
+                font-size: 1.3rem;
+                font-weight: 600;
+                color: #2d3748;
+                margin-bottom: 12px;
+                line-height: 1.4;
+            }
+            
+            .meta {
+                display: flex;
+                align-items: center;
+                margin-bottom: 15px;
+                font-size: 0.9rem;
+                color: #718096;
+            }
+            
+            .meta-item {
+                display: flex;
+                align-items: center;
+                margin-right: 20px;
+            }
+            
+            .meta-icon {
+                margin-right: 5px;
+                font-size: 14px;
+            }
+            
+            .summary {
+                color: #4a5568;
+                line-height: 1.6;
+                margin-bottom: 20px;
+                font-size: 0.95rem;
+            }
+            
+            .read-more {
+                display: inline-block;
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                padding: 12px 24px;
+                border-radius: 25px;
+                text-decoration: none;
+                font-weight: 600;
+                font-size: 0.9rem;
+                transition: all 0.3s ease;
+                box-shadow: 0 4px 15px rgba(102, 126, 234, 0.4);
+            }
+            
+            .read-more:hover {
+                transform: translateY(-2px);
+                box-shadow: 0 6px 20px rgba(102, 126, 234, 0.6);
+            }
+            
+            .footer {
+                background: #f8fafc;
+                padding: 30px;
+                text-align: center;
+                border-top: 1px solid #e2e8f0;
+            }
+            
+            .footer p {
+                color: #718096;
+                font-size: 0.9rem;
+                margin-bottom: 10px;
+            }
+            
+            .footer .powered-by {
+                font-size: 0.8rem;
+                color: #a0aec0;
+            }
+            
+            @media (max-width: 600px) {
+                .container {
+                    margin: 10px;
+                    border-radius: 8px;
+                }
+                
+                .header {
+                    padding: 30px 20px;
+                }
+                
+                .header h1 {
+                    font-size: 2rem;
+                }
+                
+                .content {
+                    padding: 30px 20px;
+                }
+                
+                .article {
+                    padding: 20px;
+                }
+                
+                .article-content {
+                    width: calc(100% - 40px);
+                }
+                
+                .title {
+                    font-size: 1.1rem;
+                }
+            }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <div class="header-content">
+                    <h1>🛰️ Aerospace & Defense News</h1>
+                    <p class="subtitle">Latest Articles - """
+
+_HTML_INTRO = """{date}</p>
+                </div>
+            </div>
+            
+            <div class="content">
+                <div class="stats">
+                    <h3>📊 {count} Articles This Week</h3>
+                    <p>Curated from top aerospace and defense sources</p>
+                </div>
+    """
+
+_HTML_FOOTER = """
+            </div>
+            
+            <div class="footer">
+                <p>🚀 Delivered automatically from aerospace and defense RSS feeds</p>
+                <p class="powered-by">Powered by GitHub Actions</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+_TEXT_INTRO = """
+🛰️ AEROSPACE & DEFENSE NEWS
+Latest Articles - {date}
+==================================================
+
+"""
+
+_TEXT_FOOTER = """
+Generated automatically from aerospace and defense RSS feeds
+"""
+
+class DigestRenderer:
+    """Renders newsletter digests with the original f-string templates
+
+    The static HTML shell is a module constant instead of being rebuilt on
+    every call, and tags are stripped with a precompiled pattern. Each
+    body grows with ``+=``, which CPython extends in place, so rendering
+    time stays linear in the number of articles. ``render`` produces both
+    bodies in one call, so HTML and plain text share one code path.
+    """
+
+    def __init__(self, html_summary_length: int = 200, text_summary_length: int = 300):
+        self.html_summary_length = html_summary_length
+        self.text_summary_length = text_summary_length
+
+    def render(self, articles: Iterable[Dict], date: datetime = None, html: bool = True,
+               text: bool = True) -> Tuple[Optional[str], Optional[str]]:
+        """Render the ``(html, text)`` bodies"""
+        if not isinstance(articles, (list, tuple)):
+            articles = list(articles)
+        date = (date or datetime.now()).strftime('%B %d, %Y')
+        html_content = None
+        text_content = None
+
+        if html:
+            length = self.html_summary_length
+            html_content = _HTML_HEAD + _HTML_INTRO.format(date=date, count=len(articles))
+            for i, article in enumerate(articles, 1):
+                # Strip HTML tags from summary
+                clean_summary = article['summary']
+                if '<' in clean_summary and '>' in clean_summary:
+                    clean_summary = _TAG_PATTERN.sub('', clean_summary)
+                html_content += f"""
+                <div class="article">
+                    <span class="article-number">{i}</span>
+                    <div class="article-content">
+                        <div class="title">{article['title']}</div>
+                        <div class="meta">
+                            <div class="meta-item">
+                                <span class="meta-icon">📅</span>
+                                <span>{article['published']}</span>
+                            </div>
+                        </div>
+                        <div class="summary">{clean_summary[:length]}{'...' if len(clean_summary) > length else ''}</div>
+                        <a href="{article['link']}" class="read-more">Read Full Article →</a>
+                    </div>
+                </div>
+        """
+            html_content += _HTML_FOOTER
+
+        if text:
+            length = self.text_summary_length
+            text_content = _TEXT_INTRO.format(date=date)
+            for i, article in enumerate(articles, 1):
+                summary = article['summary']
+                text_content += f"""
+{i}. {article['title']}
+   📅 Published: {article['published']}
+   🔗 Link: {article['link']}
+   📝 Summary: {summary[:length]}{'...' if len(summary) > length else ''}
+   
+"""
+            text_content += _TEXT_FOOTER
+        return html_content, text_content
+
+    def render_html(self, articles: Iterable[Dict], date: datetime = None) -> str:
+        """Render the HTML body"""
+        return self.render(articles, date, text=False)[0]
+
+    def render_text(self, articles: Iterable[Dict], date: datetime = None) -> str:
+        """Render the plain text body"""
+        return self.render(articles, date, html=False)[1]
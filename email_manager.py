@@ -4,93 +4,393 @@ Email Management System for Aerospace Newsletter
 Handles email collection, storage, and management
 """
 
-import json
+import base64
+import bisect
+import binascii
 import os
 import re
+import threading
+import time
+from collections import Counter
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple, Union
 import logging
 
+from subscriber import Subscriber, encode_token
+from segmentation import unknown_topics
+from subscriber_store import SubscriberStore, open_store, summarize
+from unsubscribe_tokens import UnsubscribeSigner
+from write_behind import CommitTicket, GroupCommitWriter
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# Above this many new emails the sorted email list is rebuilt instead of updated
+_RESORT_THRESHOLD = 1000
+
+def encode_cursor(email: str) -> str:
+    """Make an opaque page cursor pointing after ``email``"""
+    return base64.urlsafe_b64encode(email.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> str:
+    """Get the email a page cursor points after; raises ValueError if it is malformed"""
+    try:
+        return base64.b64decode(cursor + '=' * (-len(cursor) % 4), altchars=b'-_', validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
 class EmailManager:
-    """Manages newsletter email subscriptions"""
-    
-    def __init__(self, storage_file: str = "subscribers.json"):
-        self.storage_file = storage_file
-        self.subscribers = self._load_subscribers()
-    
-    def _load_subscribers(self) -> List[Dict]:
-        """Load subscribers from storage file"""
-        if os.path.exists(self.storage_file):
-            try:
-                with open(self.storage_file, 'r') as f:
-                    data = json.load(f)
-                    return data.get('subscribers', [])
-            except (json.JSONDecodeError, FileNotFoundError) as e:
-                logger.error(f"Error loading subscribers: {e}")
-                return []
-        return []
-    
-    def _save_subscribers(self) -> bool:
-        """Save subscribers to storage file"""
+    """Manages newsletter email subscriptions
+    
+    Subscribers are indexed by normalized email and by unsubscribe token, and
+    the active subscribers and signups per day are counted as they change, so
+    lookups and statistics take constant time however many subscribers
+    there are.
+    
+    Subscribers are held as compact ``Subscriber`` records with slots,
+    integer timestamps and binary tokens, which also read like the original
+    subscriber dicts. Listings and exports return plain dicts.
+    
+    With a ``signer`` (by default one built from ``SECRET_KEY``, if set),
+    new subscribers get signed unsubscribe tokens that are verified without
+    a lookup and are not stored. Tokens stored on existing records keep
+    working.
+    
+    Records are persisted through a ``SubscriberStore``, chosen from the
+    storage file's extension unless one is passed in: a ``.db`` file uses
+    SQLite, anything else the JSON file. ``SUBSCRIBERS_FILE`` overrides the
+    default file.
+    
+    With a ``write_window`` (seconds), changes are applied in memory at once
+    and written by a ``GroupCommitWriter`` that coalesces every change made
+    within the window into one write. ``subscribe`` and ``unsubscribe``
+    still wait for that write unless called with ``durable=False``.
+    
+    Other processes may share the storage (several server workers, the
+    CLI). Before each operation the store is checked for writes made
+    elsewhere, a single ``stat`` call, at most once per the store's
+    ``stale_check_interval`` for reads. Stores that track changes hand over
+    only the changed records, which are patched into the indexes and
+    counters; others are reloaded in full, outside the lock, so requests
+    are not held up by the parse.
+    """
+    
+    def __init__(self, storage_file: str = None, store: SubscriberStore = None,
+                 write_window: float = None, signer: UnsubscribeSigner = None):
+        self.storage_file = storage_file or os.getenv("SUBSCRIBERS_FILE", "subscribers.json")
+        self.store = store or open_store(self.storage_file)
+        self.signer = signer or UnsubscribeSigner.from_env()
+        self._lock = threading.RLock()
+        self._reload_lock = threading.Lock()
+        self._next_stale_check = time.monotonic() + self.store.stale_check_interval
+        self.subscribers, stats = self._load_subscribers()
+        self._build_indexes(stats)
+        self.writer = None
+        if write_window:
+            self.writer = GroupCommitWriter(self.store, self._lock, lambda: self.subscribers, write_window)
+    
+    def _load_subscribers(self) -> Tuple[List[Subscriber], Optional[Dict]]:
+        """Load subscribers from storage, with the counters persisted alongside them if any"""
+        subscribers, stats = self.store.load_with_stats()
+        return [Subscriber.from_dict(s) for s in subscribers], stats
+    
+    def refresh(self, force: bool = False) -> bool:
+        """Load changes another process made to the storage; returns True if any were loaded
+        
+        Unless ``force``d, as before a change, the storage is checked at
+        most once per the store's ``stale_check_interval``.
+        """
+        if not force:
+            now = time.monotonic()
+            if now < self._next_stale_check:
+                return False
+            self._next_stale_check = now + self.store.stale_check_interval
+        if not self.store.is_stale():
+            return False
+        with self._lock:
+            if self.writer is not None and self.writer.has_pending():
+                # Reloading now would drop queued changes; the next check picks it up
+                return False
+            changes = self.store.load_changes()
+            if changes is not None:
+                if self._apply_changes(*changes):
+                    logger.info(f"Loaded {len(changes[0])} subscribers changed by another process")
+                else:
+                    # Records were deleted, which changes cannot be patched for
+                    self.subscribers, stats = self._load_subscribers()
+                    self._build_indexes(stats)
+                    logger.info(f"Reloaded {len(self.subscribers)} subscribers changed by another process")
+                return True
+        
+        if not self._reload_lock.acquire(blocking=False):
+            # Another thread is already reloading; serve the current copy meanwhile
+            return False
         try:
-            data = {
-                'subscribers': self.subscribers,
-                'last_updated': datetime.now().isoformat(),
-                'total_count': len(self.subscribers)
-            }
-            with open(self.storage_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            # Read and parse without the lock, so requests carry on meanwhile
+            subscribers, stats, snapshot = self.store.load_snapshot()
+            subscribers = [Subscriber.from_dict(s) for s in subscribers]
+            with self._lock:
+                if self.writer is not None and self.writer.has_pending():
+                    return False
+                if not self.store.adopt(snapshot):
+                    # Saved here while loading, so the snapshot may lack those changes
+                    return False
+                self.subscribers = subscribers
+                self._build_indexes(stats)
+            logger.info(f"Reloaded {len(subscribers)} subscribers changed by another process")
             return True
-        except Exception as e:
-            logger.error(f"Error saving subscribers: {e}")
-            return False
+        finally:
+            self._reload_lock.release()
     
-    def _validate_email(self, email: str) -> bool:
-        """Validate email format"""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(pattern, email) is not None
+    @staticmethod
+    def _normalize_email(email: str) -> str:
+        return email.strip().lower()
+    
+    def _build_indexes(self, stats: Dict = None):
+        """Index all subscribers and set the counters from the persisted ``stats``, or by counting"""
+        self._by_email: Dict[str, Subscriber] = {}
+        self._by_token: Dict[Union[bytes, str], Subscriber] = {}
+        self._sorted_emails: Optional[List[str]] = None
+        self._new_emails: List[str] = []
+        for subscriber in self.subscribers:
+            self._index(subscriber)
+        counters = stats
+        if not counters or counters.get('total') != len(self.subscribers):
+            # Missing, or out of step with the records (a hand-edited file, say)
+            counters = summarize(self.subscribers)
+        self._active_count = counters['active']
+        self._signups_by_day = Counter(counters['signups_by_day'])
     
-    def subscribe(self, email: str, name: str = None) -> Dict:
-        """Subscribe a new email to the newsletter"""
-        email = email.strip().lower()
+    def _apply_changes(self, changed: List[Subscriber], stats: Dict) -> bool:
+        """Patch records changed elsewhere into the indexes and take the store's counters
         
-        # Validate email
-        if not self._validate_email(email):
-            return {
-                'success': False,
-                'message': 'Invalid email format',
-                'email': email
-            }
+        Returns False, leaving the counters alone, if the changes do not
+        account for the store's total because records were deleted.
+        """
+        for record in changed:
+            current = self._by_email.get(self._normalize_email(record.email))
+            if current is None or current.email != record.email:
+                self.subscribers.append(record)
+                self._index(record)
+                continue
+            if current.token_key:
+                self._by_token.pop(current.token_key, None)
+            current.assign(record)
+            if current.token_key:
+                self._by_token[current.token_key] = current
+        if stats['total'] != len(self.subscribers):
+            return False
+        self._active_count = stats['active']
+        self._signups_by_day = Counter(stats['signups_by_day'])
+        return True
+    
+    def _count_signup(self, subscribed_at: Optional[str], delta: int = 1):
+        if subscribed_at:
+            day = subscribed_at[:10]
+            self._signups_by_day[day] += delta
+            if not self._signups_by_day[day]:
+                del self._signups_by_day[day]
+    
+    def _index(self, subscriber: Subscriber):
+        """Add a subscriber to the lookup indexes; later records win for repeated emails"""
+        email = self._normalize_email(subscriber.email)
+        if email == subscriber.email:
+            # Share the record's string instead of keeping a second copy
+            email = subscriber.email
+        if self._sorted_emails is not None and email not in self._by_email:
+            self._new_emails.append(email)
+        self._by_email[email] = subscriber
+        if subscriber.token_key:
+            self._by_token[subscriber.token_key] = subscriber
+    
+    def get_subscriber(self, email: str = None, token: str = None) -> Optional[Subscriber]:
+        """Look up a subscriber record by email or unsubscribe token"""
+        self.refresh()
+        if email:
+            return self._by_email.get(self._normalize_email(email))
+        if token:
+            if self.signer is not None and UnsubscribeSigner.is_signed(token):
+                email = self.signer.verify(token)
+                return self._by_email.get(email) if email else None
+            return self._by_token.get(encode_token(token))
+        return None
+    
+    def get_unsubscribe_token(self, email: str) -> Optional[str]:
+        """Get the token that unsubscribes an email: its stored legacy token, or a freshly signed one"""
+        subscriber = self.get_subscriber(email)
+        if subscriber is None:
+            return None
+        if subscriber.token_key is not None:
+            return subscriber['unsubscribe_token']
+        if self.signer is not None:
+            return self.signer.sign(subscriber.email)
+        return None
+    
+    def _email_order(self) -> List[str]:
+        """Get all emails in sorted order, folding in emails added since the last call"""
+        if self._sorted_emails is None or len(self._new_emails) > _RESORT_THRESHOLD:
+            self._sorted_emails = sorted(self._by_email)
+        else:
+            for email in self._new_emails:
+                bisect.insort(self._sorted_emails, email)
+        self._new_emails = []
+        return self._sorted_emails
+    
+    def page_subscribers(self, limit: int = 100, cursor: str = None, active: bool = None,
+                         prefix: str = '') -> Tuple[List[Dict], Optional[str]]:
+        """Get up to ``limit`` subscribers in email order, and the cursor of the next page
         
-        # Check if already subscribed
-        if self.is_subscribed(email):
-            return {
-                'success': False,
-                'message': 'Email already subscribed',
-                'email': email
-            }
+        Only subscribers whose email starts with ``prefix`` and, unless
+        ``active`` is None, whose active flag matches are returned. Pages
+        are copies, located by binary search in the sorted emails, so each
+        call costs O(log n + limit) for an unfiltered listing. The next
+        cursor is None on the last page.
+        """
+        prefix = self._normalize_email(prefix or '')
+        self.refresh()
+        with self._lock:
+            order = self._email_order()
+            start = bisect.bisect_left(order, prefix)
+            if cursor:
+                start = max(start, bisect.bisect_right(order, decode_cursor(cursor)))
+            
+            page = []
+            for position in range(start, len(order)):
+                email = order[position]
+                if not email.startswith(prefix):
+                    return page, None
+                subscriber = self._by_email[email]
+                if active is not None and subscriber.active != active:
+                    continue
+                page.append(subscriber.to_dict())
+                if len(page) >= limit:
+                    more = position + 1 < len(order) and order[position + 1].startswith(prefix)
+                    return page, encode_cursor(email) if more else None
+            return page, None
+    
+    def iter_subscribers(self, active: bool = None, prefix: str = '', page_size: int = 500,
+                         cursor: str = None) -> Iterator[Dict]:
+        """Yield matching subscribers in email order, one page at a time
         
-        # Add new subscriber
-        subscriber = {
-            'email': email,
-            'name': name.strip() if name else None,
-            'subscribed_at': datetime.now().isoformat(),
-            'active': True,
-            'unsubscribe_token': self._generate_unsubscribe_token(email)
-        }
+        The lock is only held while a page is collected, so long exports
+        do not block signups and only one page is held in memory. With a
+        ``cursor`` the listing starts after the email it points to.
+        """
+        while True:
+            page, cursor = self.page_subscribers(page_size, cursor, active, prefix)
+            yield from page
+            if cursor is None:
+                return
+    
+    def _save_subscribers(self, changed: List[Dict] = None) -> bool:
+        """Save subscribers to storage now; backends that can write only the ``changed`` records do"""
+        if self.writer is not None:
+            # Go through the writer so this save is ordered with its commits
+            ticket = self.writer.submit(changed if changed is not None else self.subscribers)
+            self.writer.flush()
+            return ticket.wait()
+        return self.store.save(self.subscribers, changed)
+    
+    def _persist(self, changed: List[Dict]) -> CommitTicket:
+        """Queue changed records for the group commit, or save them right away without a writer"""
+        if self.writer is not None:
+            return self.writer.submit(changed)
+        return CommitTicket(done=True, success=self._save_subscribers(changed))
+    
+    def close(self):
+        """Write any pending changes and stop the background writer"""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+    
+    def _validate_email(self, email: str) -> bool:
+        """Validate email format"""
+        return EMAIL_PATTERN.match(email) is not None
+    
+    def _activate(self, email: str, name: Optional[str], subscriber: Optional[Subscriber],
+                  topics: Optional[List[str]] = None) -> Subscriber:
+        """Add a new subscriber, or reactivate a past one instead of adding a second record"""
+        if subscriber is not None:
+            self._count_signup(subscriber.subscribed_at, -1)
+            subscriber['active'] = True
+            subscriber['subscribed_at'] = datetime.now().isoformat()
+            subscriber.pop('unsubscribed_at', None)
+            if name:
+                subscriber['name'] = name.strip()
+            if topics is not None:
+                subscriber['topics'] = topics
+        else:
+            subscriber = Subscriber(
+                email,
+                name.strip() if name else None,
+                datetime.now().isoformat(),
+                True,
+                # Signed tokens are derived on demand instead of stored
+                None if self.signer is not None else self._generate_unsubscribe_token(email),
+                topics=topics
+            )
+            self.subscribers.append(subscriber)
+            self._index(subscriber)
+        self._active_count += 1
+        self._count_signup(subscriber['subscribed_at'])
+        return subscriber
+    
+    def subscribe(self, email: str, name: str = None, durable: bool = True,
+                  topics: Iterable[str] = None) -> Dict:
+        """Subscribe a new email to the newsletter
         
-        self.subscribers.append(subscriber)
+        ``topics`` limits the digest to articles on those topics; without
+        it the subscriber gets every article. With ``durable`` the result
+        is only returned once the change is saved; otherwise it is
+        returned as soon as the change is queued.
+        """
+        if topics is not None:
+            topics = sorted(set(topics))
+            unknown = unknown_topics(topics)
+            if unknown:
+                return {
+                    'success': False,
+                    'message': f"Unknown topics: {', '.join(unknown)}",
+                    'email': email
+                }
+        with self._lock:
+            self.refresh(force=True)
+            email = self._normalize_email(email)
+            
+            # Validate email
+            if not self._validate_email(email):
+                return {
+                    'success': False,
+                    'message': 'Invalid email format',
+                    'email': email
+                }
+            
+            # Check if already subscribed
+            subscriber = self._by_email.get(email)
+            if subscriber is not None and subscriber.active:
+                return {
+                    'success': False,
+                    'message': 'Email already subscribed',
+                    'email': email
+                }
+            
+            subscriber = self._activate(email, name, subscriber, topics)
+            ticket = self._persist([subscriber])
+            record = subscriber.to_dict()
+            if 'unsubscribe_token' not in record and self.signer is not None:
+                record['unsubscribe_token'] = self.signer.sign(subscriber.email)
         
-        if self._save_subscribers():
+        # Wait outside the lock so concurrent requests can join the same commit
+        if not durable or ticket.wait():
             logger.info(f"New subscriber added: {email}")
             return {
                 'success': True,
                 'message': 'Successfully subscribed to newsletter',
                 'email': email,
-                'subscriber': subscriber
+                'subscriber': record,
+                'durable': durable
             }
         else:
             return {
@@ -99,62 +399,160 @@ class EmailManager:
                 'email': email
             }
     
-    def unsubscribe(self, email: str = None, token: str = None) -> Dict:
-        """Unsubscribe an email from the newsletter"""
-        if not email and not token:
+    def unsubscribe(self, email: str = None, token: str = None, durable: bool = True) -> Dict:
+        """Unsubscribe an email from the newsletter
+        
+        A signed token is checked before the lock is taken or storage is
+        touched, so forged tokens cost a single HMAC.
+        """
+        if not email and token and self.signer is not None and UnsubscribeSigner.is_signed(token):
+            email = self.signer.verify(token)
+            if email is None:
+                return {
+                    'success': False,
+                    'message': 'Invalid unsubscribe token'
+                }
+            token = None
+        with self._lock:
+            self.refresh(force=True)
+            if not email and not token:
+                return {
+                    'success': False,
+                    'message': 'Email or unsubscribe token required'
+                }
+            
+            # Find subscriber
+            subscriber = self.get_subscriber(email, token)
+            
+            if not subscriber:
+                return {
+                    'success': False,
+                    'message': 'Email not found in subscribers'
+                }
+            
+            # Mark as unsubscribed
+            if subscriber.active:
+                self._active_count -= 1
+            subscriber['active'] = False
+            subscriber['unsubscribed_at'] = datetime.now().isoformat()
+            ticket = self._persist([subscriber])
+        
+        if not durable or ticket.wait():
+            logger.info(f"Subscriber unsubscribed: {subscriber['email']}")
+            return {
+                'success': True,
+                'message': 'Successfully unsubscribed from newsletter',
+                'email': subscriber['email'],
+                'durable': durable
+            }
+        else:
             return {
                 'success': False,
-                'message': 'Email or unsubscribe token required'
+                'message': 'Failed to save unsubscription'
             }
-        
-        # Find subscriber
-        subscriber = None
-        if email:
-            email = email.strip().lower()
-            subscriber = next((s for s in self.subscribers if s['email'] == email), None)
-        elif token:
-            subscriber = next((s for s in self.subscribers if s['unsubscribe_token'] == token), None)
-        
-        if not subscriber:
+    
+    def update_topics(self, email: str, topics: Iterable[str], durable: bool = True) -> Dict:
+        """Change the topics a subscriber receives; an empty list means every article"""
+        topics = sorted(set(topics))
+        unknown = unknown_topics(topics)
+        if unknown:
             return {
                 'success': False,
-                'message': 'Email not found in subscribers'
+                'message': f"Unknown topics: {', '.join(unknown)}"
             }
+        with self._lock:
+            self.refresh(force=True)
+            subscriber = self.get_subscriber(email)
+            if not subscriber:
+                return {
+                    'success': False,
+                    'message': 'Email not found in subscribers'
+                }
+            subscriber['topics'] = topics
+            ticket = self._persist([subscriber])
         
-        # Mark as unsubscribed
-        subscriber['active'] = False
-        subscriber['unsubscribed_at'] = datetime.now().isoformat()
-        
-        if self._save_subscribers():
-            logger.info(f"Subscriber unsubscribed: {subscriber['email']}")
+        if not durable or ticket.wait():
+            logger.info(f"Subscriber topics updated: {subscriber['email']} -> {topics or 'all'}")
             return {
                 'success': True,
-                'message': 'Successfully unsubscribed from newsletter',
-                'email': subscriber['email']
+                'message': 'Topics updated',
+                'email': subscriber['email'],
+                'topics': topics,
+                'durable': durable
             }
         else:
             return {
                 'success': False,
-                'message': 'Failed to save unsubscription'
+                'message': 'Failed to save topics'
             }
     
+    def bulk_subscribe(self, rows: Iterable[Union[Dict, str]], chunk_size: int = None) -> Dict:
+        """Subscribe many emails, persisting once at the end or every ``chunk_size`` changes
+        
+        Rows are subscriber dicts with ``email`` and optional ``name``, or
+        bare email strings, and are consumed lazily. Addresses already
+        subscribed, also earlier in the same input, are counted as
+        duplicates; past subscribers are reactivated.
+        """
+        imported = duplicates = 0
+        errors = []
+        changed = []
+        saved = True
+        with self._lock:
+            self.refresh(force=True)
+            for row in rows:
+                if isinstance(row, str):
+                    raw_email, name = row, None
+                else:
+                    raw_email, name = row.get('email') or '', row.get('name')
+                email = self._normalize_email(raw_email)
+                if not EMAIL_PATTERN.match(email):
+                    errors.append({'email': email, 'message': 'Invalid email format'})
+                    continue
+                
+                subscriber = self._by_email.get(email)
+                if subscriber is not None and subscriber.active:
+                    duplicates += 1
+                    continue
+                changed.append(self._activate(email, name, subscriber))
+                imported += 1
+                
+                if chunk_size and len(changed) >= chunk_size:
+                    saved = self._save_subscribers(changed) and saved
+                    changed = []
+            
+            if changed:
+                saved = self._save_subscribers(changed) and saved
+        
+        if imported:
+            logger.info(f"Bulk subscribed {imported} emails ({duplicates} duplicates, {len(errors)} invalid)")
+        return {
+            'success': saved,
+            'imported': imported,
+            'duplicates': duplicates,
+            'invalid': len(errors),
+            'errors': errors
+        }
+    
     def is_subscribed(self, email: str) -> bool:
         """Check if email is subscribed and active"""
-        email = email.strip().lower()
-        subscriber = next((s for s in self.subscribers if s['email'] == email), None)
-        return subscriber is not None and subscriber.get('active', False)
+        subscriber = self.get_subscriber(email)
+        return subscriber is not None and subscriber.active
     
-    def get_active_subscribers(self) -> List[Dict]:
+    def get_active_subscribers(self) -> List[Subscriber]:
         """Get all active subscribers"""
-        return [s for s in self.subscribers if s.get('active', False)]
+        self.refresh()
+        return [s for s in self.subscribers if s.active]
     
-    def get_all_subscribers(self) -> List[Dict]:
+    def get_all_subscribers(self) -> List[Subscriber]:
         """Get all subscribers (active and inactive)"""
+        self.refresh()
         return self.subscribers
     
     def get_subscriber_count(self) -> int:
         """Get count of active subscribers"""
-        return len(self.get_active_subscribers())
+        self.refresh()
+        return self._active_count
     
     def _generate_unsubscribe_token(self, email: str) -> str:
         """Generate a unique unsubscribe token for an email"""
@@ -167,25 +565,39 @@ class EmailManager:
         token = hashlib.sha256(token_data.encode()).hexdigest()[:32]
         return token
     
+    def get_signups_by_day(self) -> Dict[str, int]:
+        """Get the number of current subscribers who (re)subscribed on each day"""
+        self.refresh()
+        with self._lock:
+            return dict(sorted(self._signups_by_day.items()))
+    
     def get_stats(self) -> Dict:
-        """Get subscription statistics"""
-        active_count = self.get_subscriber_count()
-        total_count = len(self.subscribers)
-        inactive_count = total_count - active_count
+        """Get subscription statistics
         
-        return {
-            'active_subscribers': active_count,
-            'total_subscribers': total_count,
-            'inactive_subscribers': inactive_count,
-            'last_updated': datetime.now().isoformat()
-        }
+        ``last_updated`` is when subscribers were last saved, as persisted
+        with them, so every process sharing the storage reports the same
+        value, also after a restart, until something changes.
+        """
+        self.refresh()
+        with self._lock:
+            active_count = self._active_count
+            total_count = len(self.subscribers)
+            inactive_count = total_count - active_count
+            
+            return {
+                'active_subscribers': active_count,
+                'total_subscribers': total_count,
+                'inactive_subscribers': inactive_count,
+                'signups_today': self._signups_by_day.get(datetime.now().date().isoformat(), 0),
+                'last_updated': self.store.last_updated
+            }
     
     def export_subscribers(self, include_inactive: bool = False) -> List[Dict]:
-        """Export subscribers for external use"""
+        """Export subscribers for external use, as plain dicts"""
         if include_inactive:
-            return self.get_all_subscribers()
+            return [s.to_dict() for s in self.get_all_subscribers()]
         else:
-            return self.get_active_subscribers()
+            return [s.to_dict() for s in self.get_active_subscribers()]
 
 def main():
     """Test the EmailManager functionality"""
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Feed Cache for Aerospace Newsletter
+Persists ETag/Last-Modified validators and parsed articles per feed URL so
+unchanged feeds can be answered with a conditional GET (HTTP 304)
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+
+from atomic_file import atomic_write
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def _encode_datetime(value):
+    """JSON encoder hook for the articles' normalized timestamps"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class FeedCache:
+    """Size-capped, least-recently-used on-disk cache of parsed feeds"""
+
+    def __init__(self, storage_file: str = "feed_cache.json", max_entries: int = 200):
+        self.storage_file = storage_file
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.entries = self._load_entries()
+
+    def _load_entries(self) -> "OrderedDict[str, Dict]":
+        """Load cached feeds from storage file, oldest first"""
+        if os.path.exists(self.storage_file):
+            try:
+                with open(self.storage_file, 'r') as f:
+                    data = json.load(f)
+                    entries = OrderedDict(data.get('feeds', {}))
+                    for entry in entries.values():
+                        for article in entry['articles']:
+                            if article.get('published_at'):
+                                article['published_at'] = datetime.fromisoformat(article['published_at'])
+                    return entries
+            except (json.JSONDecodeError, FileNotFoundError) as e:
+                logger.error(f"Error loading feed cache: {e}")
+        return OrderedDict()
+
+    def save(self) -> bool:
+        """Atomically write the cache to its storage file"""
+        with self._lock:
+            data = {
+                'feeds': self.entries,
+                'last_updated': datetime.now().isoformat(),
+                'total_count': len(self.entries)
+            }
+            try:
+                with atomic_write(self.storage_file) as f:
+                    json.dump(data, f, default=_encode_datetime)
+                return True
+            except Exception as e:
+                logger.error(f"Error saving feed cache: {e}")
+                return False
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Get the If-None-Match/If-Modified-Since headers for a conditional GET"""
+        with self._lock:
+            entry = self.entries.get(url)
+            if not entry:
+                return {}
+            headers = {}
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('modified'):
+                headers['If-Modified-Since'] = entry['modified']
+            return headers
+
+    def hit(self, url: str) -> Optional[List[Dict]]:
+        """Record a 304 response and return the cached articles for the feed"""
+        with self._lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return None
+            self.entries.move_to_end(url)
+            self.hits += 1
+            return entry['articles']
+
+    def store(self, url: str, articles: List[Dict], etag: str = None, modified: str = None):
+        """Record a full download, evicting the least recently used feeds if over capacity"""
+        with self._lock:
+            self.misses += 1
+            self.entries[url] = {
+                'etag': etag,
+                'modified': modified,
+                'articles': articles,
+                'fetched_at': datetime.now().isoformat()
+            }
+            self.entries.move_to_end(url)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_stats(self) -> Dict:
+        """Get cache hit/miss statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'cached_feeds': len(self.entries)
+            }
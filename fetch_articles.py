@@ -1,12 +1,29 @@
+import argparse
 import feedparser
-from datetime import datetime
+from datetime import datetime, timezone, timedelta
 import os
+import heapq
+import itertools
+import math
+import time
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import queue
+import threading
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from urllib.parse import urljoin
 from dotenv import load_dotenv
 import logging
 from email_manager import EmailManager
+from feed_cache import FeedCache
+from circuit_breaker import CircuitBreaker
+from http_transport import HttpTransport
+from dedup_index import DedupIndex
+from near_dedup import NearDuplicateDetector
+from digest_renderer import DigestRenderer
+from digest_message import DigestMessage
+from smtp_delivery import DeliveryEngine
+from send_journal import SendJournal
+from segmentation import group_by_topics, plan_segments
 
 # Configure logging
 logging.basicConfig(
@@ -27,41 +44,349 @@ FEEDS = [
     "https://news.mit.edu/topic/drones"
 ]
 
-def fetch_latest_articles(limit_per_feed=5):
-    """Fetch latest articles from aerospace and defense RSS feeds"""
-    articles = []
+# Maximum number of feeds downloaded and parsed at the same time
+FEED_CONCURRENCY = int(os.getenv("FEED_CONCURRENCY", "8"))
+
+# Hard deadline for a single feed, and the response time counted as "slow"
+FEED_TIMEOUT = float(os.getenv("FEED_TIMEOUT", "20"))
+FEED_SLOW_SECONDS = float(os.getenv("FEED_SLOW_SECONDS", "10"))
+
+# Largest feed accepted, before or after decompression, so one bad feed cannot exhaust memory
+FEED_MAX_BYTES = int(os.getenv("FEED_MAX_BYTES", str(10 * 2 ** 20)))
+
+# Consecutive bad runs before a feed is skipped, and for how many runs
+FEED_FAILURE_THRESHOLD = int(os.getenv("FEED_FAILURE_THRESHOLD", "3"))
+FEED_COOLDOWN_RUNS = int(os.getenv("FEED_COOLDOWN_RUNS", "5"))
+
+# Estimated Jaccard similarity above which two articles are the same story
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.6"))
+
+# Digest size cap and maximum article age (0 disables either)
+DIGEST_LIMIT = int(os.getenv("DIGEST_LIMIT", "0"))
+DIGEST_MAX_AGE_HOURS = float(os.getenv("DIGEST_MAX_AGE_HOURS", "0"))
+
+EMAIL_SUBJECT = "Latest Aerospace & Defense News"
+
+# Number of SMTP connections used in parallel (Gmail allows only a few)
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "1"))
+
+# Sustained send rate and burst allowed by the relay (0 disables pacing),
+# and attempts per recipient before a temporary (4xx) failure is given up
+SMTP_RATE_PER_SECOND = float(os.getenv("SMTP_RATE_PER_SECOND", "0"))
+SMTP_BURST = float(os.getenv("SMTP_BURST", "0"))
+SMTP_MAX_ATTEMPTS = int(os.getenv("SMTP_MAX_ATTEMPTS", "4"))
+
+# Recipients per SMTP transaction; above 1 the digest is addressed to
+# undisclosed recipients and uploaded once per batch
+SMTP_BATCH_SIZE = int(os.getenv("SMTP_BATCH_SIZE", "1"))
+
+# Seconds an SMTP connect or command may take before the relay is considered unresponsive
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+
+# Shared renderer; its HTML shell is built once at import time
+_renderer = DigestRenderer()
+
+# Sort key for articles without a usable date, placing them after dated ones
+_UNDATED = datetime.min.replace(tzinfo=timezone.utc)
+
+def _entry_timestamp(entry):
+    """Normalize an entry's published (or updated) time to a UTC datetime"""
+    for field in ('published_parsed', 'updated_parsed'):
+        parsed = getattr(entry, field, None)
+        try:
+            # feedparser already converts parsed dates to UTC struct_time
+            return datetime(*parsed[:6], tzinfo=timezone.utc)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+def _entry_to_article(entry):
+    """Convert a feedparser entry into the article dict used by the digest"""
+    return {
+        'title': entry.title,
+        'link': entry.link,
+        'guid': getattr(entry, 'id', None),
+        'published': getattr(entry, 'published', 'No date available'),
+        'published_at': _entry_timestamp(entry),
+        'summary': getattr(entry, 'summary', 'No summary available')
+    }
+
+def _recency_key(article):
+    return article.get('published_at') or _UNDATED
+
+def merge_by_recency(feed_articles, since=None):
+    """Lazily merge per-feed article lists into one newest-first stream
+    
+    Each feed list is ordered on its own and the lists are combined with a
+    heap-based k-way merge, so taking the first N articles never sorts the
+    full set. Articles published before ``since`` (a UTC datetime) end the
+    stream; undated articles come last and are dropped when ``since`` is set.
+    """
+    merged = heapq.merge(
+        *(sorted(articles, key=_recency_key, reverse=True) for articles in feed_articles),
+        key=_recency_key,
+        reverse=True
+    )
+    if since is not None:
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        merged = itertools.takewhile(lambda a: _recency_key(a) >= since, merged)
+    return merged
+
+def _fetch_feed(url, limit_per_feed, transport, cache=None):
+    """Download and parse a single feed, returning its articles and elapsed time
+    
+    The feed is downloaded through the shared ``HttpTransport`` and the raw
+    bytes are handed to feedparser. With a ``FeedCache`` the request is sent
+    as a conditional GET and a 304 response reuses the cached articles
+    without parsing anything.
+    """
+    started = time.perf_counter()
+    response = transport.get(url, headers=cache.conditional_headers(url) if cache else None)
+    
+    if response.status == 304 and cache is not None:
+        cached_articles = cache.hit(url)
+        if cached_articles is not None:
+            logger.info(f"♻️ {url} not modified, using cached articles")
+            return cached_articles[:limit_per_feed], time.perf_counter() - started
+    
+    if response.status >= 400:
+        raise IOError(f"HTTP {response.status}")
+    
+    # feedparser resolves relative links against Content-Location, as it would against a URL it fetched itself
+    headers = dict(response.headers)
+    headers['content-location'] = urljoin(response.url, response.headers.get('content-location', ''))
+    feed = feedparser.parse(response.body, response_headers=headers)
+    
+    # feedparser reports parse errors instead of raising them
+    if getattr(feed, 'bozo', False) and not feed.entries:
+        raise getattr(feed, 'bozo_exception', None) or ValueError("not a valid feed")
+    
+    if cache is None:
+        feed_articles = [_entry_to_article(entry) for entry in feed.entries[:limit_per_feed]]
+        return feed_articles, time.perf_counter() - started
+    
+    # Cache every entry so a later run with a larger limit can still reuse it
+    feed_articles = [_entry_to_article(entry) for entry in feed.entries]
+    cache.store(url, feed_articles, response.headers.get('etag'), response.headers.get('last-modified'))
+    return feed_articles[:limit_per_feed], time.perf_counter() - started
+
+def _submit_to_daemon_workers(fn, items, max_workers):
+    """Run ``fn`` over ``items`` on ``max_workers`` daemon threads, returning ``{Future: item}``
+    
+    ThreadPoolExecutor workers are joined when the interpreter exits, so a
+    feed that never answers would hold the process past the run deadline.
+    Daemon threads are left behind instead. Futures cancelled before a
+    worker picks them up are skipped.
+    """
+    futures = {Future(): item for item in items}
+    work = queue.SimpleQueue()
+    for future, item in futures.items():
+        work.put((future, item))
+    
+    def worker():
+        while True:
+            try:
+                future, item = work.get_nowait()
+            except queue.Empty:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(item))
+            except BaseException as e:
+                future.set_exception(e)
+    
+    for i in range(min(max_workers, len(futures))):
+        threading.Thread(target=worker, name=f"feed_{i}", daemon=True).start()
+    return futures
+
+def _iter_feed_results(limit_per_feed, max_workers, cache, breaker, timeout, transport):
+    """Download all feeds concurrently and yield ``(url, articles)`` as each one finishes
+    
+    Failed, timed-out and skipped feeds are logged and not yielded. Cache and
+    circuit breaker state are saved once the downloads are over, even if the
+    consumer stops early.
+    """
     total_articles = 0
+    timeout = timeout or FEED_TIMEOUT
+    max_workers = max(1, min(max_workers or FEED_CONCURRENCY, len(FEEDS)))
     
-    logger.info("🛰️ Fetching latest aerospace & defense news...")
+    logger.info(f"🛰️ Fetching latest aerospace & defense news ({max_workers} concurrent)...")
+    started = time.perf_counter()
     
-    for i, url in enumerate(FEEDS, 1):
-        logger.info(f"📡 Fetching from feed {i}/{len(FEEDS)}: {url}")
-        try:
-            feed = feedparser.parse(url)
-            feed_articles = []
-            
-            for entry in feed.entries[:limit_per_feed]:
-                article_info = {
-                    'title': entry.title,
-                    'link': entry.link,
-                    'published': getattr(entry, 'published', 'No date available'),
-                    'summary': getattr(entry, 'summary', 'No summary available')
-                }
-                feed_articles.append(article_info)
-                total_articles += 1
+    owns_transport = transport is None
+    if owns_transport:
+        transport = HttpTransport(timeout=timeout, max_body_bytes=FEED_MAX_BYTES)
+    
+    feeds = []
+    for url in FEEDS:
+        if breaker is None or breaker.allow(url):
+            feeds.append(url)
+        else:
+            logger.warning(f"⏭️ Skipping {url}: circuit open after repeated failures")
+    
+    # Each worker stamps its start time so the deadline excludes time spent queued
+    fetch_started = {}
+    
+    def fetch(url):
+        fetch_started[url] = time.monotonic()
+        return _fetch_feed(url, limit_per_feed, transport, cache)
+    
+    # Feeds still queued once every worker slot could have timed out are dropped too
+    run_deadline = time.monotonic() + timeout * math.ceil(len(feeds) / max_workers)
+    
+    futures = _submit_to_daemon_workers(fetch, feeds, max_workers)
+    pending = set(futures)
+    
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=min(timeout, 0.5), return_when=FIRST_COMPLETED)
+            finished = []
+            for future in done:
+                try:
+                    finished.append((futures[future], future.result()))
+                except Exception as e:
+                    finished.append((futures[future], e))
             
-            articles.extend(feed_articles)
-            logger.info(f"✅ Fetched {len(feed_articles)} articles from {url}")
+            now = time.monotonic()
+            for future in list(pending):
+                url = futures[future]
+                if url in fetch_started and now - fetch_started[url] > timeout:
+                    finished.append((url, TimeoutError(f"no response within {timeout:.0f}s")))
+                    pending.discard(future)
+                elif now > run_deadline:
+                    finished.append((url, TimeoutError("not started before the run deadline")))
+                    pending.discard(future)
             
-        except Exception as e:
-            logger.error(f"❌ Error fetching from {url}: {e}")
+            for url, result in finished:
+                logger.info(f"📡 Finished feed {FEEDS.index(url) + 1}/{len(FEEDS)}: {url}")
+                
+                if isinstance(result, Exception):
+                    logger.error(f"❌ Error fetching from {url}: {result}")
+                    if breaker is not None and breaker.record_failure(url, str(result)):
+                        logger.warning(f"🔌 Circuit opened for {url}, skipping it for {breaker.cooldown_runs} runs")
+                    continue
+                
+                feed_articles, elapsed = result
+                total_articles += len(feed_articles)
+                wire_bytes, decoded_bytes = transport.transfer_stats(url)
+                logger.info(f"✅ Fetched {len(feed_articles)} articles from {url} in {elapsed:.2f}s "
+                            f"({wire_bytes} bytes on the wire, {decoded_bytes} decoded)")
+                if breaker is not None and breaker.record_success(url, elapsed):
+                    logger.warning(f"🔌 Circuit opened for slow feed {url}, skipping it for {breaker.cooldown_runs} runs")
+                
+                yield url, feed_articles
+    finally:
+        # Do not wait for abandoned feeds: drop the queued ones and leave the
+        # running ones to their daemon threads, which cannot delay exit
+        for future in pending:
+            future.cancel()
+        if owns_transport:
+            transport.close()
+        
+        logger.info(f"📊 Total articles fetched: {total_articles} in {time.perf_counter() - started:.2f}s")
+        
+        transfer = transport.get_stats()
+        logger.info(f"📦 Transferred {transfer['wire_bytes']} bytes for {transfer['decoded_bytes']} decoded "
+                    f"({transfer['connections_opened']} connections opened, {transfer['connections_reused']} reused)")
+        
+        if cache is not None:
+            stats = cache.get_stats()
+            logger.info(f"♻️ Feed cache: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evicted")
+            cache.save()
+        
+        if breaker is not None:
+            breaker.save()
+
+def iter_articles(limit_per_feed=5, max_workers=None, cache=None, breaker=None, timeout=None,
+                  transport=None, dedup=None):
+    """Yield articles from aerospace and defense RSS feeds as each feed finishes
+    
+    Feeds are downloaded concurrently by a bounded thread pool of
+    ``max_workers`` threads (``FEED_CONCURRENCY`` by default; 1 fetches
+    sequentially) and a failing feed never affects the others. Each article
+    is yielded as soon as its feed is parsed, tagged with the ``feed`` URL
+    it came from, so downstream stages can start before slow feeds finish.
+    
+    Passing a ``FeedCache`` enables conditional GETs and persists the cache
+    once all feeds are done.
+    
+    Every feed gets a hard deadline of ``timeout`` seconds (``FEED_TIMEOUT``
+    by default); feeds that miss it are abandoned. With a ``CircuitBreaker``
+    feeds that keep failing or responding slowly are skipped for a few runs.
+    
+    All feeds share one keep-alive ``HttpTransport`` (created for the call
+    unless ``transport`` is given), so feeds on the same host reuse their
+    connection and are transferred gzip/deflate compressed.
+    
+    With a ``DedupIndex`` articles syndicated by several feeds are yielded
+    once and articles already sent in an earlier digest are dropped.
+    """
+    articles = (
+        dict(article, feed=url)
+        for url, feed_articles in _iter_feed_results(limit_per_feed, max_workers, cache, breaker, timeout, transport)
+        for article in feed_articles
+    )
+    if dedup is not None:
+        articles = dedup.filter(articles)
+    yield from articles
+
+def fetch_latest_articles(limit_per_feed=5, max_workers=None, cache=None, breaker=None, timeout=None,
+                          transport=None, dedup=None, limit=None, since=None):
+    """Fetch latest articles from aerospace and defense RSS feeds as a list
+    
+    Thin wrapper around ``iter_articles``. Articles are returned newest first
+    across all feeds (see ``merge_by_recency``), keeping ``FEEDS`` order for
+    equal or missing dates, and stop after ``limit`` articles or at the first
+    one older than ``since``. Deduplication runs on the merged stream, so the
+    copy kept from syndicated stories does not depend on which feed finished
+    first and ``limit`` only counts new articles.
+    """
+    feed_articles = {url: [] for url in FEEDS}
+    for article in iter_articles(limit_per_feed, max_workers, cache, breaker, timeout, transport):
+        feed_articles[article['feed']].append(article)
+    total_articles = sum(len(articles) for articles in feed_articles.values())
+    
+    articles = merge_by_recency(feed_articles.values(), since=since)
+    if dedup is not None:
+        articles = dedup.filter(articles)
+    articles = list(itertools.islice(articles, limit))
+    
+    if dedup is not None:
+        logger.info(f"🧹 Dropped {dedup.duplicates} duplicate or already sent articles")
+    if len(articles) < total_articles:
+        logger.info(f"🗞️ Kept the {len(articles)} newest articles")
     
-    logger.info(f"📊 Total articles fetched: {total_articles}")
     return articles
 
 
-def send_email_with_articles(articles):
-    """Send articles via email using SMTP (Gmail) to all subscribers"""
+def _segment_digests(articles, subscribers, sender_email):
+    """Render and encode one digest per segment of subscribers sharing the same articles
+    
+    Returns ``(digest, articles, recipients, topic_sets)`` tuples. Rendering
+    grows with the number of distinct segments, not with subscribers.
+    """
+    digests = []
+    for segment in plan_segments(articles, subscribers):
+        html_content, text_content = _renderer.render(segment.articles)
+        digest = DigestMessage(EMAIL_SUBJECT, sender_email, text_content, html_content)
+        digests.append((digest, segment.articles, segment.recipients, segment.topic_sets))
+    return digests
+
+def send_email_with_articles(articles, journal=None, digest=None, topic_sets=None):
+    """Send articles via email using SMTP (Gmail) to all subscribers
+
+    Subscribers are segmented by their topics: each distinct selection of
+    articles is rendered and MIME-encoded once and sent to everyone in
+    its segment. With a ``SendJournal``, every segment's digest is
+    journaled before sending starts, every accepted recipient is journaled
+    and subscribers who already received the same digest are skipped. A
+    digest is only marked complete once no recipient is left failed for a
+    temporary reason. A ``digest`` restored from the journal is sent
+    as-is, without rendering again, to the subscribers whose topic choice
+    is in ``topic_sets`` (everyone if None).
+    """
     # Email configuration
     smtp_server = "smtp.gmail.com"
     smtp_port = 587
@@ -90,50 +415,69 @@ def send_email_with_articles(articles):
     
     logger.info(f"📧 Sending to {len(subscribers)} subscribers")
     
-    # Format content for email
-    html_content = format_articles_for_email(articles)
-    text_content = format_articles_for_text(articles)
+    if digest is not None:
+        if topic_sets is None:
+            recipients = [subscriber['email'] for subscriber in subscribers]
+        else:
+            groups = group_by_topics(subscribers)
+            recipients = [email for topics in topic_sets for email in groups.get(frozenset(topics), ())]
+        digests = [(digest, articles, recipients, topic_sets)]
+    else:
+        started = time.perf_counter()
+        digests = _segment_digests(articles, subscribers, sender_email)
+        logger.info(f"🧩 Rendered {len(digests)} digests for {len(subscribers)} subscribers "
+                    f"in {time.perf_counter() - started:.2f}s")
+    
+    if journal is not None:
+        # Journal every segment up front so a crash in any of them can be resumed
+        for digest, digest_articles, _, digest_topic_sets in digests:
+            journal.begin(digest, digest_articles, digest_topic_sets)
     
     try:
-        # Connect to Gmail SMTP server
-        logger.info("📧 Connecting to Gmail SMTP server...")
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()  # Enable TLS encryption
-        logger.info("🔐 Authenticating with Gmail...")
-        server.login(sender_email, sender_password)
-        
-        # Send email to each subscriber
-        successful_sends = 0
-        failed_sends = 0
-        
-        for subscriber in subscribers:
-            try:
-                # Create personalized email message
-                message = MIMEMultipart("alternative")
-                message["Subject"] = "Latest Aerospace & Defense News"
-                message["From"] = sender_email
-                message["To"] = subscriber['email']
-                
-                # Add both text and HTML versions
-                text_part = MIMEText(text_content, "plain")
-                html_part = MIMEText(html_content, "html")
-                
-                message.attach(text_part)
-                message.attach(html_part)
-                
-                # Send email
-                server.sendmail(sender_email, subscriber['email'], message.as_string())
-                successful_sends += 1
-                logger.info(f"✅ Sent to: {subscriber['email']}")
-                
-            except Exception as e:
-                failed_sends += 1
-                logger.error(f"❌ Failed to send to {subscriber['email']}: {e}")
-        
-        server.quit()
-        
+        # Connect to Gmail SMTP server and send over a pool of connections
+        logger.info(f"📧 Connecting to Gmail SMTP server ({SMTP_POOL_SIZE} connections)...")
+        engine = DeliveryEngine(
+            smtp_server,
+            smtp_port,
+            sender_email,
+            sender_password,
+            pool_size=SMTP_POOL_SIZE,
+            rate=SMTP_RATE_PER_SECOND or None,
+            burst=SMTP_BURST or None,
+            max_attempts=SMTP_MAX_ATTEMPTS,
+            batch_size=SMTP_BATCH_SIZE,
+            timeout=SMTP_TIMEOUT
+        )
+        successful_sends = failed_sends = already_sent = 0
+        for digest, digest_articles, recipients, _ in digests:
+            on_sent = None
+            if journal is not None:
+                pending = [email for email in recipients if not journal.is_sent(digest.id, email)]
+                if len(pending) < len(recipients):
+                    logger.info(f"⏭️ Skipping {len(recipients) - len(pending)} subscribers "
+                                f"who already received digest {digest.id}")
+                already_sent += len(recipients) - len(pending)
+                recipients = pending
+                on_sent = lambda email, digest_id=digest.id: journal.record_sent(digest_id, email)
+            
+            started = time.perf_counter()
+            report = engine.deliver(digest, recipients, on_sent=on_sent)
+            elapsed = time.perf_counter() - started
+            if journal is not None:
+                if report.retryable:
+                    # Left pending so --resume offers the digest to them again
+                    logger.warning(f"⚠️ Digest {digest.id} left pending: {len(report.retryable)} recipients "
+                                   f"failed temporarily; run with --resume to retry them")
+                else:
+                    journal.complete(digest.id)
+            
+            successful_sends += len(report.sent)
+            failed_sends += len(report.failed)
+            logger.info(f"📊 Digest {digest.id} ({len(digest_articles)} articles): {len(report.sent)} successful, "
+                        f"{len(report.failed)} failed in {elapsed:.2f}s ({report.reconnects} reconnects, "
+                        f"{report.retries} retries, {report.throttled_seconds:.1f}s throttled)")
         logger.info(f"📊 Email sending complete: {successful_sends} successful, {failed_sends} failed")
-        return successful_sends > 0
+        return successful_sends + already_sent > 0
         
     except smtplib.SMTPAuthenticationError as e:
         logger.error("❌ Authentication failed!")
@@ -146,7 +490,7 @@ def send_email_with_articles(articles):
         
     except smtplib.SMTPRecipientsRefused as e:
         logger.error("❌ Recipient email rejected!")
-        logger.error(f"📝 Invalid recipient email: {recipient_email}")
+        logger.error(f"📝 Invalid recipient email: {', '.join(e.recipients)}")
         logger.error(f"  • Error: {str(e)}")
         return False
         
@@ -159,331 +503,73 @@ def send_email_with_articles(articles):
 
 def format_articles_for_email(articles):
     """Format articles for email HTML content with modern, sleek design"""
-    html_content = f"""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Aerospace & Defense News</title>
-        <style>
-            * {{
-                margin: 0;
-                padding: 0;
-                box-sizing: border-box;
-            }}
-            
-            body {{
-                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
-                line-height: 1.6;
-                color: #2d3748;
-                background-color: #f7fafc;
-                margin: 0;
-                padding: 20px;
-            }}
-            
-            .container {{
-                max-width: 800px;
-                margin: 0 auto;
-                background: white;
-                border-radius: 12px;
-                box-shadow: 0 10px 25px rgba(0, 0, 0, 0.1);
-                overflow: hidden;
-            }}
-            
-            .header {{
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                padding: 40px 30px;
-                text-align: center;
-                position: relative;
-            }}
-            
-            .header::before {{
-                content: '';
-                position: absolute;
-                top: 0;
-                left: 0;
-                right: 0;
-                bottom: 0;
-                background: url('data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><defs><pattern id="grain" width="100" height="100" patternUnits="userSpaceOnUse"><circle cx="25" cy="25" r="1" fill="white" opacity="0.1"/><circle cx="75" cy="75" r="1" fill="white" opacity="0.1"/><circle cx="50" cy="10" r="0.5" fill="white" opacity="0.1"/></pattern></defs><rect width="100" height="100" fill="url(%23grain)"/></svg>');
-                opacity: 0.3;
-            }}
-            
-            .header-content {{
-                position: relative;
-                z-index: 1;
-            }}
-            
-            .header h1 {{
-                font-size: 2.5rem;
-                font-weight: 700;
-                margin-bottom: 10px;
-                text-shadow: 0 2px 4px rgba(0, 0, 0, 0.3);
-            }}
-            
-            .header .subtitle {{
-                font-size: 1.1rem;
-                opacity: 0.9;
-                font-weight: 300;
-            }}
-            
-            .content {{
-                padding: 40px 30px;
-            }}
-            
-            .stats {{
-                background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
-                color: white;
-                padding: 20px;
-                border-radius: 8px;
-                margin-bottom: 30px;
-                text-align: center;
-            }}
-            
-            .stats h3 {{
-                font-size: 1.5rem;
-                margin-bottom: 5px;
-            }}
-            
-            .article {{
-                background: white;
-                border: 1px solid #e2e8f0;
-                border-radius: 12px;
-                padding: 25px;
-                margin-bottom: 25px;
-                transition: all 0.3s ease;
-                position: relative;
-                overflow: hidden;
-            }}
-            
-            .article::before {{
-                content: '';
-                position: absolute;
-                top: 0;
-                left: 0;
-                width: 4px;
-                height: 100%;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            }}
-            
-            .article:hover {{
-                transform: translateY(-2px);
-                box-shadow: 0 8px 25px rgba(0, 0, 0, 0.15);
-            }}
-            
-            .article-number {{
-                display: inline-block;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                width: 30px;
-                height: 30px;
-                border-radius: 50%;
-                text-align: center;
-                line-height: 30px;
-                font-weight: bold;
-                font-size: 14px;
-                margin-right: 15px;
-                vertical-align: top;
-            }}
-            
-            .article-content {{
-                display: inline-block;
-                width: calc(100% - 50px);
-                vertical-align: top;
-            }}
-            
-            .title {{
-                font-size: 1.3rem;
-                font-weight: 600;
-                color: #2d3748;
-                margin-bottom: 12px;
-                line-height: 1.4;
-            }}
-            
-            .meta {{
-                display: flex;
-                align-items: center;
-                margin-bottom: 15px;
-                font-size: 0.9rem;
-                color: #718096;
-            }}
-            
-            .meta-item {{
-                display: flex;
-                align-items: center;
-                margin-right: 20px;
-            }}
-            
-            .meta-icon {{
-                margin-right: 5px;
-                font-size: 14px;
-            }}
-            
-            .summary {{
-                color: #4a5568;
-                line-height: 1.6;
-                margin-bottom: 20px;
-                font-size: 0.95rem;
-            }}
-            
-            .read-more {{
-                display: inline-block;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                padding: 12px 24px;
-                border-radius: 25px;
-                text-decoration: none;
-                font-weight: 600;
-                font-size: 0.9rem;
-                transition: all 0.3s ease;
-                box-shadow: 0 4px 15px rgba(102, 126, 234, 0.4);
-            }}
-            
-            .read-more:hover {{
-                transform: translateY(-2px);
-                box-shadow: 0 6px 20px rgba(102, 126, 234, 0.6);
-            }}
-            
-            .footer {{
-                background: #f8fafc;
-                padding: 30px;
-                text-align: center;
-                border-top: 1px solid #e2e8f0;
-            }}
-            
-            .footer p {{
-                color: #718096;
-                font-size: 0.9rem;
-                margin-bottom: 10px;
-            }}
-            
-            .footer .powered-by {{
-                font-size: 0.8rem;
-                color: #a0aec0;
-            }}
-            
-            @media (max-width: 600px) {{
-                .container {{
-                    margin: 10px;
-                    border-radius: 8px;
-                }}
-                
-                .header {{
-                    padding: 30px 20px;
-                }}
-                
-                .header h1 {{
-                    font-size: 2rem;
-                }}
-                
-                .content {{
-                    padding: 30px 20px;
-                }}
-                
-                .article {{
-                    padding: 20px;
-                }}
-                
-                .article-content {{
-                    width: calc(100% - 40px);
-                }}
-                
-                .title {{
-                    font-size: 1.1rem;
-                }}
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <div class="header-content">
-                    <h1>🛰️ Aerospace & Defense News</h1>
-                    <p class="subtitle">Latest Articles - {datetime.now().strftime('%B %d, %Y')}</p>
-                </div>
-            </div>
-            
-            <div class="content">
-                <div class="stats">
-                    <h3>📊 {len(articles)} Articles This Week</h3>
-                    <p>Curated from top aerospace and defense sources</p>
-                </div>
-    """
-    
-    for i, article in enumerate(articles, 1):
-        # Clean up the summary by removing HTML tags
-        clean_summary = article['summary']
-        if '<' in clean_summary and '>' in clean_summary:
-            import re
-            clean_summary = re.sub(r'<[^>]+>', '', clean_summary)
-        
-        html_content += f"""
-                <div class="article">
-                    <span class="article-number">{i}</span>
-                    <div class="article-content">
-                        <div class="title">{article['title']}</div>
-                        <div class="meta">
-                            <div class="meta-item">
-                                <span class="meta-icon">📅</span>
-                                <span>{article['published']}</span>
-                            </div>
-                        </div>
-                        <div class="summary">{clean_summary[:200]}{'...' if len(clean_summary) > 200 else ''}</div>
-                        <a href="{article['link']}" class="read-more">Read Full Article →</a>
-                    </div>
-                </div>
-        """
-    
-    html_content += """
-            </div>
-            
-            <div class="footer">
-                <p>🚀 Delivered automatically from aerospace and defense RSS feeds</p>
-                <p class="powered-by">Powered by GitHub Actions</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    
-    return html_content
+    return _renderer.render_html(articles)
 
 def format_articles_for_text(articles):
     """Format articles for plain text email content"""
-    text_content = f"""
-🛰️ AEROSPACE & DEFENSE NEWS
-Latest Articles - {datetime.now().strftime('%B %d, %Y')}
-{'=' * 50}
+    return _renderer.render_text(articles)
 
-"""
+def main(argv=None):
+    """Fetch the latest articles and email them, optionally finishing an interrupted send first"""
+    parser = argparse.ArgumentParser(description="Fetch aerospace news and email it to subscribers")
+    parser.add_argument('--resume', action='store_true',
+                        help='Finish sending a digest interrupted by a crashed run before building a new one')
+    args = parser.parse_args(argv)
     
-    for i, article in enumerate(articles, 1):
-        text_content += f"""
-{i}. {article['title']}
-   📅 Published: {article['published']}
-   🔗 Link: {article['link']}
-   📝 Summary: {article['summary'][:300]}{'...' if len(article['summary']) > 300 else ''}
-   
-"""
+    journal = SendJournal()
+    dedup = DedupIndex()
     
-    text_content += """
-Generated automatically from aerospace and defense RSS feeds
-"""
+    pending_digests = journal.pending_digests()
+    if pending_digests and args.resume:
+        # Send each journaled digest to whoever in its segment is still missing it,
+        # without fetching or rendering
+        for pending in pending_digests:
+            logger.info(f"⏯️ Resuming digest {pending['digest']} "
+                        f"({len(journal.sent.get(pending['digest'], ()))} recipients already sent)")
+            if not send_email_with_articles(pending['articles'], journal=journal, digest=journal.restore(pending),
+                                            topic_sets=pending.get('topic_sets')):
+                logger.error("❌ Failed to resume the interrupted digest.")
+                return
+            dedup.mark_sent(pending['articles'])
+            dedup.save()
+            logger.info(f"🎉 Finished sending interrupted digest {pending['digest']}")
+    elif pending_digests:
+        for pending in pending_digests:
+            logger.warning(f"⚠️ Digest {pending['digest']} was interrupted; run with --resume to finish it")
     
-    return text_content
-
-if __name__ == "__main__":
     # Fetch articles
-    articles = fetch_latest_articles()
+    breaker = CircuitBreaker(
+        failure_threshold=FEED_FAILURE_THRESHOLD,
+        cooldown_runs=FEED_COOLDOWN_RUNS,
+        slow_threshold=FEED_SLOW_SECONDS
+    )
+    since = None
+    if DIGEST_MAX_AGE_HOURS:
+        since = datetime.now(timezone.utc) - timedelta(hours=DIGEST_MAX_AGE_HOURS)
+    articles = fetch_latest_articles(
+        cache=FeedCache(),
+        breaker=breaker,
+        dedup=dedup,
+        limit=DIGEST_LIMIT or None,
+        since=since
+    )
+    near_duplicates = NearDuplicateDetector(threshold=NEAR_DUPLICATE_THRESHOLD)
+    articles = near_duplicates.deduplicate(articles)
     
     if articles:
         # Send via email
-        success = send_email_with_articles(articles)
+        success = send_email_with_articles(articles, journal=journal)
         
         if success:
+            # Only sent articles are remembered, so a failed run offers them again.
+            # Dropped near-duplicates are remembered too, or a later run would send them as new
+            dedup.mark_sent(articles + near_duplicates.dropped)
+            dedup.save()
             logger.info(f"\n🎉 Successfully fetched and sent {len(articles)} articles to recipient email!")
         else:
             logger.error("❌ Failed to send articles via email.")
     else:
-        logger.error("❌ No articles were fetched.")
+        logger.error("❌ No new articles were fetched.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+HTTP Transport for Aerospace Newsletter
+Keep-alive connection pool with gzip/deflate support used to download feeds
+"""
+
+import http.client
+import ssl
+import threading
+import zlib
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Errors raised when a pooled keep-alive connection was closed by the server
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+_REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+class ResponseTooLarge(http.client.HTTPException):
+    """The response body, as sent or once decompressed, is larger than allowed"""
+
+def _inflate(data: bytes, wbits: int, limit: Optional[int]) -> bytes:
+    """Decompress zlib, gzip or raw deflate data, stopping as soon as it grows past ``limit`` bytes"""
+    output = bytearray()
+    while data:
+        decompressor = zlib.decompressobj(wbits)
+        chunk = data
+        while chunk:
+            room = limit + 1 - len(output) if limit is not None else 0
+            output += decompressor.decompress(chunk, room)
+            if limit is not None and len(output) > limit:
+                raise ResponseTooLarge(f"Decompressed body exceeds {limit} bytes")
+            chunk = decompressor.unconsumed_tail
+        if not decompressor.eof:
+            raise zlib.error("Compressed body ended before the end of the stream")
+        # A gzip body may hold several members, possibly followed by zero padding
+        data = decompressor.unused_data.lstrip(b'\0') if wbits > zlib.MAX_WBITS else b''
+    return bytes(output)
+
+class HttpResponse:
+    """A fully read HTTP response"""
+
+    def __init__(self, url: str, status: int, headers: Dict[str, str], body: bytes, wire_bytes: int):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.wire_bytes = wire_bytes
+
+    @property
+    def decoded_bytes(self) -> int:
+        return len(self.body)
+
+class HttpTransport:
+    """Thread-safe HTTP client that reuses connections per host
+
+    Idle connections are kept per ``(scheme, host, port)`` up to
+    ``max_idle_per_host`` and reused for later requests to the same host.
+    Responses are requested with ``Accept-Encoding: gzip, deflate`` and the
+    compressed (on the wire) and decompressed sizes are recorded per URL.
+
+    Bodies larger than ``max_body_bytes``, either as sent or once
+    decompressed, raise ``ResponseTooLarge`` without ever being held in
+    memory in full.
+    """
+
+    def __init__(self, timeout: float = 20, max_idle_per_host: int = 4,
+                 user_agent: str = "AerospaceNewsletter/1.0 (+feed fetcher)",
+                 max_body_bytes: Optional[int] = 10 * 2 ** 20):
+        self.timeout = timeout
+        self.max_body_bytes = max_body_bytes
+        self.max_idle_per_host = max_idle_per_host
+        self.user_agent = user_agent
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self._ssl_context = ssl.create_default_context()
+        self._idle = defaultdict(list)
+        self._transfers = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, key: Tuple[str, str, int]) -> Tuple[http.client.HTTPConnection, bool]:
+        """Get an idle connection for a host, or open a new one"""
+        with self._lock:
+            if self._idle[key]:
+                self.connections_reused += 1
+                return self._idle[key].pop(), True
+            self.connections_opened += 1
+
+        scheme, host, port = key
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout, context=self._ssl_context), False
+        return http.client.HTTPConnection(host, port, timeout=self.timeout), False
+
+    def _release(self, key: Tuple[str, str, int], conn: http.client.HTTPConnection):
+        """Return a connection to the idle pool, closing it if the pool is full"""
+        with self._lock:
+            if len(self._idle[key]) < self.max_idle_per_host:
+                self._idle[key].append(conn)
+                return
+        conn.close()
+
+    def _request(self, url: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """Send a single GET request, retrying once if a reused connection went stale"""
+        parts = urlsplit(url)
+        scheme = parts.scheme or 'http'
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+        path = parts.path or '/'
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        while True:
+            conn, reused = self._acquire(key)
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                raw = self._read_body(url, response)
+            except _STALE_CONNECTION_ERRORS:
+                conn.close()
+                if reused:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+            return response.status, {k.lower(): v for k, v in response.getheaders()}, raw
+
+    def _read_body(self, url: str, response: http.client.HTTPResponse) -> bytes:
+        """Read a response body, refusing one larger than ``max_body_bytes``"""
+        limit = self.max_body_bytes
+        if limit is None:
+            return response.read()
+        if response.length is not None and response.length > limit:
+            raise ResponseTooLarge(f"{url} sent {response.length} bytes, more than {limit}")
+        raw = response.read(limit + 1)
+        if len(raw) > limit:
+            raise ResponseTooLarge(f"{url} sent more than {limit} bytes")
+        return raw
+
+    def get(self, url: str, headers: Dict[str, str] = None, max_redirects: int = 5) -> HttpResponse:
+        """GET a URL, following redirects and decompressing the body"""
+        request_headers = {
+            'User-Agent': self.user_agent,
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        }
+        request_headers.update(headers or {})
+
+        location = url
+        for _ in range(max_redirects + 1):
+            status, response_headers, raw = self._request(location, request_headers)
+            if status in _REDIRECT_STATUSES and 'location' in response_headers:
+                location = urljoin(location, response_headers['location'])
+                continue
+
+            body = self._decode(raw, response_headers.get('content-encoding', ''), self.max_body_bytes)
+            with self._lock:
+                self._transfers[url] = (len(raw), len(body))
+            return HttpResponse(location, status, response_headers, body, len(raw))
+
+        raise http.client.HTTPException(f"Too many redirects fetching {url}")
+
+    @staticmethod
+    def _decode(raw: bytes, encoding: str, limit: Optional[int] = None) -> bytes:
+        """Undo gzip/deflate content encoding, producing at most ``limit`` bytes"""
+        encoding = encoding.strip().lower()
+        if encoding in ('gzip', 'x-gzip'):
+            return _inflate(raw, 16 + zlib.MAX_WBITS, limit)
+        if encoding == 'deflate':
+            try:
+                return _inflate(raw, zlib.MAX_WBITS, limit)
+            except zlib.error:
+                # Some servers send raw deflate data without the zlib header
+                return _inflate(raw, -zlib.MAX_WBITS, limit)
+        return raw
+
+    def transfer_stats(self, url: str) -> Tuple[int, int]:
+        """Get ``(wire_bytes, decoded_bytes)`` of the last response for a URL"""
+        with self._lock:
+            return self._transfers.get(url, (0, 0))
+
+    def get_stats(self) -> Dict:
+        """Get connection reuse and compression statistics"""
+        with self._lock:
+            wire = sum(w for w, _ in self._transfers.values())
+            decoded = sum(d for _, d in self._transfers.values())
+            return {
+                'connections_opened': self.connections_opened,
+                'connections_reused': self.connections_reused,
+                'wire_bytes': wire,
+                'decoded_bytes': decoded,
+                'bytes_saved': decoded - wire
+            }
+
+    def close(self):
+        """Close all idle connections"""
+        with self._lock:
+            idle = [conn for conns in self._idle.values() for conn in conns]
+            self._idle.clear()
+        for conn in idle:
+            conn.close()
@@ -6,9 +6,149 @@ Command-line tool for managing newsletter subscribers
 
 import sys
 import argparse
+import csv
+import gzip
+import re
+import time
+from contextlib import contextmanager
 from email_manager import EmailManager
+from segmentation import TOPICS
+from subscriber_store import SqliteSubscriberStore
 import json
 
+_READ_CHUNK = 64 * 1024
+# Noticeably faster than gzip's default of 9 for little size difference on subscriber lists
+_GZIP_LEVEL = 6
+_SUBSCRIBERS_ARRAY = re.compile(r'"subscribers"\s*:\s*\[')
+
+def iter_json_records(f):
+    """Stream the records of a JSON array, or of a ``{"subscribers": [...]}`` document,
+    decoding one record at a time instead of loading the whole file"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    while True:
+        stripped = buffer.lstrip()
+        if stripped.startswith('['):
+            pos = len(buffer) - len(stripped) + 1
+            break
+        match = _SUBSCRIBERS_ARRAY.search(buffer)
+        if match:
+            pos = match.end()
+            break
+        more = f.read(_READ_CHUNK)
+        if not more:
+            return
+        buffer += more
+    
+    while True:
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+        try:
+            if pos == len(buffer):
+                raise ValueError("need more data")
+            record, pos = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            # The next record is cut off at the end of the buffer; read on
+            more = f.read(_READ_CHUNK)
+            if not more:
+                if pos < len(buffer):
+                    raise
+                return
+            buffer = buffer[pos:] + more
+            pos = 0
+            continue
+        yield record
+        if pos > _READ_CHUNK:
+            buffer = buffer[pos:]
+            pos = 0
+
+def iter_ndjson_records(f):
+    """Stream one record per line, skipping blank lines"""
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+def iter_csv_records(f):
+    """Stream records from a CSV file with an ``email`` (and optional ``name``) header"""
+    yield from csv.DictReader(f)
+
+IMPORT_READERS = {
+    'json': iter_json_records,
+    'ndjson': iter_ndjson_records,
+    'csv': iter_csv_records,
+}
+
+EXPORT_FIELDS = ['email', 'name', 'active', 'subscribed_at', 'unsubscribed_at']
+
+def write_json_records(records, f):
+    """Write a JSON array with one record per line, as the records arrive; returns the count"""
+    count = 0
+    f.write('[')
+    for record in records:
+        f.write(',\n' if count else '\n')
+        f.write(json.dumps(record))
+        count += 1
+    f.write('\n]\n' if count else ']\n')
+    return count
+
+def write_ndjson_records(records, f):
+    """Write one JSON record per line; returns the count"""
+    count = 0
+    for record in records:
+        f.write(json.dumps(record) + '\n')
+        count += 1
+    return count
+
+def write_csv_records(records, f):
+    """Write a header and one properly quoted CSV row per record; returns the count"""
+    writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    count = 0
+    for record in records:
+        writer.writerow(record)
+        count += 1
+    return count
+
+EXPORT_WRITERS = {
+    'json': write_json_records,
+    'ndjson': write_ndjson_records,
+    'csv': write_csv_records,
+}
+
+def is_gzip(filename):
+    return filename.lower().endswith('.gz')
+
+@contextmanager
+def open_output(filename, compress=False):
+    """Open an export destination for writing text, ``-`` meaning stdout, gzip-compressed if asked"""
+    if filename == '-':
+        if compress:
+            with gzip.open(sys.stdout.buffer, 'wt', compresslevel=_GZIP_LEVEL, encoding='utf-8', newline='') as f:
+                yield f
+            sys.stdout.buffer.flush()
+        else:
+            yield sys.stdout
+            sys.stdout.flush()
+    elif compress:
+        with gzip.open(filename, 'wt', compresslevel=_GZIP_LEVEL, encoding='utf-8', newline='') as f:
+            yield f
+    else:
+        with open(filename, 'w', encoding='utf-8', newline='') as f:
+            yield f
+
+def detect_format(filename):
+    """Guess the file format from the extension, ignoring a trailing .gz"""
+    lower = filename.lower()
+    if is_gzip(lower):
+        lower = lower[:-3]
+    if lower.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if lower.endswith('.csv'):
+        return 'csv'
+    return 'json'
+
 def main():
     parser = argparse.ArgumentParser(description='Manage newsletter subscribers')
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
@@ -17,6 +157,13 @@ def main():
     subscribe_parser = subparsers.add_parser('subscribe', help='Subscribe an email')
     subscribe_parser.add_argument('email', help='Email address to subscribe')
     subscribe_parser.add_argument('--name', help='Name of the subscriber')
+    subscribe_parser.add_argument('--topics', nargs='+', metavar='TOPIC',
+                                  help=f"Only send articles on these topics ({', '.join(TOPICS)}; default: all)")
+    
+    # Topics command
+    topics_parser = subparsers.add_parser('topics', help="Change a subscriber's topics")
+    topics_parser.add_argument('email', help='Email address of the subscriber')
+    topics_parser.add_argument('topics', nargs='*', metavar='TOPIC', help='Topics to receive (none: every article)')
     
     # Unsubscribe command
     unsubscribe_parser = subparsers.add_parser('unsubscribe', help='Unsubscribe an email')
@@ -25,31 +172,50 @@ def main():
     # List command
     list_parser = subparsers.add_parser('list', help='List subscribers')
     list_parser.add_argument('--active-only', action='store_true', help='Show only active subscribers')
-    list_parser.add_argument('--format', choices=['table', 'json', 'csv'], default='table', help='Output format')
+    list_parser.add_argument('--format', choices=['table'] + sorted(EXPORT_WRITERS), default='table', help='Output format')
     
     # Stats command
     stats_parser = subparsers.add_parser('stats', help='Show subscription statistics')
     
     # Import command
     import_parser = subparsers.add_parser('import', help='Import subscribers from file')
-    import_parser.add_argument('file', help='JSON file with subscribers')
+    import_parser.add_argument('file', help='JSON, NDJSON or CSV file with subscribers, optionally gzipped (.gz)')
+    import_parser.add_argument('--format', choices=sorted(IMPORT_READERS), help='Input format (default: from file extension)')
+    import_parser.add_argument('--chunk-size', type=int, default=10000,
+                               help='Save after this many new subscribers (default: 10000, 0 saves once at the end)')
     
     # Export command
     export_parser = subparsers.add_parser('export', help='Export subscribers to file')
-    export_parser.add_argument('--file', help='Output file (default: subscribers_export.json)')
+    export_parser.add_argument('--file', help='Output file, or - for stdout (default: subscribers_export.json)')
+    export_parser.add_argument('--format', choices=sorted(EXPORT_WRITERS), help='Output format (default: from file extension)')
+    export_parser.add_argument('--gzip', action='store_true', help='Compress the output (implied by a .gz file name)')
     export_parser.add_argument('--active-only', action='store_true', help='Export only active subscribers')
     
+    # Migrate command
+    migrate_parser = subparsers.add_parser('migrate', help='Copy subscribers from a JSON file into a SQLite database')
+    migrate_parser.add_argument('database', help='SQLite database file (e.g. subscribers.db)')
+    migrate_parser.add_argument('--from', dest='source', default='subscribers.json',
+                                help='JSON file to migrate (default: subscribers.json)')
+    
     args = parser.parse_args()
     
     if not args.command:
         parser.print_help()
         return
     
+    if args.command == 'migrate':
+        # Works on the files it is given, so the configured store is not loaded
+        store = SqliteSubscriberStore(args.database)
+        migrated = store.import_json(args.source)
+        print(f"✅ Migrated {migrated} subscribers from {args.source} to {args.database}")
+        print(f"💡 Set SUBSCRIBERS_FILE={args.database} to use the database")
+        return
+    
     # Initialize email manager
     manager = EmailManager()
     
     if args.command == 'subscribe':
-        result = manager.subscribe(args.email, args.name)
+        result = manager.subscribe(args.email, args.name, topics=args.topics)
         if result['success']:
             print(f"✅ Successfully subscribed {args.email}")
         else:
@@ -64,33 +230,34 @@ def main():
             print(f"❌ Failed to unsubscribe {args.email}: {result['message']}")
             sys.exit(1)
     
-    elif args.command == 'list':
-        if args.active_only:
-            subscribers = manager.get_active_subscribers()
+    elif args.command == 'topics':
+        result = manager.update_topics(args.email, args.topics)
+        if result['success']:
+            print(f"✅ {args.email} now receives {', '.join(result['topics']) or 'every topic'}")
         else:
-            subscribers = manager.get_all_subscribers()
+            print(f"❌ Failed to update topics for {args.email}: {result['message']}")
+            sys.exit(1)
+    
+    elif args.command == 'list':
+        # Streamed page by page in email order, so any list size uses constant memory
+        subscribers = manager.iter_subscribers(active=True if args.active_only else None)
         
-        if args.format == 'json':
-            print(json.dumps(subscribers, indent=2))
-        elif args.format == 'csv':
-            if subscribers:
-                headers = ['email', 'name', 'active', 'subscribed_at', 'unsubscribed_at']
-                print(','.join(headers))
-                for sub in subscribers:
-                    row = [str(sub.get(h, '')) for h in headers]
-                    print(','.join(f'"{r}"' for r in row))
+        if args.format in EXPORT_WRITERS:
+            with open_output('-') as f:
+                EXPORT_WRITERS[args.format](subscribers, f)
         else:  # table format
-            if not subscribers:
-                print("No subscribers found")
-                return
-            
-            print(f"{'Email':<30} {'Name':<20} {'Status':<10} {'Subscribed':<12}")
-            print("-" * 80)
+            listed = 0
             for sub in subscribers:
+                if not listed:
+                    print(f"{'Email':<30} {'Name':<20} {'Status':<10} {'Subscribed':<12}")
+                    print("-" * 80)
+                listed += 1
                 status = "Active" if sub.get('active', False) else "Inactive"
-                name = sub.get('name', 'N/A')[:19]
+                name = (sub.get('name') or 'N/A')[:19]
                 subscribed = sub.get('subscribed_at', 'N/A')[:10] if sub.get('subscribed_at') else 'N/A'
                 print(f"{sub['email']:<30} {name:<20} {status:<10} {subscribed:<12}")
+            if not listed:
+                print("No subscribers found")
     
     elif args.command == 'stats':
         stats = manager.get_stats()
@@ -99,28 +266,29 @@ def main():
         print(f"Active subscribers: {stats['active_subscribers']}")
         print(f"Total subscribers: {stats['total_subscribers']}")
         print(f"Inactive subscribers: {stats['inactive_subscribers']}")
-        print(f"Last updated: {stats['last_updated']}")
+        print(f"Last updated: {stats['last_updated'] or 'never'}")
     
     elif args.command == 'import':
         try:
-            with open(args.file, 'r') as f:
-                data = json.load(f)
-                subscribers = data.get('subscribers', data) if isinstance(data, dict) else data
+            reader = IMPORT_READERS[args.format or detect_format(args.file)]
+            started = time.perf_counter()
+            opener = gzip.open if is_gzip(args.file) else open
+            with opener(args.file, 'rt', newline='') as f:
+                result = manager.bulk_subscribe(reader(f), chunk_size=args.chunk_size or None)
+            elapsed = time.perf_counter() - started
             
-            imported = 0
-            failed = 0
-            
-            for sub in subscribers:
-                email = sub.get('email', '')
-                name = sub.get('name', '')
-                result = manager.subscribe(email, name)
-                if result['success']:
-                    imported += 1
-                else:
-                    failed += 1
-                    print(f"❌ Failed to import {email}: {result['message']}")
+            for error in result['errors'][:20]:
+                print(f"❌ Failed to import {error['email']}: {error['message']}")
+            if len(result['errors']) > 20:
+                print(f"❌ ... and {len(result['errors']) - 20} more invalid emails")
+            if not result['success']:
+                print("❌ Failed to save imported subscribers")
+                sys.exit(1)
             
-            print(f"✅ Imported {imported} subscribers, {failed} failed")
+            rows = result['imported'] + result['duplicates'] + result['invalid']
+            print(f"✅ Imported {result['imported']} subscribers, "
+                  f"{result['duplicates']} already subscribed, {result['invalid']} invalid")
+            print(f"⏱️ {rows} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
             
         except Exception as e:
             print(f"❌ Error importing subscribers: {e}")
@@ -128,14 +296,20 @@ def main():
     
     elif args.command == 'export':
         filename = args.file or 'subscribers_export.json'
-        subscribers = manager.export_subscribers(not args.active_only)
+        writer = EXPORT_WRITERS[args.format or detect_format(filename)]
+        subscribers = manager.iter_subscribers(active=True if args.active_only else None)
+        # Keep stdout clean for the exported data when piping
+        log = sys.stderr if filename == '-' else sys.stdout
         
         try:
-            with open(filename, 'w') as f:
-                json.dump(subscribers, f, indent=2)
-            print(f"✅ Exported {len(subscribers)} subscribers to {filename}")
+            started = time.perf_counter()
+            with open_output(filename, args.gzip or is_gzip(filename)) as f:
+                exported = writer(subscribers, f)
+            elapsed = time.perf_counter() - started
+            print(f"✅ Exported {exported} subscribers to {'stdout' if filename == '-' else filename} "
+                  f"in {elapsed:.2f}s", file=log)
         except Exception as e:
-            print(f"❌ Error exporting subscribers: {e}")
+            print(f"❌ Error exporting subscribers: {e}", file=log)
             sys.exit(1)
 
 if __name__ == '__main__':
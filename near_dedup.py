@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Detection for Aerospace Newsletter
+Clusters the same story republished under slightly different headlines and
+URLs using MinHash signatures and locality-sensitive hashing (LSH) banding
+"""
+
+import re
+import zlib
+from typing import Dict, List
+import logging
+
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Mersenne prime 2**31 - 1 keeps ``a * x + b`` within uint64 for 31-bit shingle hashes
+_PRIME = np.uint64((1 << 31) - 1)
+
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+_WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Shingle hashes processed per NumPy batch, bounding peak memory to
+# roughly ``_BATCH_SHINGLES * num_perm * 8`` bytes
+_BATCH_SHINGLES = 16384
+
+class NearDuplicateDetector:
+    """MinHash/LSH near-duplicate detector for articles
+
+    Each article's title and summary are split into word shingles and
+    reduced to a ``num_perm`` MinHash signature. Signatures are cut into
+    ``bands`` bands; articles sharing any band bucket become candidates and
+    are only merged if their estimated Jaccard similarity reaches
+    ``threshold``. Each bucket is checked against its first member only, so
+    the work grows linearly with the number of articles.
+
+    After ``deduplicate``, ``dropped`` holds the articles it left out, so
+    they can be remembered as sent along with the copy that went out.
+    """
+
+    def __init__(self, threshold: float = 0.6, num_perm: int = 128, bands: int = 32,
+                 shingle_size: int = 2, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), num_perm, dtype=np.uint64)
+        self._band_weights = rng.integers(1, 1 << 62, num_perm // bands, dtype=np.uint64)
+        self.dropped: List[Dict] = []
+
+    def _shingles(self, article: Dict) -> List[int]:
+        """Hash the word shingles of an article's title and summary"""
+        text = f"{article.get('title', '')} {_TAG_PATTERN.sub(' ', article.get('summary', ''))}"
+        words = _WORD_PATTERN.findall(text.lower())
+        size = min(self.shingle_size, len(words)) or 1
+        shingles = {' '.join(words[i:i + size]) for i in range(max(len(words) - size + 1, 0))}
+        return [zlib.crc32(s.encode()) & 0x7FFFFFFF for s in shingles]
+
+    def signatures(self, articles: List[Dict]) -> np.ndarray:
+        """Compute the ``(len(articles), num_perm)`` MinHash signature matrix"""
+        signatures = np.empty((len(articles), self.num_perm), dtype=np.uint64)
+        hashes, owners = [], []
+        for i, article in enumerate(articles):
+            # Articles without words get a unique shingle so they never match
+            shingles = self._shingles(article) or [(1 << 31) + i]
+            hashes.extend(shingles)
+            owners.extend([i] * len(shingles))
+
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        owners = np.asarray(owners, dtype=np.int64)
+        signatures.fill(np.iinfo(np.uint64).max)
+        for start in range(0, len(hashes), _BATCH_SHINGLES):
+            x = hashes[start:start + _BATCH_SHINGLES]
+            permuted = (x[:, None] * self._a + self._b) % _PRIME
+            # Shingles are grouped by owner, so each article is one contiguous segment
+            batch_owners, segment_starts = np.unique(owners[start:start + _BATCH_SHINGLES], return_index=True)
+            minimums = np.minimum.reduceat(permuted, segment_starts, axis=0)
+            signatures[batch_owners] = np.minimum(signatures[batch_owners], minimums)
+        return signatures
+
+    def clusters(self, articles: List[Dict]) -> List[List[int]]:
+        """Group article indices into near-duplicate clusters, in input order"""
+        if not articles:
+            return []
+        signatures = self.signatures(articles)
+        rows = self.num_perm // self.bands
+        band_keys = (signatures.reshape(len(articles), self.bands, rows) * self._band_weights).sum(axis=2)
+
+        parent = list(range(len(articles)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for band in range(self.bands):
+            _, first_index, bucket = np.unique(band_keys[:, band], return_index=True, return_inverse=True)
+            representatives = first_index[bucket]
+            for i in np.nonzero(representatives != np.arange(len(articles)))[0]:
+                rep = representatives[i]
+                if find(i) == find(rep):
+                    continue
+                similarity = np.count_nonzero(signatures[i] == signatures[rep]) / self.num_perm
+                if similarity >= self.threshold:
+                    # Root at the smaller index so each cluster is led by its first article
+                    a, b = find(i), find(rep)
+                    parent[max(a, b)] = min(a, b)
+
+        groups = {}
+        for i in range(len(articles)):
+            groups.setdefault(find(i), []).append(i)
+        return list(groups.values())
+
+    def deduplicate(self, articles: List[Dict]) -> List[Dict]:
+        """Keep the first article of every near-duplicate cluster, preserving order"""
+        clusters = self.clusters(articles)
+        keep = sorted(cluster[0] for cluster in clusters)
+        self.dropped = [articles[i] for cluster in clusters for i in cluster[1:]]
+        if self.dropped:
+            logger.info(f"🧬 Dropped {len(self.dropped)} near-duplicate articles")
+        return [articles[i] for i in keep]
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Topic Segmentation for Aerospace Newsletter
+Tags articles with topics by feed and keywords, indexes them by topic and
+groups subscribers into segments that each receive one distinct digest
+"""
+
+import re
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Tuple
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class Topic:
+    """A topic subscribers can pick, matched by source feed or by keywords in the title and summary"""
+
+    def __init__(self, name: str, label: str, feeds: Iterable[str] = (), keywords: Iterable[str] = ()):
+        self.name = name
+        self.label = label
+        self.feeds = frozenset(feeds)
+        keywords = list(keywords)
+        # One alternation per topic, so tagging is a single scan of the text
+        self.pattern = re.compile(
+            r'\b(?:' + '|'.join(re.escape(keyword) for keyword in keywords) + r')\b', re.IGNORECASE
+        ) if keywords else None
+
+    def matches(self, article: Dict) -> bool:
+        if article.get('feed') in self.feeds:
+            return True
+        if self.pattern is None:
+            return False
+        return bool(self.pattern.search(article.get('title', '')) or
+                    self.pattern.search(article.get('summary', '')))
+
+TOPICS: Dict[str, Topic] = {topic.name: topic for topic in (
+    Topic(
+        'space', 'Space',
+        feeds=["https://www.nasa.gov/rss/dyn/breaking_news.rss"],
+        keywords=['space', 'spacecraft', 'satellite', 'satellites', 'orbit', 'orbital', 'launch',
+                  'rocket', 'NASA', 'ESA', 'SpaceX', 'astronaut', 'lunar', 'Mars', 'Space Force']
+    ),
+    Topic(
+        'drones', 'Drones',
+        feeds=["https://dronelife.com/feed", "https://news.mit.edu/topic/drones"],
+        keywords=['drone', 'drones', 'UAV', 'UAVs', 'UAS', 'unmanned', 'uncrewed', 'counter-drone', 'loitering munition']
+    ),
+    Topic(
+        'defense-procurement', 'Defense procurement',
+        keywords=['contract', 'contracts', 'procurement', 'acquisition', 'awarded', 'award', 'budget',
+                  'request for proposals', 'RFP', 'tender', 'low-rate initial production', 'Pentagon']
+    ),
+)}
+
+def unknown_topics(topics: Iterable[str], known: Mapping[str, Topic] = TOPICS) -> List[str]:
+    """Get the topics that are not defined, for validating a subscriber's choice"""
+    return sorted(topic for topic in topics if topic not in known)
+
+def topic_key(subscriber: Mapping, known: Mapping[str, Topic] = TOPICS) -> FrozenSet[str]:
+    """The subscriber's known topics; empty means no preference, so every article"""
+    topics = subscriber.get('topics')
+    if not topics:
+        return frozenset()
+    return frozenset(topic for topic in topics if topic in known)
+
+class TopicIndex:
+    """Inverted index from topic name to the positions of its articles
+
+    Every article is tagged once when the index is built. Selecting the
+    articles of a topic set merges the posting lists of its topics and
+    keeps the original article order.
+    """
+
+    def __init__(self, articles: Iterable[Dict], topics: Mapping[str, Topic] = TOPICS):
+        self.articles = list(articles)
+        self.postings: Dict[str, List[int]] = {name: [] for name in topics}
+        for position, article in enumerate(self.articles):
+            for name, topic in topics.items():
+                if topic.matches(article):
+                    self.postings[name].append(position)
+
+    def positions(self, topic_set: FrozenSet[str]) -> Tuple[int, ...]:
+        """Positions of the articles in any of the topics, or of all articles for an empty set"""
+        if not topic_set:
+            return tuple(range(len(self.articles)))
+        return tuple(sorted(set().union(*(self.postings.get(name, ()) for name in topic_set))))
+
+    def select(self, topic_set: FrozenSet[str]) -> List[Dict]:
+        return [self.articles[position] for position in self.positions(topic_set)]
+
+class Segment:
+    """Subscribers who receive the same digest
+
+    ``topic_sets`` lists every topic choice in the segment, as sorted lists,
+    so a journaled digest can be matched to its recipients again.
+    """
+
+    def __init__(self, topic_sets: List[List[str]], articles: List[Dict], recipients: List[str]):
+        self.topic_sets = topic_sets
+        self.articles = articles
+        self.recipients = recipients
+
+def group_by_topics(subscribers: Iterable[Mapping], known: Mapping[str, Topic] = TOPICS) -> Dict[FrozenSet[str], List[str]]:
+    """Group subscriber emails by their exact topic set"""
+    groups: Dict[FrozenSet[str], List[str]] = {}
+    for subscriber in subscribers:
+        groups.setdefault(topic_key(subscriber, known), []).append(subscriber['email'])
+    return groups
+
+def plan_segments(articles: Iterable[Dict], subscribers: Iterable[Mapping],
+                  topics: Mapping[str, Topic] = TOPICS) -> List[Segment]:
+    """Split subscribers into segments, one per distinct article selection
+
+    Topic sets that select the same articles (for example when no article
+    matches one of the topics) share a segment, so each distinct digest is
+    rendered once however many subscribers and topic sets lead to it.
+    Topic sets without any matching article get no segment.
+    """
+    index = TopicIndex(articles, topics)
+    segments: Dict[Tuple[int, ...], Segment] = {}
+    skipped = 0
+    for topic_set, recipients in group_by_topics(subscribers, topics).items():
+        positions = index.positions(topic_set)
+        if not positions:
+            skipped += len(recipients)
+            continue
+        segment = segments.get(positions)
+        if segment is None:
+            segment = segments[positions] = Segment([], [index.articles[p] for p in positions], [])
+        segment.topic_sets.append(sorted(topic_set))
+        segment.recipients.extend(recipients)
+    if skipped:
+        logger.info(f"⏭️ {skipped} subscribers have no articles in their topics this time")
+    return list(segments.values())
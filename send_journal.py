@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Send Journal for Aerospace Newsletter
+Append-only, fsync'd record of which recipients already received a digest,
+so a run that dies halfway through sending can be resumed without
+resending to anyone or skipping anyone
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List
+import logging
+
+from atomic_file import atomic_write
+from digest_message import DigestMessage
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class SendJournal:
+    """Newline-delimited JSON journal of digests and their deliveries
+
+    Three kinds of records are appended:
+
+    * ``digest``: the encoded message, the articles it contains and the
+      topic sets of the segment it is for, written once before the first
+      send so a resumed run does not have to fetch and render again
+    * ``sent``: one recipient that accepted the digest
+    * ``complete``: the digest went out to everyone
+
+    Every record is flushed and fsync'd before ``record_sent`` returns, so a
+    recipient is never journaled before the relay accepted the message and
+    never lost after. Delivered recipients are kept in a set per digest for
+    O(1) lookups. Completed digests are dropped when the journal is compacted.
+    """
+
+    def __init__(self, storage_file: str = "send_journal.ndjson"):
+        self.storage_file = storage_file
+        self.digests: Dict[str, Dict] = {}
+        self.sent: Dict[str, set] = {}
+        self.completed = set()
+        self._lock = threading.Lock()
+        self._file = None
+        self._load()
+
+    def _load(self):
+        """Replay the journal, ignoring a record cut short by a crash"""
+        if not os.path.exists(self.storage_file):
+            return
+        with open(self.storage_file, 'r') as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"⚠️ Ignoring damaged send journal record on line {line_number}")
+                    continue
+                self._apply(record)
+
+    def _apply(self, record: Dict):
+        digest_id = record.get('digest')
+        kind = record.get('type')
+        if kind == 'digest':
+            self.digests[digest_id] = record
+            self.sent.setdefault(digest_id, set())
+        elif kind == 'sent':
+            self.sent.setdefault(digest_id, set()).add(record['recipient'])
+        elif kind == 'complete':
+            self.completed.add(digest_id)
+
+    def _append(self, record: Dict):
+        """Durably append one record; the caller holds the lock"""
+        if self._file is None:
+            self._file = open(self.storage_file, 'a')
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._apply(record)
+
+    def begin(self, digest: DigestMessage, articles: Iterable[Dict] = (), topic_sets: List[List[str]] = None):
+        """Journal a digest before sending it; does nothing if it is already journaled
+
+        ``topic_sets`` are the subscriber topic choices the digest was
+        rendered for; None means it goes to every subscriber.
+        """
+        with self._lock:
+            if digest.id in self.digests:
+                return
+            record = {
+                'type': 'digest',
+                'digest': digest.id,
+                'subject': digest.subject,
+                'sender': digest.sender,
+                'body': digest.body.decode('ascii'),
+                'articles': [{'link': a.get('link', ''), 'guid': a.get('guid', '')} for a in articles],
+                'at': datetime.now().isoformat()
+            }
+            if topic_sets is not None:
+                record['topic_sets'] = topic_sets
+            self._append(record)
+
+    def is_sent(self, digest_id: str, recipient: str) -> bool:
+        """Check whether a recipient already received a digest"""
+        return recipient in self.sent.get(digest_id, ())
+
+    def record_sent(self, digest_id: str, recipient: str):
+        """Journal that a recipient received a digest"""
+        with self._lock:
+            self._append({'type': 'sent', 'digest': digest_id, 'recipient': recipient})
+
+    def complete(self, digest_id: str):
+        """Journal that a digest reached every recipient, then compact the journal"""
+        with self._lock:
+            self._append({'type': 'complete', 'digest': digest_id, 'at': datetime.now().isoformat()})
+            self._compact()
+
+    def pending_digests(self) -> List[Dict]:
+        """Get every digest that was started but not completed, oldest first"""
+        return [record for digest_id, record in self.digests.items() if digest_id not in self.completed]
+
+    def restore(self, record: Dict) -> DigestMessage:
+        """Rebuild the journaled digest message without rendering it again"""
+        return DigestMessage.from_encoded(record['subject'], record['sender'], record['body'].encode('ascii'))
+
+    def _compact(self):
+        """Atomically rewrite the journal without completed digests"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            with atomic_write(self.storage_file) as f:
+                for digest_id, record in self.digests.items():
+                    if digest_id in self.completed:
+                        continue
+                    f.write(json.dumps(record) + '\n')
+                    for recipient in self.sent.get(digest_id, ()):
+                        f.write(json.dumps({'type': 'sent', 'digest': digest_id, 'recipient': recipient}) + '\n')
+        except Exception as e:
+            logger.error(f"Error compacting send journal: {e}")
+            return
+        for digest_id in self.completed:
+            self.digests.pop(digest_id, None)
+            self.sent.pop(digest_id, None)
+        self.completed.clear()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -4,10 +4,16 @@ Newsletter Signup Web Server
 Simple web interface for newsletter subscription management
 """
 
+import atexit
+import hashlib
 import os
 import sys
-from flask import Flask, render_template, request, jsonify, redirect, url_for
-from email_manager import EmailManager
+import threading
+import time
+import json
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, stream_with_context
+from email_manager import EmailManager, decode_cursor
+from segmentation import TOPICS
 import logging
 
 # Configure logging
@@ -17,13 +23,65 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-change-this')
 
-# Initialize email manager
-email_manager = EmailManager()
+# Page size limits for subscriber listings
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Seconds a statistics response is reused before the counters are read again
+STATS_CACHE_SECONDS = float(os.environ.get('STATS_CACHE_SECONDS', '5'))
+
+# Initialize email manager; signups within the window share one write
+email_manager = EmailManager(write_window=float(os.environ.get('WRITE_WINDOW_MS', '50')) / 1000)
+atexit.register(email_manager.close)
+
+class StatsCache:
+    """Statistics with their serialized /api/stats body and ETag, rebuilt at most once per ``ttl``"""
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._expires = 0.0
+        self._entry = None
+    
+    def get(self):
+        """Get ``(stats, body, etag)``, refreshing them if the TTL ran out"""
+        with self._lock:
+            now = time.monotonic()
+            if self._entry is None or now >= self._expires:
+                stats = email_manager.get_stats()
+                body = json.dumps({'success': True, 'stats': stats}, sort_keys=True)
+                etag = hashlib.sha256(body.encode()).hexdigest()[:16]
+                self._entry = (stats, body, etag)
+                self._expires = now + self.ttl
+            return self._entry
+    
+    def clear(self):
+        with self._lock:
+            self._entry = None
+
+stats_cache = StatsCache(STATS_CACHE_SECONDS)
+
+def _listing_args(default_active=None):
+    """Read pagination and filter parameters shared by the subscriber listings"""
+    limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    cursor = request.args.get('cursor') or None
+    if cursor:
+        # Reject a bad cursor now rather than partway through a streamed response
+        decode_cursor(cursor)
+    prefix = request.args.get('prefix', '').strip()
+    active = request.args.get('active', '').lower()
+    if active in ('true', 'false'):
+        active = active == 'true'
+    elif active == 'all':
+        active = None
+    else:
+        active = default_active
+    return limit, cursor, active, prefix
 
 @app.route('/')
 def index():
     """Main signup page"""
-    stats = email_manager.get_stats()
+    stats, _, _ = stats_cache.get()
     return render_template('signup.html', stats=stats)
 
 @app.route('/subscribe', methods=['POST'])
@@ -33,6 +91,11 @@ def subscribe():
         data = request.get_json() if request.is_json else request.form
         email = data.get('email', '').strip()
         name = data.get('name', '').strip()
+        # A JSON list, repeated form fields or one comma-separated value; none means every topic
+        topics = data.get('topics') if request.is_json else data.getlist('topics')
+        if isinstance(topics, str):
+            topics = [topics]
+        topics = [t.strip() for value in topics or () for t in value.split(',') if t.strip()] or None
         
         if not email:
             return jsonify({
@@ -40,7 +103,7 @@ def subscribe():
                 'message': 'Email is required'
             }), 400
         
-        result = email_manager.subscribe(email, name)
+        result = email_manager.subscribe(email, name, topics=topics)
         
         if result['success']:
             return jsonify(result), 200
@@ -93,24 +156,50 @@ def unsubscribe():
 def admin():
     """Admin panel for managing subscribers"""
     try:
-        subscribers = email_manager.get_all_subscribers()
+        limit, cursor, active, prefix = _listing_args()
+        subscribers, next_cursor = email_manager.page_subscribers(limit, cursor, active, prefix)
         stats = email_manager.get_stats()
-        return render_template('admin.html', subscribers=subscribers, stats=stats)
+        return render_template('admin.html', subscribers=subscribers, stats=stats,
+                               next_cursor=next_cursor, prefix=prefix, active=active)
+    except ValueError as e:
+        return f"Invalid listing parameters: {e}", 400
     except Exception as e:
         logger.error(f"Admin panel error: {e}")
         return f"Error loading admin panel: {e}", 500
 
 @app.route('/api/subscribers')
 def api_subscribers():
-    """API endpoint to get subscribers"""
+    """API endpoint to get subscribers
+    
+    Returns one page of ``limit`` subscribers in email order with the
+    ``next_cursor`` to pass back for the following page. ``active``
+    (true/false/all) and ``prefix`` filter the list; ``include_inactive``
+    is still accepted. With ``format=ndjson`` every matching subscriber
+    after ``cursor`` is streamed as one JSON object per line instead.
+    """
     try:
         include_inactive = request.args.get('include_inactive', 'false').lower() == 'true'
-        subscribers = email_manager.export_subscribers(include_inactive)
+        limit, cursor, active, prefix = _listing_args(default_active=None if include_inactive else True)
+        
+        if request.args.get('format') == 'ndjson':
+            rows = email_manager.iter_subscribers(active, prefix, cursor=cursor)
+            return Response(
+                stream_with_context(json.dumps(subscriber) + '\n' for subscriber in rows),
+                mimetype='application/x-ndjson'
+            )
+        
+        subscribers, next_cursor = email_manager.page_subscribers(limit, cursor, active, prefix)
         return jsonify({
             'success': True,
             'subscribers': subscribers,
-            'count': len(subscribers)
+            'count': len(subscribers),
+            'next_cursor': next_cursor
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': f'Invalid listing parameters: {e}'
+        }), 400
     except Exception as e:
         logger.error(f"API error: {e}")
         return jsonify({
@@ -120,13 +209,21 @@ def api_subscribers():
 
 @app.route('/api/stats')
 def api_stats():
-    """API endpoint to get subscription statistics"""
+    """API endpoint to get subscription statistics
+    
+    Served from a response cached for ``STATS_CACHE_SECONDS``; clients
+    sending its ETag in ``If-None-Match`` get an empty 304.
+    """
     try:
-        stats = email_manager.get_stats()
-        return jsonify({
-            'success': True,
-            'stats': stats
-        })
+        _, body, etag = stats_cache.get()
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = int(STATS_CACHE_SECONDS)
+        return response
     except Exception as e:
         logger.error(f"Stats API error: {e}")
         return jsonify({
@@ -134,6 +231,14 @@ def api_stats():
             'message': 'An error occurred while fetching statistics'
         }), 500
 
+@app.route('/api/topics')
+def api_topics():
+    """API endpoint listing the topics subscribers can choose"""
+    return jsonify({
+        'success': True,
+        'topics': [{'name': topic.name, 'label': topic.label} for topic in TOPICS.values()]
+    })
+
 if __name__ == '__main__':
     # Create templates directory if it doesn't exist
     os.makedirs('templates', exist_ok=True)
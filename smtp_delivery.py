@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+SMTP Delivery Engine for Aerospace Newsletter
+Sends a digest to many recipients in parallel over a pool of authenticated
+SMTP connections, reconnecting transparently when a connection drops,
+pacing sends with a token bucket and retrying transient failures.
+Recipients can optionally share one SMTP transaction per batch
+"""
+
+import heapq
+import itertools
+import random
+import smtplib
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+
+from digest_message import DigestMessage
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Errors after which the connection is discarded and the send retried on a new one
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+TRANSIENT = 'transient'
+PERMANENT = 'permanent'
+
+def classify_smtp_error(error: Exception) -> str:
+    """Classify a send error as ``TRANSIENT`` (4xx, worth retrying) or ``PERMANENT`` (5xx)"""
+    if isinstance(error, _CONNECTION_ERRORS):
+        return TRANSIENT
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        return TRANSIENT if codes and all(400 <= code < 500 for code in codes) else PERMANENT
+    if isinstance(error, smtplib.SMTPResponseException):
+        return TRANSIENT if 400 <= error.smtp_code < 500 else PERMANENT
+    return PERMANENT
+
+class TokenBucket:
+    """Thread-safe token bucket allowing ``rate`` sends per second with bursts of ``capacity``"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Block until ``tokens`` are available; returns the time spent waiting
+
+        Requests larger than the bucket wait for a full bucket and leave it
+        in debt, so the average rate still holds.
+        """
+        needed = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return waited
+                delay = (needed - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+class SendScheduler:
+    """Work queue of recipients where failed sends come back after a backoff
+
+    Workers take recipients with ``get`` and finish each one with ``done``
+    or ``retry``. Retries are scheduled after an exponential backoff with
+    jitter (``base_delay * 2**attempt``, capped at ``max_delay``, randomized
+    between half and all of it). ``get`` returns None once nothing is queued,
+    waiting or in flight.
+    """
+
+    def __init__(self, recipients: Iterable[str], max_attempts: int = 4,
+                 base_delay: float = 2.0, max_delay: float = 60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._order = itertools.count()
+        self._heap = [(0.0, next(self._order), recipient, 0) for recipient in recipients]
+        heapq.heapify(self._heap)
+        self._in_flight = 0
+        self._stopped = False
+        self._cond = threading.Condition()
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._heap) + self._in_flight
+
+    def get(self) -> Optional[Tuple[str, int]]:
+        """Wait for the next recipient that is due, returning ``(recipient, attempt)``"""
+        tasks = self.get_many(1)
+        return tasks[0] if tasks else None
+
+    def get_many(self, limit: int) -> Optional[List[Tuple[str, int]]]:
+        """Wait for due recipients and take up to ``limit`` of them as ``(recipient, attempt)`` pairs"""
+        with self._cond:
+            while not self._stopped:
+                now = time.monotonic()
+                if self._heap and self._heap[0][0] <= now:
+                    tasks = []
+                    while self._heap and self._heap[0][0] <= now and len(tasks) < limit:
+                        _, _, recipient, attempt = heapq.heappop(self._heap)
+                        tasks.append((recipient, attempt))
+                    self._in_flight += len(tasks)
+                    return tasks
+                if not self._heap and not self._in_flight:
+                    return None
+                self._cond.wait(self._heap[0][0] - now if self._heap else None)
+            return None
+
+    def done(self):
+        """Mark the recipient taken by ``get`` as finished"""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def retry(self, recipient: str, attempt: int, delay: float = None) -> Optional[float]:
+        """Requeue a recipient after a backoff; returns the delay, or None if out of attempts"""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+            if attempt + 1 >= self.max_attempts or self._stopped:
+                return None
+            if delay is None:
+                backoff = min(self.max_delay, self.base_delay * 2 ** attempt)
+                delay = backoff / 2 + random.uniform(0, backoff / 2)
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._order), recipient, attempt + 1))
+            return delay
+
+    def stop(self):
+        """Drop everything still queued and release waiting workers"""
+        with self._cond:
+            self._stopped = True
+            self._heap.clear()
+            self._cond.notify_all()
+
+class DeliveryReport:
+    """Thread-safe record of successful and failed recipients
+
+    ``retryable`` lists the failed recipients whose last error was
+    transient, who may still get the digest on a later attempt.
+    """
+
+    def __init__(self):
+        self.sent: List[str] = []
+        self.failed: Dict[str, str] = {}
+        self.retryable: List[str] = []
+        self.batches: List[Dict] = []
+        self.reconnects = 0
+        self.retries = 0
+        self.throttled_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record_sent(self, recipient: str):
+        with self._lock:
+            self.sent.append(recipient)
+
+    def record_failed(self, recipient: str, error: Exception):
+        with self._lock:
+            self.failed[recipient] = str(error)
+            if classify_smtp_error(error) == TRANSIENT:
+                self.retryable.append(recipient)
+
+    def record_batch(self, accepted: List[str], refused: Dict[str, Tuple[int, bytes]]):
+        with self._lock:
+            self.batches.append({'accepted': accepted, 'refused': refused})
+
+    def record_reconnect(self):
+        with self._lock:
+            self.reconnects += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_throttle(self, seconds: float):
+        with self._lock:
+            self.throttled_seconds += seconds
+
+class DeliveryEngine:
+    """Delivers a ``DigestMessage`` over a pool of ``pool_size`` SMTP connections
+
+    Each worker thread owns one connection and pulls recipients from a shared
+    ``SendScheduler``. Sends are paced by a ``TokenBucket`` of ``rate``
+    messages per second (unlimited if None). A dropped pooled connection is
+    replaced and the recipient retried at once; when a new connection
+    fails as well, and for other transient (4xx) failures, the recipient is
+    retried after a backoff, up to ``max_attempts`` attempts per recipient,
+    while permanent (5xx) failures are reported straight away.
+    Authentication failures stop every worker and are raised from ``deliver``.
+
+    With ``batch_size`` above 1 a worker takes up to that many recipients
+    at once and sends them one copy addressed to ``undisclosed-recipients``
+    with one RCPT TO each, so the body is uploaded once per batch. Refused
+    recipients are retried or failed individually, and each batch's
+    accepted and refused recipients are kept in ``DeliveryReport.batches``.
+
+    Every socket operation is bounded by ``timeout`` seconds, so a relay
+    that stops responding fails the send instead of hanging a worker.
+    """
+
+    def __init__(self, host: str, port: int, username: str = None, password: str = None,
+                 pool_size: int = 1, use_tls: bool = True, rate: float = None, burst: float = None,
+                 max_attempts: int = 4, retry_base_delay: float = 2.0, retry_max_delay: float = 60.0,
+                 batch_size: int = 1, timeout: float = 30.0, smtp_factory=None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.pool_size = max(1, pool_size)
+        self.use_tls = use_tls
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self.smtp_factory = smtp_factory or smtplib.SMTP
+
+    def connect(self) -> smtplib.SMTP:
+        """Open one authenticated SMTP connection, closing it again if the handshake fails"""
+        server = self.smtp_factory(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()  # Enable TLS encryption
+            if self.username:
+                server.login(self.username, self.password)
+        except BaseException:
+            self._close(server, graceful=False)
+            raise
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP, graceful: bool = True):
+        try:
+            if graceful:
+                server.quit()
+            else:
+                server.close()
+        except Exception:
+            pass
+
+    def deliver(self, digest: DigestMessage, recipients: Iterable[str],
+                on_sent: Callable[[str], None] = None) -> DeliveryReport:
+        """Send the digest to every recipient and report the outcome
+
+        The first connection is opened before any worker starts, so an
+        unreachable server or bad credentials fail fast with the original
+        exception. ``on_sent`` is called from the worker thread as soon as
+        the server accepts a recipient.
+        """
+        scheduler = SendScheduler(recipients, self.max_attempts, self.retry_base_delay, self.retry_max_delay)
+        report = DeliveryReport()
+        if not len(scheduler):
+            return report
+
+        first_connection = self.connect()
+        fatal_errors = []
+        workers = [
+            threading.Thread(
+                target=self._worker,
+                args=(digest, scheduler, report, fatal_errors, on_sent, first_connection if i == 0 else None),
+                name=f"smtp-{i}"
+            )
+            for i in range(min(self.pool_size, len(scheduler)))
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        if fatal_errors:
+            raise fatal_errors[0]
+        return report
+
+    def _worker(self, digest, scheduler, report, fatal_errors, on_sent, server):
+        """Send to recipients from the scheduler over this worker's own connection"""
+        try:
+            while True:
+                tasks = scheduler.get_many(self.batch_size)
+                if tasks is None:
+                    break
+                recipients = [recipient for recipient, _ in tasks]
+
+                if self.bucket is not None:
+                    report.record_throttle(self.bucket.acquire(len(tasks)))
+
+                refused = {}
+                # A connection made for this send, rather than one reused from earlier sends
+                fresh = server is None
+                try:
+                    if server is None:
+                        server = self.connect()
+                    if self.batch_size > 1:
+                        refused = server.sendmail(digest.sender, recipients, digest.for_batch()) or {}
+                    else:
+                        server.sendmail(digest.sender, recipients[0], digest.for_recipient(recipients[0]))
+                except smtplib.SMTPAuthenticationError as e:
+                    fatal_errors.append(e)
+                    scheduler.stop()
+                    return
+                except smtplib.SMTPRecipientsRefused as e:
+                    # Every recipient of the transaction was refused; judge each by its own reply
+                    refused = e.recipients
+                except Exception as e:
+                    if isinstance(e, _CONNECTION_ERRORS) or getattr(e, 'smtp_code', None) == 421:
+                        # The server closed or is closing this connection
+                        if server is not None:
+                            self._close(server, graceful=False)
+                            server = None
+                        if fresh:
+                            # Reconnecting failed too, so the relay may be down; back off
+                            logger.warning(f"🔌 Could not reach {self.host} sending to {', '.join(recipients)}: {e}")
+                            for recipient, attempt in tasks:
+                                self._retry_or_fail(scheduler, report, recipient, attempt, e)
+                            continue
+                        logger.warning(f"🔄 Connection lost sending to {', '.join(recipients)}, reconnecting: {e}")
+                        report.record_reconnect()
+                        for recipient, attempt in tasks:
+                            if scheduler.retry(recipient, attempt, delay=0) is None:
+                                self._fail(report, recipient, e)
+                    else:
+                        for recipient, attempt in tasks:
+                            self._retry_or_fail(scheduler, report, recipient, attempt, e)
+                    continue
+
+                accepted = [recipient for recipient in recipients if recipient not in refused]
+                for recipient, attempt in tasks:
+                    if recipient in refused:
+                        error = smtplib.SMTPRecipientsRefused({recipient: refused[recipient]})
+                        self._retry_or_fail(scheduler, report, recipient, attempt, error)
+                        continue
+                    scheduler.done()
+                    report.record_sent(recipient)
+                    logger.info(f"✅ Sent to: {recipient}")
+                if self.batch_size > 1:
+                    report.record_batch(accepted, dict(refused))
+                    logger.info(f"📦 Batch of {len(recipients)}: {len(accepted)} accepted, {len(refused)} refused")
+
+                if on_sent is not None:
+                    try:
+                        for recipient in accepted:
+                            on_sent(recipient)
+                    except Exception as e:
+                        # Stop rather than send mail that could not be recorded
+                        fatal_errors.append(e)
+                        scheduler.stop()
+                        return
+        finally:
+            if server is not None:
+                self._close(server)
+
+    @staticmethod
+    def _fail(report, recipient, error):
+        report.record_failed(recipient, error)
+        logger.error(f"❌ Failed to send to {recipient}: {error}")
+
+    def _retry_or_fail(self, scheduler, report, recipient, attempt, error):
+        """Requeue a recipient after a transient error, or record it as failed"""
+        if classify_smtp_error(error) == TRANSIENT:
+            delay = scheduler.retry(recipient, attempt)
+            if delay is not None:
+                report.record_retry()
+                logger.warning(f"⏳ Temporary failure for {recipient}, retrying in {delay:.1f}s: {error}")
+                return
+        else:
+            scheduler.done()
+        self._fail(report, recipient, error)
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Compact Subscriber Records for Aerospace Newsletter
+A slotted record type that stores timestamps as integers and unsubscribe
+tokens as raw bytes, while still behaving like the subscriber dicts it
+replaces
+"""
+
+from collections.abc import MutableMapping
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Optional, Union
+
+# Timestamps are naive local times, as written by ``datetime.now().isoformat()``
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+_MICROSECONDS_PER_DAY = 86400 * 1000000
+
+def encode_time(value: Optional[Union[str, int]]) -> Optional[Union[str, int]]:
+    """Turn an ISO timestamp into microseconds since 1970-01-01, keeping strings that would not round-trip"""
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return value
+    if parsed.tzinfo is not None or len(value) not in (19, 26) or value[10] != 'T':
+        return value
+    if len(value) == 26 and not parsed.microsecond:
+        return value
+    delta = parsed - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+def decode_time(value: Optional[Union[str, int]]) -> Optional[str]:
+    """Turn an encoded timestamp back into its ISO string"""
+    if isinstance(value, int):
+        return (_EPOCH + timedelta(microseconds=value)).isoformat()
+    return value
+
+@lru_cache(maxsize=4096)
+def _day_string(days: int) -> str:
+    return date.fromordinal(_EPOCH_ORDINAL + days).isoformat()
+
+def encode_token(token: Optional[Union[str, bytes]]) -> Optional[Union[str, bytes]]:
+    """Store a 32-character hex token as its 16 raw bytes, other tokens unchanged"""
+    if isinstance(token, str) and len(token) == 32:
+        try:
+            raw = bytes.fromhex(token)
+        except ValueError:
+            return token
+        if raw.hex() == token:
+            return raw
+    return token
+
+# Subscribers share one frozenset per distinct topic choice
+_INTERNED_TOPIC_SETS: Dict[FrozenSet[str], FrozenSet[str]] = {}
+
+def intern_topics(topics: Optional[Iterable[str]]) -> Optional[FrozenSet[str]]:
+    """Get the shared frozenset for a topic choice, or None for no preference"""
+    if not topics:
+        return None
+    topic_set = frozenset(topics)
+    return _INTERNED_TOPIC_SETS.setdefault(topic_set, topic_set)
+
+def decode_token(token: Optional[Union[str, bytes]]) -> Optional[str]:
+    if isinstance(token, bytes):
+        return token.hex()
+    return token
+
+class Subscriber(MutableMapping):
+    """One subscriber, stored in slots instead of a per-record dict
+
+    Reads and writes through the mapping interface see exactly the keys and
+    values of the original subscriber dicts (ISO timestamp strings, hex
+    token), so ``record['email']``, ``record.get('active')``, ``dict(record)``
+    and equality with dicts keep working. Internally ``subscribed_at`` and
+    ``unsubscribed_at`` are integers (microseconds since 1970-01-01) and the
+    token is 16 bytes. Chosen topics are an interned frozenset, read as a
+    sorted list. Keys outside the known fields are kept in ``extra``.
+    """
+
+    __slots__ = ('email', 'name', 'active', '_subscribed_at', '_unsubscribed_at', '_token', 'topics', 'extra')
+
+    FIELDS = ('email', 'name', 'subscribed_at', 'active', 'unsubscribe_token', 'unsubscribed_at', 'topics')
+
+    def __init__(self, email: str, name: Optional[str] = None, subscribed_at: Union[str, int] = None,
+                 active: bool = True, unsubscribe_token: Union[str, bytes] = None,
+                 unsubscribed_at: Union[str, int] = None, topics: Iterable[str] = None, extra: Dict = None):
+        self.email = email
+        self.name = name
+        self.active = bool(active)
+        self._subscribed_at = encode_time(subscribed_at)
+        self._unsubscribed_at = encode_time(unsubscribed_at)
+        self._token = encode_token(unsubscribe_token)
+        self.topics = intern_topics(topics)
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Subscriber':
+        """Build a record from a subscriber dict"""
+        if isinstance(data, Subscriber):
+            return data
+        extra = {key: value for key, value in data.items() if key not in cls.FIELDS}
+        return cls(
+            data['email'],
+            data.get('name'),
+            data.get('subscribed_at'),
+            data.get('active', False),
+            data.get('unsubscribe_token'),
+            data.get('unsubscribed_at'),
+            data.get('topics'),
+            extra
+        )
+
+    @property
+    def subscribed_at(self) -> Optional[str]:
+        return decode_time(self._subscribed_at)
+
+    @property
+    def unsubscribed_at(self) -> Optional[str]:
+        return decode_time(self._unsubscribed_at)
+
+    @property
+    def signup_day(self) -> Optional[str]:
+        """The ``subscribed_at`` date as YYYY-MM-DD, without formatting the full timestamp"""
+        value = self._subscribed_at
+        if isinstance(value, int):
+            return _day_string(value // _MICROSECONDS_PER_DAY)
+        return value[:10] if value else None
+
+    @property
+    def token_key(self) -> Optional[Union[str, bytes]]:
+        """The token in its stored form, as used for index lookups"""
+        return self._token
+
+    def to_dict(self) -> Dict:
+        """Get the record as a plain subscriber dict"""
+        # Built directly rather than through the mapping interface; exports call this per record
+        record = {'email': self.email, 'name': self.name}
+        if self._subscribed_at is not None:
+            record['subscribed_at'] = decode_time(self._subscribed_at)
+        record['active'] = self.active
+        if self._token is not None:
+            record['unsubscribe_token'] = decode_token(self._token)
+        if self._unsubscribed_at is not None:
+            record['unsubscribed_at'] = decode_time(self._unsubscribed_at)
+        if self.topics:
+            record['topics'] = sorted(self.topics)
+        if self.extra:
+            record.update(self.extra)
+        return record
+
+    def copy(self) -> 'Subscriber':
+        """Get an independent copy, still in compact form"""
+        record = Subscriber.__new__(Subscriber)
+        record.email = self.email
+        record.name = self.name
+        record.active = self.active
+        record._subscribed_at = self._subscribed_at
+        record._unsubscribed_at = self._unsubscribed_at
+        record._token = self._token
+        record.topics = self.topics
+        record.extra = dict(self.extra) if self.extra else None
+        return record
+
+    def assign(self, other: 'Subscriber'):
+        """Take every field from ``other`` in place, so holders of this record see the new values"""
+        self.email = other.email
+        self.name = other.name
+        self.active = other.active
+        self._subscribed_at = other._subscribed_at
+        self._unsubscribed_at = other._unsubscribed_at
+        self._token = other._token
+        self.topics = other.topics
+        self.extra = dict(other.extra) if other.extra else None
+
+    def __getitem__(self, key: str):
+        if key == 'email':
+            return self.email
+        if key == 'name':
+            return self.name
+        if key == 'active':
+            return self.active
+        if key == 'subscribed_at' and self._subscribed_at is not None:
+            return decode_time(self._subscribed_at)
+        if key == 'unsubscribe_token' and self._token is not None:
+            return decode_token(self._token)
+        if key == 'unsubscribed_at' and self._unsubscribed_at is not None:
+            return decode_time(self._unsubscribed_at)
+        if key == 'topics' and self.topics:
+            return sorted(self.topics)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        if key == 'email':
+            self.email = value
+        elif key == 'name':
+            self.name = value
+        elif key == 'active':
+            self.active = bool(value)
+        elif key == 'subscribed_at':
+            self._subscribed_at = encode_time(value)
+        elif key == 'unsubscribe_token':
+            self._token = encode_token(value)
+        elif key == 'unsubscribed_at':
+            self._unsubscribed_at = encode_time(value)
+        elif key == 'topics':
+            self.topics = intern_topics(value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key not in self:
+            raise KeyError(key)
+        if key == 'subscribed_at':
+            self._subscribed_at = None
+        elif key == 'unsubscribe_token':
+            self._token = None
+        elif key == 'unsubscribed_at':
+            self._unsubscribed_at = None
+        elif key == 'topics':
+            self.topics = None
+        elif key in ('email', 'name', 'active'):
+            raise KeyError(f"{key} cannot be removed from a subscriber")
+        else:
+            del self.extra[key]
+
+    def __iter__(self):
+        yield 'email'
+        yield 'name'
+        if self._subscribed_at is not None:
+            yield 'subscribed_at'
+        yield 'active'
+        if self._token is not None:
+            yield 'unsubscribe_token'
+        if self._unsubscribed_at is not None:
+            yield 'unsubscribed_at'
+        if self.topics:
+            yield 'topics'
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"Subscriber({self.to_dict()!r})"
@@ -15,11 +15,22 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from fetch_articles import (
     fetch_latest_articles,
+    iter_articles,
     format_articles_for_email,
     format_articles_for_text,
     send_email_with_articles
 )
 from email_manager import EmailManager
+from http_transport import HttpResponse
+
+def make_fake_transport(status=200, headers=None):
+    """Build a mocked HttpTransport whose response body is the requested URL"""
+    transport = MagicMock()
+    transport.get.side_effect = lambda url, **kwargs: HttpResponse(
+        url, status, dict(headers or {}), url.encode(), len(url)
+    )
+    transport.transfer_stats.return_value = (0, 0)
+    return transport
 
 class TestNewsletter(unittest.TestCase):
     """Test cases for the newsletter functionality"""
@@ -55,7 +66,8 @@ class TestNewsletter(unittest.TestCase):
     
     def test_article_fetching(self):
         """Test article fetching with mocked RSS feeds"""
-        with patch('fetch_articles.feedparser') as mock_feedparser:
+        with patch('fetch_articles.feedparser') as mock_feedparser, \
+             patch('fetch_articles.HttpTransport', return_value=make_fake_transport()):
             # Mock feed entries
             mock_entry = MagicMock()
             mock_entry.title = "Test Article"
@@ -78,6 +90,381 @@ class TestNewsletter(unittest.TestCase):
                 self.assertIn('summary', article)
                 print("✅ Article structure is correct")
     
+    def test_concurrent_fetch_order_and_isolation(self):
+        """Test concurrent fetching keeps FEEDS order and isolates failures"""
+        import time
+        import fetch_articles
+        
+        feeds = [f"https://feed{i}.example.com/rss" for i in range(4)]
+        
+        def fake_parse(body, **kwargs):
+            url = body.decode()
+            index = feeds.index(url)
+            if index == 1:
+                raise RuntimeError("feed down")
+            # Later feeds finish first to exercise ordering
+            time.sleep(0.05 * (len(feeds) - index))
+            entry = MagicMock()
+            entry.title = f"Article from feed {index}"
+            entry.link = f"{url}/article"
+            feed = MagicMock()
+            feed.entries = [entry]
+            return feed
+        
+        with patch.object(fetch_articles, 'FEEDS', feeds), \
+             patch('fetch_articles.feedparser') as mock_feedparser:
+            mock_feedparser.parse.side_effect = fake_parse
+            articles = fetch_latest_articles(limit_per_feed=1, max_workers=4,
+                                             transport=make_fake_transport())
+        
+        self.assertEqual(
+            [a['title'] for a in articles],
+            ["Article from feed 0", "Article from feed 2", "Article from feed 3"]
+        )
+        print("✅ Concurrent fetching keeps order and isolates errors")
+    
+    def test_feed_cache_conditional_get(self):
+        """Test that a 304 response reuses cached articles"""
+        import fetch_articles
+        from feed_cache import FeedCache
+        
+        url = "https://feed.example.com/rss"
+        entry = MagicMock()
+        entry.title = "Cached Article"
+        entry.link = "https://feed.example.com/cached"
+        entry.published = "Mon, 01 Jan 2024 12:00:00 +0000"
+        entry.summary = "Cached summary"
+        entry.id = "tag:feed.example.com,2024:cached"
+        full_feed = MagicMock(entries=[entry], bozo=False)
+        
+        cache = FeedCache("test_feed_cache.json", max_entries=1)
+        try:
+            with patch.object(fetch_articles, 'FEEDS', [url]), \
+                 patch('fetch_articles.feedparser') as mock_feedparser:
+                mock_feedparser.parse.return_value = full_feed
+                first = fetch_latest_articles(
+                    cache=cache, transport=make_fake_transport(headers={'etag': '"abc"'})
+                )
+                
+                reloaded = FeedCache("test_feed_cache.json", max_entries=1)
+                transport = make_fake_transport(status=304)
+                second = fetch_latest_articles(cache=reloaded, transport=transport)
+                self.assertEqual(transport.get.call_args.kwargs['headers'], {'If-None-Match': '"abc"'})
+                self.assertEqual(mock_feedparser.parse.call_count, 1)
+            
+            self.assertEqual(first, second)
+            self.assertEqual(reloaded.get_stats()['hits'], 1)
+            
+            # Storing a second feed evicts the least recently used one
+            reloaded.store("https://other.example.com/rss", [])
+            self.assertNotIn(url, reloaded.entries)
+            self.assertEqual(reloaded.get_stats()['evictions'], 1)
+        finally:
+            if os.path.exists("test_feed_cache.json"):
+                os.remove("test_feed_cache.json")
+        
+        print("✅ Feed cache reuses articles on 304")
+    
+    def test_feed_deadline_and_circuit_breaker(self):
+        """Test that hanging feeds are abandoned and then skipped by the breaker"""
+        import time
+        import fetch_articles
+        from circuit_breaker import CircuitBreaker
+        
+        feeds = ["https://slow.example.com/rss", "https://fast.example.com/rss"]
+        
+        def fake_parse(body, **kwargs):
+            url = body.decode()
+            if url == feeds[0]:
+                time.sleep(1)
+            entry = MagicMock()
+            entry.title = f"Article from {url}"
+            entry.link = url
+            feed = MagicMock()
+            feed.entries = [entry]
+            return feed
+        
+        breaker = CircuitBreaker("test_feed_health.json", failure_threshold=1, cooldown_runs=2)
+        try:
+            with patch.object(fetch_articles, 'FEEDS', feeds), \
+                 patch('fetch_articles.feedparser') as mock_feedparser:
+                mock_feedparser.parse.side_effect = fake_parse
+                
+                started = time.monotonic()
+                articles = fetch_latest_articles(limit_per_feed=1, breaker=breaker, timeout=0.2,
+                                                 transport=make_fake_transport())
+                self.assertLess(time.monotonic() - started, 0.9)
+                self.assertEqual([a['link'] for a in articles], [feeds[1]])
+                
+                # The slow feed is skipped on the next run, loaded from disk
+                reloaded = CircuitBreaker("test_feed_health.json", failure_threshold=1, cooldown_runs=2)
+                self.assertEqual(reloaded.open_feeds(), [feeds[0]])
+                transport = make_fake_transport()
+                fetch_latest_articles(limit_per_feed=1, breaker=reloaded, timeout=0.2, transport=transport)
+                self.assertEqual([c.args[0] for c in transport.get.call_args_list], [feeds[1]])
+        finally:
+            if os.path.exists("test_feed_health.json"):
+                os.remove("test_feed_health.json")
+        
+        
+        # A feed that never answers does not keep the process alive past the deadline
+        import subprocess
+        script = (
+            "import threading\n"
+            "from unittest.mock import MagicMock, patch\n"
+            "import fetch_articles\n"
+            "transport = MagicMock()\n"
+            "transport.get.side_effect = lambda url, **kwargs: threading.Event().wait()\n"
+            "transport.transfer_stats.return_value = (0, 0)\n"
+            "with patch.object(fetch_articles, 'FEEDS', ['https://hung.example.com/rss']):\n"
+            "    print(fetch_articles.fetch_latest_articles(timeout=0.2, transport=transport))\n"
+        )
+        result = subprocess.run([sys.executable, "-c", script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, timeout=30)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "[]")
+        print("✅ Feed deadline and circuit breaker work correctly")
+    
+    def test_dedup_index(self):
+        """Test cross-feed and cross-run article deduplication"""
+        from dedup_index import DedupIndex, canonicalize_link
+        
+        self.assertEqual(
+            canonicalize_link("http://www.example.com/story/?utm_source=rss&id=7#top"),
+            canonicalize_link("https://example.com/story?id=7")
+        )
+        
+        articles = [
+            {'title': 'Wire story', 'link': 'https://defense.example.com/wire?utm_medium=rss', 'guid': None},
+            {'title': 'Wire story', 'link': 'https://www.defense.example.com/wire/', 'guid': None},
+            {'title': 'Other story', 'link': 'https://other.example.com/a', 'guid': 'other-a'},
+        ]
+        index = DedupIndex("test_dedup_index.json")
+        try:
+            unique = list(index.filter(articles))
+            self.assertEqual([a['title'] for a in unique], ['Wire story', 'Other story'])
+            index.mark_sent(unique[:1])
+            index.save()
+            
+            # Only the sent article is skipped by the next run
+            next_run = DedupIndex("test_dedup_index.json")
+            self.assertEqual([a['title'] for a in next_run.filter(articles)], ['Other story'])
+            
+            # Expired keys are dropped on load
+            expired = DedupIndex("test_dedup_index.json", ttl_days=-1)
+            self.assertEqual(expired.seen, {})
+        finally:
+            if os.path.exists("test_dedup_index.json"):
+                os.remove("test_dedup_index.json")
+        
+        print("✅ Dedup index filters duplicates across feeds and runs")
+    
+    def test_atomic_write(self):
+        """Test that state files are replaced whole and durably, or not at all"""
+        import json
+        import shutil
+        import tempfile
+        from atomic_file import atomic_write
+        from circuit_breaker import CircuitBreaker
+        
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "state.json")
+        try:
+            with patch('atomic_file.os.fsync', wraps=os.fsync) as fsync:
+                with atomic_write(path) as f:
+                    json.dump({'version': 1}, f)
+                # The file's contents and then the rename in its directory
+                self.assertEqual(fsync.call_count, 2)
+            
+            with self.assertRaises(ValueError):
+                with atomic_write(path) as f:
+                    f.write('{"version": ')
+                    raise ValueError("interrupted")
+            with open(path) as f:
+                self.assertEqual(json.load(f), {'version': 1})
+            self.assertEqual(os.listdir(directory), ["state.json"])
+            
+            # The stores' saves report a failed write instead of raising
+            breaker = CircuitBreaker(path)
+            with patch('atomic_file.os.replace', side_effect=OSError("disk full")):
+                self.assertFalse(breaker.save())
+            self.assertEqual(os.listdir(directory), ["state.json"])
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        
+        print("✅ Atomic writes replace files whole or leave them alone")
+    
+    def test_near_duplicate_detection(self):
+        """Test that reworded copies of a story are clustered together"""
+        from near_dedup import NearDuplicateDetector
+        
+        articles = [
+            {'title': 'Boeing wins $2B Air Force contract for new tanker jets',
+             'summary': '<p>The Air Force awarded Boeing a contract worth two billion dollars for tanker aircraft.</p>'},
+            {'title': 'NASA delays Artemis launch to next month',
+             'summary': 'Engineers need more time to inspect the heat shield.'},
+            {'title': 'Boeing wins $2 billion Air Force contract for new tanker jets',
+             'summary': 'The Air Force awarded Boeing a contract worth two billion dollars for tanker aircraft, officials said.'},
+            {'title': '', 'summary': ''},
+            {'title': '', 'summary': ''},
+        ]
+        detector = NearDuplicateDetector(threshold=0.6)
+        
+        self.assertEqual(detector.clusters(articles), [[0, 2], [1], [3], [4]])
+        self.assertEqual(
+            [a['title'] for a in detector.deduplicate(articles)],
+            [articles[0]['title'], articles[1]['title'], '', '']
+        )
+        self.assertEqual(detector.dropped, [articles[2]])
+        
+        # The dropped copy is remembered as sent along with the one that went out
+        from fetch_articles import main
+        with patch('fetch_articles.fetch_latest_articles', return_value=articles[:3]), \
+                patch('fetch_articles.send_email_with_articles', return_value=True), \
+                patch('fetch_articles.SendJournal') as mock_journal, \
+                patch('fetch_articles.DedupIndex') as mock_dedup:
+            mock_journal.return_value.pending_digests.return_value = []
+            main([])
+            mock_dedup.return_value.mark_sent.assert_called_once_with([articles[0], articles[1], articles[2]])
+        print("✅ Near-duplicate articles are clustered")
+    
+    def test_http_transport_keep_alive_and_gzip(self):
+        """Test that the transport reuses connections and decodes gzip bodies"""
+        import gzip
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from http_transport import HttpTransport, ResponseTooLarge
+        
+        payload = b"<rss><channel><title>Test</title></channel></rss>" * 50
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_GET(self):
+                if self.path == "/big.rss":
+                    body = payload * 100
+                elif self.path == "/bomb.rss":
+                    body = gzip.compress(b"\0" * 2 ** 24)
+                else:
+                    body = gzip.compress(payload)
+                self.send_response(200)
+                if self.path != "/big.rss":
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        transport = HttpTransport(timeout=5)
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            first = transport.get(f"{base}/a.rss")
+            second = transport.get(f"{base}/b.rss")
+            
+            # Oversized bodies are refused, whether sent that large or inflated from a small download
+            limited = HttpTransport(timeout=5, max_body_bytes=len(payload) * 10)
+            with self.assertRaises(ResponseTooLarge):
+                limited.get(f"{base}/big.rss")
+            with self.assertRaises(ResponseTooLarge):
+                limited.get(f"{base}/bomb.rss")
+            self.assertEqual(limited.get(f"{base}/a.rss").body, payload)
+            limited.close()
+        finally:
+            transport.close()
+            server.shutdown()
+            server.server_close()
+        
+        self.assertEqual(first.body, payload)
+        self.assertEqual(second.body, payload)
+        self.assertLess(first.wire_bytes, first.decoded_bytes)
+        stats = transport.get_stats()
+        self.assertEqual(stats['connections_opened'], 1)
+        self.assertEqual(stats['connections_reused'], 1)
+        
+        # Relative links resolve against the final URL, as when feedparser fetched the feed itself
+        from fetch_articles import _fetch_feed
+        feed = (b'<?xml version="1.0"?><rss version="2.0"><channel><title>Test</title>'
+                b'<item><title>Relative</title><link>/news/1</link></item></channel></rss>')
+        transport = MagicMock()
+        transport.get.return_value = HttpResponse("https://example.com/feeds/rss.xml", 200,
+                                                  {'content-type': 'application/rss+xml'}, feed, len(feed))
+        articles, _ = _fetch_feed("https://example.com/rss", 10, transport)
+        self.assertEqual(articles[0]['link'], "https://example.com/news/1")
+        print("✅ HTTP transport reuses connections and decodes gzip")
+    
+    def test_recency_merge_with_limit_and_since(self):
+        """Test that feeds are merged newest first with a global limit and cutoff"""
+        import time
+        import fetch_articles
+        from datetime import timezone
+        
+        feeds = ["https://a.example.com/rss", "https://b.example.com/rss"]
+        hours = {feeds[0]: [9, 3, None], feeds[1]: [7, 5, 1]}
+        
+        def fake_parse(body, **kwargs):
+            url = body.decode()
+            entries = []
+            for hour in hours[url]:
+                entry = MagicMock()
+                entry.title = f"{url} at {hour}"
+                entry.link = f"{url}/{hour}"
+                entry.published_parsed = time.struct_time((2024, 1, 1, hour, 0, 0, 0, 1, 0)) if hour else None
+                entry.updated_parsed = None
+                entries.append(entry)
+            return MagicMock(entries=entries)
+        
+        with patch.object(fetch_articles, 'FEEDS', feeds), \
+             patch('fetch_articles.feedparser') as mock_feedparser:
+            mock_feedparser.parse.side_effect = fake_parse
+            newest = fetch_latest_articles(transport=make_fake_transport(), limit=3)
+            recent = fetch_latest_articles(
+                transport=make_fake_transport(), since=datetime(2024, 1, 1, 4, tzinfo=timezone.utc)
+            )
+            everything = fetch_latest_articles(transport=make_fake_transport())
+        
+        self.assertEqual([a['published_at'].hour for a in newest], [9, 7, 5])
+        self.assertEqual([a['published_at'].hour for a in recent], [9, 7, 5])
+        self.assertEqual(len(everything), 6)
+        self.assertIsNone(everything[-1]['published_at'])
+        print("✅ Articles are merged by recency")
+    
+    def test_iter_articles_streams_as_feeds_finish(self):
+        """Test that articles are yielded before slower feeds finish"""
+        import time
+        import fetch_articles
+        
+        feeds = ["https://slow.example.com/rss", "https://fast.example.com/rss"]
+        
+        def fake_parse(body, **kwargs):
+            url = body.decode()
+            if url == feeds[0]:
+                time.sleep(0.5)
+            entry = MagicMock()
+            entry.title = f"Article from {url}"
+            entry.link = url
+            entry.summary = "Streamed summary"
+            return MagicMock(entries=[entry])
+        
+        with patch.object(fetch_articles, 'FEEDS', feeds), \
+             patch('fetch_articles.feedparser') as mock_feedparser:
+            mock_feedparser.parse.side_effect = fake_parse
+            started = time.monotonic()
+            stream = iter_articles(transport=make_fake_transport())
+            first = next(stream)
+            self.assertLess(time.monotonic() - started, 0.4)
+            self.assertEqual(first['feed'], feeds[1])
+            
+            # Rendering consumes the rest of the stream in one pass
+            html_content = format_articles_for_email(stream)
+        
+        self.assertIn('1 Articles This Week', html_content)
+        self.assertIn(f"Article from {feeds[0]}", html_content)
+        print("✅ Articles stream as feeds finish")
+    
     def test_email_html_formatting(self):
         """Test HTML email formatting"""
         html_content = format_articles_for_email(self.sample_articles)
@@ -99,6 +486,32 @@ class TestNewsletter(unittest.TestCase):
         self.assertIn('https://example.com/article1', text_content)
         print("✅ Text formatting is correct")
     
+    def test_digest_renderer_single_pass(self):
+        """Test that the renderer's bodies are byte-for-byte those of the original formatters"""
+        import hashlib
+        from digest_renderer import DigestRenderer
+        
+        articles = self.sample_articles + [{
+            'title': 'Markup Article',
+            'link': 'https://example.com/article3',
+            'published': 'Mon, 01 Jan 2024 14:00:00 +0000',
+            'summary': '<p>Tagged <b>summary</b></p>' + 'x' * 300
+        }]
+        date = datetime(2024, 1, 2, 8, 0)
+        html_content, text_content = DigestRenderer().render(iter(articles), date=date)
+        
+        # SHA-256 of what the original format_articles_for_email/_text returned for these articles
+        self.assertEqual(hashlib.sha256(html_content.encode()).hexdigest(),
+                         "1abd4d0a368e54f93293e3743c41ab9c70c685c3fafbb21a5b2e32ceb76bc92b")
+        self.assertEqual(hashlib.sha256(text_content.encode()).hexdigest(),
+                         "ab3c394ac492f771bde5b259410fd22034ae5c865ec7a22317447ac679fa39b9")
+        self.assertIn('January 02, 2024', html_content)
+        self.assertIn('3 Articles This Week', html_content)
+        self.assertIn('Tagged summary', html_content)
+        self.assertNotIn('<b>summary</b>', html_content)
+        self.assertIn('   📝 Summary: <p>Tagged <b>summary</b></p>' + 'x' * 272 + '...\n', text_content)
+        print("✅ Digest renderer matches the original formatters")
+    
     def test_email_sending_mock(self):
         """Test email sending with mocked SMTP"""
         with patch.dict(os.environ, {
@@ -121,7 +534,7 @@ class TestNewsletter(unittest.TestCase):
                     result = send_email_with_articles(self.sample_articles)
                     
                     # Verify SMTP was called correctly
-                    mock_smtp.assert_called_once_with('smtp.gmail.com', 587)
+                    mock_smtp.assert_called_once_with('smtp.gmail.com', 587, timeout=30.0)
                     mock_server.starttls.assert_called_once()
                     mock_server.login.assert_called_once_with('test@gmail.com', 'test_password')
                     # Should be called twice (once for each subscriber)
@@ -131,6 +544,339 @@ class TestNewsletter(unittest.TestCase):
                     self.assertTrue(result)
                     print("✅ Email sending (mocked) works correctly")
     
+    def test_send_journal_resumes_interrupted_send(self):
+        """Test that a send interrupted midway resumes without resending"""
+        import smtplib
+        import tempfile
+        from send_journal import SendJournal
+        
+        journal_file = os.path.join(tempfile.mkdtemp(), "send_journal.ndjson")
+        subscribers = [{'email': f'user{i}@example.com'} for i in range(3)]
+        try:
+            with patch.dict(os.environ, {
+                'GMAIL_EMAIL': 'test@gmail.com',
+                'GMAIL_APP_PASSWORD': 'test_password'
+            }), patch('fetch_articles.EmailManager') as mock_email_manager, \
+                    patch('fetch_articles.smtplib.SMTP') as mock_smtp:
+                mock_email_manager.return_value.get_active_subscribers.return_value = subscribers
+                mock_server = MagicMock()
+                mock_smtp.return_value = mock_server
+                
+                # The run dies after the first subscriber got the digest
+                mock_server.sendmail.side_effect = [None, smtplib.SMTPAuthenticationError(535, b"Revoked")]
+                journal = SendJournal(journal_file)
+                self.assertFalse(send_email_with_articles(self.sample_articles, journal=journal))
+                journal.close()
+                
+                # Simulate a record torn by the crash
+                with open(journal_file, 'a') as f:
+                    f.write('{"type": "sent", "digest"')
+                
+                journal = SendJournal(journal_file)
+                pending_digests = journal.pending_digests()
+                self.assertEqual(len(pending_digests), 1)
+                pending = pending_digests[0]
+                self.assertTrue(journal.is_sent(pending['digest'], 'user0@example.com'))
+                self.assertFalse(journal.is_sent(pending['digest'], 'user1@example.com'))
+                
+                mock_server.sendmail.reset_mock(side_effect=True)
+                digest = journal.restore(pending)
+                self.assertEqual(digest.id, pending['digest'])
+                self.assertTrue(send_email_with_articles(pending['articles'], journal=journal, digest=digest))
+                resent = [call.args[1] for call in mock_server.sendmail.call_args_list]
+                self.assertEqual(resent, ['user1@example.com', 'user2@example.com'])
+                self.assertEqual(journal.pending_digests(), [])
+                journal.close()
+                
+                # Completed digests are compacted out of the journal
+                self.assertEqual(SendJournal(journal_file).pending_digests(), [])
+                with open(journal_file) as f:
+                    self.assertEqual(f.read(), '')
+            print("✅ Send journal resumes an interrupted send")
+        finally:
+            if os.path.exists(journal_file):
+                os.remove(journal_file)
+    
+    def test_send_journal_keeps_digest_with_temporary_failures(self):
+        """Test that a digest stays pending while a recipient failed temporarily"""
+        import shutil
+        import smtplib
+        import tempfile
+        from send_journal import SendJournal
+        
+        journal_file = os.path.join(tempfile.mkdtemp(), "send_journal.ndjson")
+        subscribers = [{'email': f'user{i}@example.com'} for i in range(3)]
+        relay = {'busy': True}
+        
+        def sendmail(sender, recipient, message):
+            if recipient == 'user1@example.com' and relay['busy']:
+                raise smtplib.SMTPResponseException(451, b"Try again later")
+            if recipient == 'user2@example.com':
+                raise smtplib.SMTPResponseException(550, b"No such user")
+        
+        try:
+            with patch.dict(os.environ, {
+                'GMAIL_EMAIL': 'test@gmail.com',
+                'GMAIL_APP_PASSWORD': 'test_password'
+            }), patch('fetch_articles.EmailManager') as mock_email_manager, \
+                    patch('fetch_articles.smtplib.SMTP') as mock_smtp, \
+                    patch('fetch_articles.SMTP_MAX_ATTEMPTS', 1):
+                mock_email_manager.return_value.get_active_subscribers.return_value = subscribers
+                mock_smtp.return_value.sendmail.side_effect = sendmail
+                
+                journal = SendJournal(journal_file)
+                self.assertTrue(send_email_with_articles(self.sample_articles, journal=journal))
+                pending = journal.pending_digests()
+                self.assertEqual(len(pending), 1)
+                self.assertTrue(journal.is_sent(pending[0]['digest'], 'user0@example.com'))
+                
+                # Once the temporary failure clears, only the permanent one is left
+                relay['busy'] = False
+                self.assertTrue(send_email_with_articles(pending[0]['articles'], journal=journal,
+                                                         digest=journal.restore(pending[0])))
+                self.assertEqual(journal.pending_digests(), [])
+                journal.close()
+            print("✅ Send journal keeps digests with temporary failures pending")
+        finally:
+            shutil.rmtree(os.path.dirname(journal_file))
+    
+    def test_digest_message_reuses_encoded_body(self):
+        """Test that per-recipient messages share one encoded body"""
+        import email
+        from digest_message import DigestMessage
+        
+        digest = DigestMessage("Latest Aerospace & Defense News", "news@example.com",
+                               format_articles_for_text(self.sample_articles),
+                               format_articles_for_email(self.sample_articles))
+        first = digest.for_recipient("test1@example.com")
+        second = digest.for_recipient("test2@example.com")
+        
+        self.assertTrue(first.endswith(digest.body) and second.endswith(digest.body))
+        message = email.message_from_bytes(second)
+        self.assertEqual(message["To"], "test2@example.com")
+        self.assertEqual(message["Subject"], "Latest Aerospace & Defense News")
+        html_part = message.get_payload()[1]
+        self.assertEqual(html_part.get_content_type(), "text/html")
+        self.assertIn("Test Article 1", html_part.get_payload(decode=True).decode())
+        print("✅ Digest message encodes the body once")
+    
+    def test_digest_id_is_stable_across_renders(self):
+        """Test that rendering the same articles twice gives the same digest ID"""
+        from digest_message import DigestMessage
+        
+        def render(articles):
+            return DigestMessage("Latest Aerospace & Defense News", "news@example.com",
+                                 format_articles_for_text(articles), format_articles_for_email(articles))
+        
+        first = render(self.sample_articles)
+        second = render(self.sample_articles)
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(first.body, second.body)
+        self.assertEqual(DigestMessage.from_encoded(first.subject, first.sender, first.body).id, first.id)
+        self.assertNotEqual(render(self.sample_articles[:1]).id, first.id)
+        print("✅ Digest ID is stable across renders")
+    
+    def test_delivery_engine_pool_reconnects(self):
+        """Test parallel delivery over a connection pool with a dropped connection"""
+        import smtplib
+        import threading
+        import time
+        from digest_message import DigestMessage
+        from smtp_delivery import DeliveryEngine
+        
+        lock = threading.Lock()
+        delivered = []
+        connections = []
+        
+        class FlakySMTP:
+            """SMTP stand-in whose first connection drops after one message"""
+            
+            def __init__(self, host, port, timeout=None):
+                with lock:
+                    connections.append(self)
+                    self.drops_after = 1 if len(connections) == 1 else None
+                self.sent = 0
+            
+            def starttls(self):
+                pass
+            
+            def login(self, username, password):
+                pass
+            
+            def sendmail(self, sender, recipient, message):
+                if self.drops_after is not None and self.sent >= self.drops_after:
+                    raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+                time.sleep(0.01)
+                self.sent += 1
+                with lock:
+                    delivered.append(recipient)
+            
+            def quit(self):
+                pass
+            
+            def close(self):
+                pass
+        
+        recipients = [f"user{i}@example.com" for i in range(20)]
+        digest = DigestMessage("Subject", "news@example.com", "text", "<p>html</p>")
+        engine = DeliveryEngine("localhost", 25, "news@example.com", "secret",
+                                pool_size=3, smtp_factory=FlakySMTP)
+        report = engine.deliver(digest, recipients)
+        
+        self.assertEqual(sorted(report.sent), sorted(recipients))
+        self.assertEqual(sorted(delivered), sorted(recipients))
+        self.assertEqual(report.failed, {})
+        self.assertEqual(report.reconnects, 1)
+        self.assertEqual(len(connections), 4)
+        
+        # When the relay goes down, failed reconnects back off instead of using up every attempt at once
+        class DownSMTP(FlakySMTP):
+            def __init__(self, host, port, timeout=None):
+                if connections:
+                    raise ConnectionRefusedError("Connection refused")
+                super().__init__(host, port)
+        
+        connections.clear()
+        engine = DeliveryEngine("localhost", 25, smtp_factory=DownSMTP, max_attempts=3,
+                                retry_base_delay=0.05, retry_max_delay=0.05)
+        started = time.monotonic()
+        report = engine.deliver(digest, ["a@example.com", "b@example.com"])
+        self.assertEqual(report.sent, ["a@example.com"])
+        self.assertEqual(list(report.failed), ["b@example.com"])
+        self.assertEqual(report.reconnects, 1)
+        self.assertEqual(report.retries, 1)
+        self.assertGreaterEqual(time.monotonic() - started, 0.025)
+        
+        # Connections are opened with a timeout and closed when the handshake fails
+        server = MagicMock()
+        server.login.side_effect = smtplib.SMTPAuthenticationError(535, b"Bad credentials")
+        factory = MagicMock(return_value=server)
+        engine = DeliveryEngine("localhost", 25, "news@example.com", "secret", timeout=5, smtp_factory=factory)
+        with self.assertRaises(smtplib.SMTPAuthenticationError):
+            engine.connect()
+        factory.assert_called_once_with("localhost", 25, timeout=5)
+        server.close.assert_called_once()
+        print("✅ Delivery engine reconnects and delivers over a pool")
+    
+    def test_delivery_engine_rate_limit_and_retries(self):
+        """Test token-bucket pacing and retry of transient SMTP failures"""
+        import smtplib
+        import time
+        from digest_message import DigestMessage
+        from smtp_delivery import (DeliveryEngine, TokenBucket, classify_smtp_error,
+                                   TRANSIENT, PERMANENT)
+        
+        self.assertEqual(classify_smtp_error(smtplib.SMTPDataError(451, b"Try later")), TRANSIENT)
+        self.assertEqual(classify_smtp_error(smtplib.SMTPDataError(550, b"No such user")), PERMANENT)
+        self.assertEqual(classify_smtp_error(
+            smtplib.SMTPRecipientsRefused({"a@example.com": (452, b"Mailbox full")})), TRANSIENT)
+        self.assertEqual(classify_smtp_error(smtplib.SMTPServerDisconnected()), TRANSIENT)
+        
+        # Burst of 2, then one token every 20ms
+        bucket = TokenBucket(rate=50, capacity=2)
+        started = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        
+        attempts = {}
+        
+        class ThrottlingSMTP:
+            """SMTP stand-in that defers the first two sends to one address and rejects another"""
+            
+            def __init__(self, host, port, timeout=None):
+                pass
+            
+            def starttls(self):
+                pass
+            
+            def login(self, username, password):
+                pass
+            
+            def sendmail(self, sender, recipient, message):
+                attempts[recipient] = attempts.get(recipient, 0) + 1
+                if recipient == "slow@example.com" and attempts[recipient] <= 2:
+                    raise smtplib.SMTPDataError(451, b"4.7.0 Try again later")
+                if recipient == "gone@example.com":
+                    raise smtplib.SMTPRecipientsRefused({recipient: (550, b"5.1.1 No such user")})
+            
+            def quit(self):
+                pass
+        
+        recipients = ["ok@example.com", "slow@example.com", "gone@example.com"]
+        digest = DigestMessage("Subject", "news@example.com", "text", "<p>html</p>")
+        engine = DeliveryEngine("localhost", 25, rate=100, max_attempts=4,
+                                retry_base_delay=0.01, retry_max_delay=0.05,
+                                smtp_factory=ThrottlingSMTP)
+        report = engine.deliver(digest, recipients)
+        
+        self.assertEqual(sorted(report.sent), ["ok@example.com", "slow@example.com"])
+        self.assertEqual(list(report.failed), ["gone@example.com"])
+        self.assertEqual(attempts, {"ok@example.com": 1, "slow@example.com": 3, "gone@example.com": 1})
+        self.assertEqual(report.retries, 2)
+        
+        # A recipient that keeps failing temporarily is given up after max_attempts
+        attempts.clear()
+        engine.max_attempts = 2
+        report = engine.deliver(digest, ["slow@example.com"])
+        self.assertEqual(list(report.failed), ["slow@example.com"])
+        self.assertEqual(attempts["slow@example.com"], 2)
+        print("✅ Delivery engine paces sends and retries temporary failures")
+    
+    def test_delivery_engine_batches_recipients(self):
+        """Test multi-recipient transactions with per-recipient refusals"""
+        import smtplib
+        from digest_message import DigestMessage
+        from smtp_delivery import DeliveryEngine
+        
+        transactions = []
+        
+        class BatchingSMTP:
+            """SMTP stand-in that defers one recipient once and rejects another"""
+            
+            def __init__(self, host, port, timeout=None):
+                pass
+            
+            def starttls(self):
+                pass
+            
+            def login(self, username, password):
+                pass
+            
+            def sendmail(self, sender, recipients, message):
+                transactions.append((list(recipients), message))
+                refused = {}
+                if "busy@example.com" in recipients and len(transactions) == 1:
+                    refused["busy@example.com"] = (452, b"4.2.2 Mailbox busy")
+                if "gone@example.com" in recipients:
+                    refused["gone@example.com"] = (550, b"5.1.1 No such user")
+                if len(refused) == len(recipients):
+                    raise smtplib.SMTPRecipientsRefused(refused)
+                return refused
+            
+            def quit(self):
+                pass
+        
+        recipients = ["busy@example.com", "gone@example.com"] + [f"user{i}@example.com" for i in range(5)]
+        digest = DigestMessage("Subject", "news@example.com", "text", "<p>html</p>")
+        engine = DeliveryEngine("localhost", 25, batch_size=3, retry_base_delay=0.01,
+                                smtp_factory=BatchingSMTP)
+        sent = []
+        report = engine.deliver(digest, recipients, on_sent=sent.append)
+        
+        self.assertEqual(sorted(report.sent), sorted(r for r in recipients if r != "gone@example.com"))
+        self.assertEqual(sorted(sent), sorted(report.sent))
+        self.assertEqual(list(report.failed), ["gone@example.com"])
+        self.assertEqual(report.retries, 1)
+        # 7 recipients in batches of 3, plus one retry for the deferred recipient
+        self.assertEqual([len(batch) for batch, _ in transactions], [3, 3, 1, 1])
+        self.assertEqual(report.batches[0]['accepted'], ["user0@example.com"])
+        self.assertEqual(set(report.batches[0]['refused']), {"busy@example.com", "gone@example.com"})
+        for _, message in transactions:
+            self.assertTrue(message.startswith(b"To: undisclosed-recipients:;\r\n"))
+            self.assertTrue(message.endswith(digest.body))
+        print("✅ Delivery engine batches recipients into shared transactions")
+    
     def test_missing_credentials(self):
         """Test handling of missing credentials"""
         with patch.dict(os.environ, {}, clear=True):
@@ -161,10 +907,644 @@ class TestNewsletter(unittest.TestCase):
         
         # Clean up test file
         import os
-        if os.path.exists("test_subscribers.json"):
-            os.remove("test_subscribers.json")
+        for path in ("test_subscribers.json", "test_subscribers.json.lock"):
+            if os.path.exists(path):
+                os.remove(path)
         
         print("✅ EmailManager functionality works correctly")
+    
+    def test_email_manager_indexes(self):
+        """Test email/token indexes and the cached active count"""
+        import tempfile
+        
+        storage_file = os.path.join(tempfile.mkdtemp(), "subscribers.json")
+        try:
+            manager = EmailManager(storage_file)
+            for i in range(5):
+                self.assertTrue(manager.subscribe(f"User{i}@Example.com ")['success'])
+            
+            self.assertTrue(manager.is_subscribed(" user3@EXAMPLE.com"))
+            token = manager.get_subscriber("user2@example.com")['unsubscribe_token']
+            self.assertEqual(manager.get_subscriber(token=token)['email'], "user2@example.com")
+            
+            self.assertTrue(manager.unsubscribe(token=token)['success'])
+            self.assertTrue(manager.unsubscribe("user4@example.com")['success'])
+            # Unsubscribing twice must not count the subscriber twice
+            self.assertTrue(manager.unsubscribe("user4@example.com")['success'])
+            self.assertEqual(manager.get_stats()['active_subscribers'], 3)
+            self.assertEqual(manager.get_stats()['inactive_subscribers'], 2)
+            
+            # Resubscribing reactivates the existing record and keeps its token
+            result = manager.subscribe("user2@example.com")
+            self.assertTrue(result['success'])
+            self.assertEqual(result['subscriber']['unsubscribe_token'], token)
+            self.assertEqual(len(manager.get_all_subscribers()), 5)
+            self.assertEqual(manager.get_subscriber_count(), 4)
+            
+            # Indexes and counts are rebuilt from the saved file
+            reloaded = EmailManager(storage_file)
+            self.assertEqual(reloaded.get_subscriber_count(), 4)
+            self.assertFalse(reloaded.is_subscribed("user4@example.com"))
+            self.assertEqual(reloaded.get_subscriber(token=token)['email'], "user2@example.com")
+            print("✅ EmailManager indexes stay consistent across mutations")
+        finally:
+            if os.path.exists(storage_file):
+                os.remove(storage_file)
+    
+    def test_sqlite_subscriber_store(self):
+        """Test the SQLite backend, its migration from JSON and concurrent writers"""
+        import shutil
+        import tempfile
+        import threading
+        from subscriber_store import JsonSubscriberStore, SqliteSubscriberStore
+        
+        directory = tempfile.mkdtemp()
+        json_file = os.path.join(directory, "subscribers.json")
+        db_file = os.path.join(directory, "subscribers.db")
+        try:
+            legacy = EmailManager(json_file)
+            legacy.subscribe("old1@example.com", "Old One")
+            legacy.subscribe("old2@example.com")
+            legacy.unsubscribe("old2@example.com")
+            self.assertIsInstance(legacy.store, JsonSubscriberStore)
+            
+            self.assertEqual(SqliteSubscriberStore(db_file).import_json(json_file), 2)
+            manager = EmailManager(db_file)
+            self.assertIsInstance(manager.store, SqliteSubscriberStore)
+            self.assertEqual(manager.get_all_subscribers(), legacy.get_all_subscribers())
+            
+            # Writers on several threads each go through their own connection
+            def subscribe_range(start):
+                for i in range(start, start + 10):
+                    manager.subscribe(f"user{i}@example.com")
+            threads = [threading.Thread(target=subscribe_range, args=(n * 10,)) for n in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertTrue(manager.unsubscribe("user5@example.com")['success'])
+            
+            reloaded = EmailManager(db_file)
+            self.assertEqual(len(reloaded.get_all_subscribers()), 42)
+            self.assertEqual(reloaded.get_subscriber_count(), 40)
+            self.assertFalse(reloaded.is_subscribed("user5@example.com"))
+            self.assertEqual(reloaded.get_subscriber("old1@example.com")['name'], "Old One")
+            self.assertIn('unsubscribed_at', reloaded.get_subscriber("old2@example.com"))
+            
+            # The migrate command only opens the files it is given, not the configured store
+            import manage_subscribers
+            migrated_file = os.path.join(directory, "migrated.db")
+            with patch.object(sys, 'argv', ['manage_subscribers.py', 'migrate', migrated_file, '--from', json_file]), \
+                    patch.object(manage_subscribers, 'EmailManager', side_effect=AssertionError("store loaded")):
+                manage_subscribers.main()
+            self.assertEqual(len(SqliteSubscriberStore(migrated_file).load()), 2)
+            print("✅ SQLite subscriber store migrates and persists changes")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    
+    def test_bulk_subscribe_streaming_import(self):
+        """Test bulk import from streamed JSON, NDJSON and CSV with one save"""
+        import io
+        import json
+        import shutil
+        import tempfile
+        import manage_subscribers
+        
+        directory = tempfile.mkdtemp()
+        try:
+            manager = EmailManager(os.path.join(directory, "subscribers.json"))
+            manager.subscribe("existing@example.com")
+            rows = [{'email': f'User{i}@Example.com', 'name': f'User {i}'} for i in range(100)]
+            rows += [{'email': 'not-an-email'}, {'email': 'user7@example.com'}, {'email': 'existing@example.com'}]
+            
+            # Records are decoded one at a time, even across read boundaries
+            with patch.object(manage_subscribers, '_READ_CHUNK', 16):
+                document = io.StringIO(json.dumps({'subscribers': rows, 'total_count': len(rows)}))
+                records = list(manage_subscribers.iter_json_records(document))
+            self.assertEqual(records, rows)
+            
+            with patch.object(manager.store, 'save', wraps=manager.store.save) as save:
+                result = manager.bulk_subscribe(iter(records))
+            self.assertEqual(save.call_count, 1)
+            self.assertTrue(result['success'])
+            self.assertEqual((result['imported'], result['duplicates'], result['invalid']), (100, 2, 1))
+            self.assertEqual(result['errors'][0]['email'], 'not-an-email')
+            self.assertEqual(manager.get_subscriber_count(), 101)
+            
+            # NDJSON and CSV inputs, saved in chunks
+            ndjson = io.StringIO('{"email": "a@example.com"}\n\n{"email": "b@example.com", "name": "B"}\n')
+            csv_file = io.StringIO('email,name\nc@example.com,C\nd@example.com,\ne@example.com,E\n')
+            self.assertEqual(manage_subscribers.detect_format("list.jsonl"), 'ndjson')
+            self.assertEqual(manage_subscribers.detect_format("list.CSV"), 'csv')
+            with patch.object(manager.store, 'save', wraps=manager.store.save) as save:
+                manager.bulk_subscribe(manage_subscribers.iter_ndjson_records(ndjson))
+                result = manager.bulk_subscribe(manage_subscribers.iter_csv_records(csv_file), chunk_size=2)
+            self.assertEqual(save.call_count, 3)
+            self.assertEqual(result['imported'], 3)
+            
+            reloaded = EmailManager(os.path.join(directory, "subscribers.json"))
+            self.assertEqual(reloaded.get_subscriber_count(), 106)
+            self.assertEqual(reloaded.get_subscriber("b@example.com")['name'], "B")
+            self.assertIsNone(reloaded.get_subscriber("d@example.com")['name'])
+            print("✅ Bulk subscribe streams imports and saves once per chunk")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    
+    def test_group_commit_coalesces_writes(self):
+        """Test that concurrent signups share group commits and are durable when acknowledged"""
+        import shutil
+        import tempfile
+        import threading
+        
+        directory = tempfile.mkdtemp()
+        storage_file = os.path.join(directory, "subscribers.json")
+        try:
+            manager = EmailManager(storage_file, write_window=0.05)
+            results = []
+            with patch.object(manager.store, 'save', wraps=manager.store.save) as save:
+                threads = [
+                    threading.Thread(target=lambda i=i: results.append(manager.subscribe(f"user{i}@example.com")))
+                    for i in range(40)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                
+                self.assertTrue(all(r['success'] and r['durable'] for r in results))
+                self.assertLess(save.call_count, 10)
+                # Acknowledged signups are already on disk
+                self.assertEqual(EmailManager(storage_file).get_subscriber_count(), 40)
+                
+                # Without durability the call returns before the write; close flushes it
+                result = manager.unsubscribe("user0@example.com", durable=False)
+                self.assertTrue(result['success'])
+                self.assertFalse(result['durable'])
+                manager.close()
+            
+            reloaded = EmailManager(storage_file)
+            self.assertEqual(reloaded.get_subscriber_count(), 39)
+            self.assertFalse(reloaded.is_subscribed("user0@example.com"))
+            print("✅ Group commit coalesces concurrent signups")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    
+    def test_email_manager_cross_process_reload(self):
+        """Test that managers sharing a file merge writes and reload only on change"""
+        import shutil
+        import tempfile
+        
+        directory = tempfile.mkdtemp()
+        storage_file = os.path.join(directory, "subscribers.json")
+        try:
+            from subscriber_store import JsonSubscriberStore
+            # Two managers stand in for two server workers sharing the file, checking it before every read
+            worker1 = EmailManager(storage_file, store=JsonSubscriberStore(storage_file, stale_check_interval=0))
+            worker2 = EmailManager(storage_file, store=JsonSubscriberStore(storage_file, stale_check_interval=0))
+            self.assertTrue(worker1.subscribe("first@example.com")['success'])
+            self.assertTrue(worker2.subscribe("second@example.com")['success'])
+            
+            # worker2 merged instead of overwriting worker1's signup
+            self.assertEqual(EmailManager(storage_file).get_subscriber_count(), 2)
+            self.assertEqual(worker1.get_stats()['active_subscribers'], 2)
+            self.assertEqual(worker2.get_stats()['active_subscribers'], 2)
+            
+            # Both now see the same data and reload nothing until it changes again
+            with patch.object(worker1.store, 'load_snapshot', wraps=worker1.store.load_snapshot) as load:
+                worker1.get_stats()
+                worker1.is_subscribed("second@example.com")
+                self.assertEqual(load.call_count, 0)
+                
+                self.assertTrue(worker2.unsubscribe("first@example.com")['success'])
+                self.assertFalse(worker1.is_subscribed("first@example.com"))
+                self.assertEqual(load.call_count, 1)
+            
+            # A duplicate signup made by another worker is detected
+            self.assertFalse(worker1.subscribe("second@example.com")['success'])
+            
+            # By default reads check the file at most once per interval; changes always check
+            throttled = EmailManager(storage_file)
+            self.assertTrue(worker2.subscribe("late@example.com")['success'])
+            self.assertFalse(throttled.is_subscribed("late@example.com"))
+            self.assertFalse(throttled.subscribe("late@example.com")['success'])
+            self.assertTrue(worker2.unsubscribe("late@example.com")['success'])
+            throttled._next_stale_check = 0.0
+            self.assertFalse(throttled.is_subscribed("late@example.com"))
+            
+            # A load that races with a save here is dropped instead of hiding the saved change
+            racing = JsonSubscriberStore(storage_file)
+            snapshot = racing.load_snapshot()[2]
+            self.assertTrue(racing.save([], changed=[{'email': 'race@example.com', 'active': True}]))
+            self.assertFalse(racing.adopt(snapshot))
+            
+            # A save from an outdated copy merges its changes into the newer file
+            outdated = JsonSubscriberStore(storage_file)
+            outdated.load()
+            worker1.subscribe("third@example.com")
+            self.assertTrue(outdated.is_stale())
+            self.assertTrue(outdated.save([], changed=[{'email': 'fourth@example.com', 'active': True}]))
+            self.assertTrue(outdated.is_stale())
+            emails = [s['email'] for s in JsonSubscriberStore(storage_file).load()]
+            self.assertEqual(emails, ["first@example.com", "second@example.com", "late@example.com",
+                                      "race@example.com", "third@example.com", "fourth@example.com"])
+            
+            # A SQLite commit by another process right after ours is not mistaken for our own
+            from subscriber_store import SqliteSubscriberStore
+            database = os.path.join(directory, "subscribers.db")
+            ours, theirs = SqliteSubscriberStore(database), SqliteSubscriberStore(database)
+            ours.load()
+            files_version = ours._files_version
+            checks = []
+            
+            def commit_elsewhere_after_ours():
+                checks.append(True)
+                if len(checks) == 2:
+                    # The second check follows our commit
+                    theirs.save([], changed=[{'email': 'other@example.com', 'active': True}])
+                return files_version()
+            
+            with patch.object(ours, '_files_version', side_effect=commit_elsewhere_after_ours):
+                self.assertTrue(ours.save([], changed=[{'email': 'ours@example.com', 'active': True}]))
+            self.assertTrue(ours.is_stale())
+            ours.close()
+            theirs.close()
+            
+            # SQLite workers load only the rows changed elsewhere and patch them in
+            worker1, worker2 = EmailManager(database), EmailManager(database)
+            record = worker1.get_subscriber("other@example.com")
+            with patch.object(worker1.store, 'load_with_stats', side_effect=AssertionError("full reload")), \
+                    patch.object(worker1.store, 'load_changes', wraps=worker1.store.load_changes) as changes:
+                self.assertTrue(worker2.subscribe("new@example.com")['success'])
+                self.assertTrue(worker2.unsubscribe("other@example.com")['success'])
+                self.assertTrue(worker1.is_subscribed("new@example.com"))
+                self.assertFalse(record.active)
+                self.assertEqual(worker1.get_stats()['active_subscribers'], 2)
+                self.assertEqual(changes.call_count, 1)
+                # Our own writes are not loaded back
+                self.assertTrue(worker1.subscribe("mine@example.com")['success'])
+                self.assertTrue(worker1.is_subscribed("mine@example.com"))
+                self.assertEqual(changes.call_count, 1)
+            
+            # Rows deleted by a full rewrite elsewhere cannot be patched, so everything is reloaded
+            self.assertTrue(worker2.store.save([s for s in worker2.get_all_subscribers()
+                                                if s['email'] != "ours@example.com"]))
+            self.assertIsNone(worker1.get_subscriber("ours@example.com"))
+            self.assertEqual(worker1.get_stats()['total_subscribers'], 3)
+            worker1.store.close()
+            worker2.store.close()
+            print("✅ EmailManager reloads changes made by other processes")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    
+    def test_subscriber_api_pagination_and_streaming(self):
+        """Test cursor pagination, filters and NDJSON streaming of /api/subscribers"""
+        import json
+        import shutil
+        import tempfile
+        import signup_server
+        
+        directory = tempfile.mkdtemp()
+        try:
+            manager = EmailManager(os.path.join(directory, "subscribers.json"))
+            manager.bulk_subscribe(f"{name}{i}@example.com" for name in ("alice", "bob") for i in range(30))
+            manager.unsubscribe("bob3@example.com")
+            client = signup_server.app.test_client()
+            
+            with patch.object(signup_server, 'email_manager', manager):
+                emails, cursor = [], None
+                while True:
+                    url = "/api/subscribers?limit=7" + (f"&cursor={cursor}" if cursor else "")
+                    body = client.get(url).get_json()
+                    self.assertLessEqual(body['count'], 7)
+                    emails += [s['email'] for s in body['subscribers']]
+                    cursor = body['next_cursor']
+                    if cursor is None:
+                        break
+                # Inactive subscribers are left out unless asked for
+                self.assertEqual(len(emails), 59)
+                self.assertEqual(emails, sorted(emails))
+                self.assertNotIn("bob3@example.com", emails)
+                
+                body = client.get("/api/subscribers?prefix=BOB&active=false").get_json()
+                self.assertEqual([s['email'] for s in body['subscribers']], ["bob3@example.com"])
+                body = client.get("/api/subscribers?prefix=bob2&include_inactive=true&limit=5").get_json()
+                self.assertEqual(body['count'], 5)
+                self.assertTrue(all(s['email'].startswith("bob2") for s in body['subscribers']))
+                
+                response = client.get("/api/subscribers?format=ndjson&active=all&prefix=alice")
+                self.assertEqual(response.mimetype, 'application/x-ndjson')
+                rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+                self.assertEqual(len(rows), 30)
+                
+                # A streamed export picks up after the cursor of an earlier page
+                cursor = client.get("/api/subscribers?limit=10&active=all&prefix=alice").get_json()['next_cursor']
+                response = client.get(f"/api/subscribers?format=ndjson&active=all&prefix=alice&cursor={cursor}")
+                streamed = [json.loads(line)['email'] for line in response.get_data(as_text=True).splitlines()]
+                self.assertEqual(streamed, [row['email'] for row in rows[10:]])
+                self.assertEqual(client.get("/api/subscribers?format=ndjson&cursor=%%%").status_code, 400)
+                
+                self.assertEqual(client.get("/api/subscribers?cursor=%%%").status_code, 400)
+            print("✅ Subscriber API paginates, filters and streams")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    
+    def test_incremental_stats_and_cached_stats_api(self):
+        """Test O(1) counters, their persisted copy and the cached /api/stats response"""
+        import shutil
+        import tempfile
+        import signup_server
+        from subscriber_store import summarize
+        
+        directory = tempfile.mkdtemp()
+        try:
+            today = datetime.now().date().isoformat()
+            for storage_file in ("subscribers.json", "subscribers.db"):
+                manager = EmailManager(os.path.join(directory, storage_file))
+                manager.bulk_subscribe([{'email': 'a@example.com'}, {'email': 'b@example.com'}])
+                manager.subscribe("c@example.com")
+                manager.unsubscribe("a@example.com")
+                manager.subscribe("a@example.com")
+                manager.unsubscribe("b@example.com")
+                
+                with patch('email_manager.summarize', side_effect=AssertionError("full scan")):
+                    stats = manager.get_stats()
+                self.assertEqual((stats['active_subscribers'], stats['inactive_subscribers'],
+                                  stats['total_subscribers'], stats['signups_today']), (2, 1, 3, 3))
+                self.assertEqual(manager.get_signups_by_day(), {today: 3})
+                # The store keeps the same counters, and a new manager loads them instead of counting
+                self.assertEqual(manager.store.load_with_stats()[1], summarize(manager.get_all_subscribers()))
+                with patch('email_manager.summarize', side_effect=AssertionError("full scan")):
+                    reloaded = EmailManager(os.path.join(directory, storage_file))
+                    self.assertEqual(reloaded.get_stats()['active_subscribers'], 2)
+                    self.assertEqual(reloaded.get_signups_by_day(), {today: 3})
+                # The last change is persisted too, so restarts and other workers report the same stats
+                self.assertIsNotNone(stats['last_updated'])
+                self.assertEqual(reloaded.get_stats(), manager.get_stats())
+            
+            client = signup_server.app.test_client()
+            signup_server.stats_cache.clear()
+            with patch.object(signup_server, 'email_manager', manager), \
+                    patch.object(manager, 'get_stats', wraps=manager.get_stats) as get_stats:
+                first = client.get("/api/stats")
+                self.assertEqual(first.status_code, 200)
+                self.assertEqual(first.get_json()['stats']['active_subscribers'], 2)
+                etag = first.headers['ETag']
+                
+                cached = client.get("/api/stats", headers={'If-None-Match': etag})
+                self.assertEqual(cached.status_code, 304)
+                self.assertEqual(cached.get_data(), b"")
+                self.assertEqual(get_stats.call_count, 1)
+                
+                # Once the cache expires an unchanged list keeps the same ETag
+                signup_server.stats_cache.clear()
+                self.assertEqual(client.get("/api/stats").headers['ETag'], etag)
+                manager.subscribe("d@example.com")
+                signup_server.stats_cache.clear()
+                etag = client.get("/api/stats").headers['ETag']
+                self.assertNotEqual(first.headers['ETag'], etag)
+            
+            # Another worker on the same storage serves the same body and ETag
+            signup_server.stats_cache.clear()
+            with patch.object(signup_server, 'email_manager', EmailManager(os.path.join(directory, "subscribers.db"))):
+                self.assertEqual(client.get("/api/stats").headers['ETag'], etag)
+            signup_server.stats_cache.clear()
+            print("✅ Stats are counted incrementally and served from cache")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def test_compact_subscriber_records(self):
+        """Test slotted subscriber records keep the dict shape on the way in and out"""
+        import json
+        import shutil
+        import tempfile
+        from subscriber import Subscriber
+        
+        original = {
+            'email': 'legacy@example.com',
+            'name': 'Legacy',
+            'subscribed_at': '2024-03-01T09:15:30.123456',
+            'active': False,
+            'unsubscribe_token': '0123456789abcdef0123456789abcdef',
+            'unsubscribed_at': '2024-04-01T10:00:00',
+            'source': 'import'
+        }
+        record = Subscriber.from_dict(original)
+        self.assertFalse(hasattr(record, '__dict__'))
+        self.assertIsInstance(record._subscribed_at, int)
+        self.assertEqual(record.token_key, bytes.fromhex(original['unsubscribe_token']))
+        self.assertEqual(record.to_dict(), original)
+        self.assertEqual(list(record), list(original))
+        self.assertEqual(record.signup_day, '2024-03-01')
+        # Values that would not survive the compact form are kept as they are
+        odd = Subscriber.from_dict({'email': 'odd@example.com', 'subscribed_at': '2024-03-01 09:15',
+                                    'active': True, 'unsubscribe_token': 'custom-token'})
+        self.assertEqual(odd['subscribed_at'], '2024-03-01 09:15')
+        self.assertEqual(odd['unsubscribe_token'], 'custom-token')
+        
+        directory = tempfile.mkdtemp()
+        try:
+            storage_file = os.path.join(directory, "subscribers.json")
+            with open(storage_file, 'w') as f:
+                json.dump({'subscribers': [original], 'last_updated': '', 'total_count': 1}, f)
+            
+            manager = EmailManager(storage_file)
+            self.assertIsInstance(manager.get_all_subscribers()[0], Subscriber)
+            self.assertEqual(manager.get_subscriber(token=original['unsubscribe_token'])['email'],
+                             'legacy@example.com')
+            self.assertEqual(manager.export_subscribers(include_inactive=True), [original])
+            self.assertEqual(manager.page_subscribers()[0], [original])
+            
+            result = manager.subscribe("legacy@example.com")
+            self.assertEqual(type(result['subscriber']), dict)
+            self.assertNotIn('unsubscribed_at', result['subscriber'])
+            self.assertEqual(result['subscriber']['unsubscribe_token'], original['unsubscribe_token'])
+            
+            with open(storage_file) as f:
+                saved = json.load(f)['subscribers']
+            self.assertEqual(saved, [result['subscriber']])
+            print("✅ Compact subscriber records round-trip the dict shape")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    
+    def test_signed_unsubscribe_tokens(self):
+        """Test stateless unsubscribe tokens, key rotation and legacy stored tokens"""
+        import shutil
+        import tempfile
+        from unsubscribe_tokens import UnsubscribeSigner
+        
+        old_signer = UnsubscribeSigner(["old-key"])
+        signer = UnsubscribeSigner(["new-key", "old-key"], max_age=3600)
+        token = signer.sign("pilot@example.com")
+        self.assertEqual(signer.verify(token), "pilot@example.com")
+        # Tokens signed before the rotation still verify; unknown keys and edits do not
+        self.assertEqual(signer.verify(old_signer.sign("pilot@example.com")), "pilot@example.com")
+        self.assertIsNone(UnsubscribeSigner(["other-key"]).verify(token))
+        encoded_id, issued, key_id, signature = token.split('.')
+        forged = signer.sign("victim@example.com").split('.')[0]
+        self.assertIsNone(signer.verify('.'.join([forged, issued, key_id, signature])))
+        self.assertIsNone(signer.verify('.'.join([encoded_id, str(int(issued) + 1), key_id, signature])))
+        self.assertIsNone(signer.verify(signer.sign("pilot@example.com", issued=0)))
+        self.assertIsNone(signer.verify("not.a.valid.token"))
+        
+        directory = tempfile.mkdtemp()
+        try:
+            storage_file = os.path.join(directory, "subscribers.json")
+            legacy = EmailManager(storage_file, signer=None)
+            legacy.subscribe("legacy@example.com")
+            legacy_token = legacy.get_unsubscribe_token("legacy@example.com")
+            
+            manager = EmailManager(storage_file, signer=signer)
+            result = manager.subscribe("pilot@example.com")
+            new_token = result['subscriber']['unsubscribe_token']
+            self.assertEqual(signer.verify(new_token), "pilot@example.com")
+            self.assertNotIn('unsubscribe_token', manager.get_subscriber("pilot@example.com"))
+            self.assertEqual(manager.get_subscriber(token=new_token)['email'], "pilot@example.com")
+            
+            # A forged token is rejected before storage is checked
+            with patch.object(manager.store, 'is_stale', side_effect=AssertionError("storage touched")):
+                result = manager.unsubscribe(token=new_token.rsplit('.', 1)[0] + ".AAAAAAAAAAAAAAAAAAAAAA")
+            self.assertFalse(result['success'])
+            
+            self.assertTrue(manager.unsubscribe(token=new_token)['success'])
+            self.assertTrue(manager.unsubscribe(token=legacy_token)['success'])
+            self.assertEqual(manager.get_subscriber_count(), 0)
+            print("✅ Signed unsubscribe tokens verify without lookups")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    
+    def test_streaming_export_formats(self):
+        """Test JSON, NDJSON and CSV exports stream to files, gzip and stdout"""
+        import csv
+        import gzip
+        import io
+        import json
+        import shutil
+        import tempfile
+        import manage_subscribers
+        
+        directory = tempfile.mkdtemp()
+        try:
+            storage_file = os.path.join(directory, "subscribers.json")
+            manager = EmailManager(storage_file)
+            manager.subscribe("b@example.com", 'Hamilton, "Ham" Jones')
+            manager.subscribe("a@example.com")
+            manager.unsubscribe("a@example.com")
+            expected = manager.export_subscribers(include_inactive=True)
+            expected.sort(key=lambda s: s['email'])
+            
+            def run(*argv):
+                stdout = io.BytesIO()
+                wrapper = io.TextIOWrapper(stdout, encoding='utf-8')
+                with patch.dict(os.environ, {'SUBSCRIBERS_FILE': storage_file}), \
+                        patch.object(sys, 'argv', ['manage_subscribers.py'] + list(argv)), \
+                        patch.object(sys, 'stdout', wrapper):
+                    manage_subscribers.main()
+                    wrapper.flush()
+                return stdout.getvalue()
+            
+            json_file = os.path.join(directory, "export.json")
+            run('export', '--file', json_file)
+            with open(json_file) as f:
+                self.assertEqual(json.load(f), expected)
+            with open(json_file) as f:
+                self.assertEqual(list(manage_subscribers.iter_json_records(f)), expected)
+            
+            ndjson_file = os.path.join(directory, "export.ndjson.gz")
+            run('export', '--file', ndjson_file)
+            with gzip.open(ndjson_file, 'rt') as f:
+                self.assertEqual([json.loads(line) for line in f], expected)
+            
+            # Stdout carries only the data, so it can be piped into other tools
+            rows = list(csv.DictReader(io.StringIO(run('export', '--file', '-', '--format', 'csv').decode())))
+            self.assertEqual([row['name'] for row in rows], ['', 'Hamilton, "Ham" Jones'])
+            self.assertEqual(rows[0]['active'], 'False')
+            compressed = run('export', '--file', '-', '--format', 'ndjson', '--gzip', '--active-only')
+            self.assertEqual([json.loads(line)['email'] for line in gzip.decompress(compressed).splitlines()],
+                             ['b@example.com'])
+            self.assertEqual(json.loads(run('list', '--format', 'json')), expected)
+            print("✅ Exports stream JSON, NDJSON and CSV with optional gzip")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    
+    def test_topic_segmented_digests(self):
+        """Test subscribers are grouped by topics and each distinct digest is rendered once"""
+        import shutil
+        import tempfile
+        import fetch_articles
+        from segmentation import TopicIndex, plan_segments
+        from send_journal import SendJournal
+        
+        articles = [
+            {'title': 'Crew capsule reaches orbit', 'link': 'https://example.com/1', 'published': '',
+             'summary': 'A routine flight.', 'feed': 'https://www.nasa.gov/rss/dyn/breaking_news.rss'},
+            {'title': 'Army orders counter-drone systems', 'link': 'https://example.com/2', 'published': '',
+             'summary': 'The contract was awarded on Monday.', 'feed': 'https://www.defensenews.com/rss/'},
+            {'title': 'Airshow preview', 'link': 'https://example.com/3', 'published': '',
+             'summary': 'Aircraft on display.', 'feed': 'https://breakingdefense.com/feed/'},
+        ]
+        index = TopicIndex(articles)
+        self.assertEqual(index.postings, {'space': [0], 'drones': [1], 'defense-procurement': [1]})
+        
+        subscribers = [
+            {'email': 'all@example.com'},
+            {'email': 'space@example.com', 'topics': ['space']},
+            {'email': 'space2@example.com', 'topics': ['space']},
+            {'email': 'drones@example.com', 'topics': ['drones']},
+            # Selects the same articles as drones alone, so it shares that digest
+            {'email': 'procurement@example.com', 'topics': ['defense-procurement', 'drones']},
+        ]
+        segments = plan_segments(articles, subscribers)
+        self.assertEqual([(s.recipients, [a['link'][-1] for a in s.articles]) for s in segments], [
+            (['all@example.com'], ['1', '2', '3']),
+            (['space@example.com', 'space2@example.com'], ['1']),
+            (['drones@example.com', 'procurement@example.com'], ['2']),
+        ])
+        
+        directory = tempfile.mkdtemp()
+        try:
+            journal = SendJournal(os.path.join(directory, "send_journal.ndjson"))
+            with patch.dict(os.environ, {'GMAIL_EMAIL': 'test@gmail.com', 'GMAIL_APP_PASSWORD': 'pw'}), \
+                    patch('fetch_articles.EmailManager') as mock_email_manager, \
+                    patch('fetch_articles.smtplib.SMTP') as mock_smtp, \
+                    patch.object(fetch_articles._renderer, 'render', wraps=fetch_articles._renderer.render) as render:
+                mock_email_manager.return_value.get_active_subscribers.return_value = subscribers
+                self.assertTrue(send_email_with_articles(articles, journal=journal))
+                self.assertEqual(render.call_count, 3)
+                bodies = {call.args[1]: call.args[2] for call in mock_smtp.return_value.sendmail.call_args_list}
+                self.assertEqual(len(bodies), 5)
+                # Same encoded digest, only the To header differs
+                self.assertEqual(bodies['space@example.com'].split(b'\r\n', 1)[1],
+                                 bodies['space2@example.com'].split(b'\r\n', 1)[1])
+                self.assertNotEqual(bodies['space@example.com'].split(b'\r\n', 1)[1],
+                                    bodies['all@example.com'].split(b'\r\n', 1)[1])
+                self.assertEqual([[a['link'][-1] for a in call.args[0]] for call in render.call_args_list],
+                                 [['1', '2', '3'], ['1'], ['2']])
+                self.assertEqual(journal.pending_digests(), [])
+                
+                # A resumed digest only goes to the topic sets it was rendered for
+                mock_smtp.return_value.sendmail.reset_mock()
+                digest = fetch_articles._segment_digests(articles, subscribers, 'test@gmail.com')[1][0]
+                send_email_with_articles(articles[:1], digest=digest, topic_sets=[['space']])
+                self.assertEqual([call.args[1] for call in mock_smtp.return_value.sendmail.call_args_list],
+                                 ['space@example.com', 'space2@example.com'])
+            journal.close()
+            
+            # Topics survive both stores and reject unknown names
+            for storage_file in ("subscribers.json", "subscribers.db"):
+                manager = EmailManager(os.path.join(directory, storage_file))
+                self.assertFalse(manager.subscribe("x@example.com", topics=['cooking'])['success'])
+                manager.subscribe("x@example.com", topics=['space', 'drones'])
+                manager.subscribe("y@example.com")
+                self.assertTrue(manager.update_topics("y@example.com", ['space'])['success'])
+                manager.subscribe("z@example.com", topics=['space'])
+                reloaded = EmailManager(os.path.join(directory, storage_file))
+                self.assertEqual(reloaded.get_subscriber("x@example.com")['topics'], ['drones', 'space'])
+                # Identical topic choices share one interned set
+                self.assertIs(reloaded.get_subscriber("y@example.com").topics,
+                              reloaded.get_subscriber("z@example.com").topics)
+            print("✅ Digests are rendered once per topic segment")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
 
 def run_integration_test():
     """Run a full integration test (requires network)"""
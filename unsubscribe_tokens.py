@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Signed Unsubscribe Tokens for Aerospace Newsletter
+Stateless HMAC tokens that identify a subscriber and can be verified
+without looking anything up, with support for rotating the secret key
+"""
+
+import base64
+import binascii
+import hashlib
+import hmac
+import os
+import time
+from typing import List, Optional
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Separates these signatures from other uses of SECRET_KEY, such as Flask sessions
+_PURPOSE = b"aerospace-newsletter-unsubscribe"
+_SIGNATURE_BYTES = 16
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+def _b64decode(text: str) -> bytes:
+    return base64.b64decode(text + '=' * (-len(text) % 4), altchars=b'-_', validate=True)
+
+class UnsubscribeSigner:
+    """Signs and verifies ``<email>.<issued>.<key id>.<signature>`` tokens
+
+    The subscriber's email (base64url) is the subscriber ID, ``issued`` is
+    the Unix time the token was made, and the signature is a truncated
+    HMAC-SHA256 over both. Verification is a single HMAC and a constant-time
+    comparison, so a forged or damaged token is rejected before any
+    subscriber lookup or storage access.
+
+    Tokens are signed with the first key. Every key is accepted when
+    verifying, and the key id (a short hash of the key) picks the right one
+    directly, so the secret can be rotated by moving the old key to the
+    fallbacks. With ``max_age`` (seconds) older tokens are rejected.
+    """
+
+    def __init__(self, keys: List[str], max_age: Optional[float] = None):
+        if not keys:
+            raise ValueError("At least one signing key is required")
+        self.max_age = max_age
+        self._keys = {}
+        for key in keys:
+            secret = key.encode()
+            self._keys.setdefault(self._key_id(secret), secret)
+        self._current_id = self._key_id(keys[0].encode())
+
+    @classmethod
+    def from_env(cls) -> Optional['UnsubscribeSigner']:
+        """Build a signer from ``SECRET_KEY`` and the comma-separated ``SECRET_KEY_FALLBACKS``
+
+        Returns None when ``SECRET_KEY`` is not set, so tokens are not
+        signed with a guessable default key.
+        """
+        secret_key = os.getenv("SECRET_KEY")
+        if not secret_key:
+            return None
+        fallbacks = [key.strip() for key in os.getenv("SECRET_KEY_FALLBACKS", "").split(',') if key.strip()]
+        max_age = os.getenv("UNSUBSCRIBE_TOKEN_MAX_AGE")
+        return cls([secret_key] + fallbacks, float(max_age) if max_age else None)
+
+    @staticmethod
+    def _key_id(secret: bytes) -> str:
+        return hashlib.sha256(_PURPOSE + b":key-id:" + secret).hexdigest()[:8]
+
+    @staticmethod
+    def _signature(secret: bytes, subscriber_id: str, issued: int) -> bytes:
+        message = b"\n".join([_PURPOSE, subscriber_id.encode(), str(issued).encode()])
+        return hmac.new(secret, message, hashlib.sha256).digest()[:_SIGNATURE_BYTES]
+
+    @staticmethod
+    def is_signed(token: str) -> bool:
+        """Check whether a token has the signed format rather than being a legacy stored token"""
+        return token.count('.') == 3
+
+    def sign(self, subscriber_id: str, issued: int = None) -> str:
+        """Make a token for a subscriber ID"""
+        issued = int(time.time()) if issued is None else int(issued)
+        signature = self._signature(self._keys[self._current_id], subscriber_id, issued)
+        return f"{_b64encode(subscriber_id.encode())}.{issued}.{self._current_id}.{_b64encode(signature)}"
+
+    def verify(self, token: str) -> Optional[str]:
+        """Get the subscriber ID of a valid token, or None if it is malformed, forged or expired"""
+        try:
+            encoded_id, issued, key_id, signature = token.split('.')
+            subscriber_id = _b64decode(encoded_id).decode()
+            issued = int(issued)
+            signature = _b64decode(signature)
+        except (ValueError, binascii.Error, UnicodeDecodeError):
+            return None
+        secret = self._keys.get(key_id)
+        if secret is None:
+            logger.warning("⚠️ Unsubscribe token signed with an unknown key")
+            return None
+        if not hmac.compare_digest(signature, self._signature(secret, subscriber_id, issued)):
+            return None
+        if self.max_age is not None and time.time() - issued > self.max_age:
+            return None
+        return subscriber_id
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Group-Commit Writer for Aerospace Newsletter
+Coalesces subscriber changes made within a short window into a single
+storage write, performed by a background thread
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, List
+import logging
+
+from subscriber_store import SubscriberStore
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class CommitTicket:
+    """Handle for one submitted change; ``wait`` returns once it is durable"""
+
+    def __init__(self, done: bool = False, success: bool = False):
+        self.success = success
+        self._event = threading.Event()
+        if done:
+            self._event.set()
+
+    def resolve(self, success: bool):
+        self.success = success
+        self._event.set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until the change is written; True if it was saved successfully"""
+        return self._event.wait(timeout) and self.success
+
+class GroupCommitWriter:
+    """Write-behind queue flushing batched changes to a ``SubscriberStore``
+
+    Changes are submitted while the caller holds ``lock``, the owner's lock
+    guarding its records. The writer thread wakes on the first submission,
+    waits ``window`` seconds for more, then copies every changed record
+    under ``lock`` and saves them with a single ``store.save`` call. A full
+    copy of ``get_subscribers()`` is only taken for stores that rewrite
+    everything. All tickets of a batch resolve
+    together once the write completes.
+    """
+
+    def __init__(self, store: SubscriberStore, lock, get_subscribers: Callable[[], List[Dict]],
+                 window: float = 0.05):
+        self.store = store
+        self.lock = lock
+        self.get_subscribers = get_subscribers
+        self.window = window
+        self.commits = 0
+        self.committed_changes = 0
+        self._pending: Dict[int, Dict] = {}
+        self._tickets: List[CommitTicket] = []
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="subscriber-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, changed: Iterable[Dict]) -> CommitTicket:
+        """Queue changed records for the next group commit"""
+        ticket = CommitTicket()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Writer is closed")
+            for record in changed:
+                self._pending[id(record)] = record
+            self._tickets.append(ticket)
+            self._cond.notify()
+        return ticket
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._tickets and not self._closed:
+                    self._cond.wait()
+                if not self._tickets and self._closed:
+                    return
+            # Let concurrent requests join this commit
+            if not self._closed:
+                time.sleep(self.window)
+            self._commit()
+
+    def _commit(self):
+        """Write everything submitted so far in one store call"""
+        # Commits are serialized so an older snapshot never overwrites a newer
+        # one. The owner's lock is always taken first, and released before the
+        # slow write so requests keep applying changes meanwhile.
+        with self.lock:
+            self._write_lock.acquire()
+            with self._cond:
+                records, self._pending = list(self._pending.values()), {}
+                tickets, self._tickets = self._tickets, []
+            if not tickets:
+                self._write_lock.release()
+                return
+            changed = [record.copy() for record in records]
+            if self.store.incremental:
+                snapshot = []
+            else:
+                snapshot = [s.copy() for s in self.get_subscribers()]
+
+        try:
+            success = self.store.save(snapshot, changed)
+        except Exception as e:
+            logger.error(f"Error in group commit: {e}")
+            success = False
+        finally:
+            self.commits += 1
+            self.committed_changes += len(changed)
+            self._write_lock.release()
+        for ticket in tickets:
+            ticket.resolve(success)
+
+    def has_pending(self) -> bool:
+        """Check whether changes are queued or being written"""
+        with self._cond:
+            return bool(self._tickets) or self._write_lock.locked()
+
+    def flush(self):
+        """Write pending changes now instead of waiting for the window"""
+        self._commit()
+
+    def close(self):
+        """Flush pending changes and stop the writer thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self._commit()